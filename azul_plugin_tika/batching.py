@@ -0,0 +1,120 @@
+"""Gather small files from concurrent jobs so tika can parse them together in one request."""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from .result import TikaResult
+
+
+class _Entry:
+    """A file waiting in a batch for its result."""
+
+    def __init__(self, file_path: str, size: int, timeout: float):
+        self.file_path = file_path
+        self.size = size
+        self.timeout = timeout
+        self.result: TikaResult | None = None
+        self.done = threading.Event()
+
+
+class _Batch:
+    def __init__(self):
+        self.entries: list[_Entry] = []
+        self.size = 0
+        self.closed = False
+
+
+class Batcher:
+    """Collect files submitted by jobs running on other threads into batches sent with a single request.
+
+    The first job to arrive leads a batch: while other jobs are running in the process (see job()) it waits up
+    to linger seconds for them to join, until the batch holds max_files files or another would take it over
+    max_bytes, then sends the whole batch and hands every job its result. A job left in a batch of its own gets
+    None and parses its file as usual.
+
+    Jobs only run concurrently in a process when an application runs plugin instances on separate threads. The
+    runner runs one job at a time in each process, so there every file is handed back at once to parse alone.
+    """
+
+    def __init__(self, max_files: int, max_bytes: int, linger: float):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self.batches = 0
+        self.batched = 0
+        # jobs running in the process, which an open batch may wait for to join it
+        self.jobs = 0
+        self._open: _Batch | None = None
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def job(self):
+        """Count a job as running in the process while the context is open."""
+        with self._cond:
+            self.jobs += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.jobs -= 1
+                self._cond.notify_all()
+
+    def _close(self, batch: _Batch):
+        batch.closed = True
+        if self._open is batch:
+            self._open = None
+        self._cond.notify_all()
+
+    def submit(
+        self, file_path: str, size: int, timeout: float, send: Callable[[list[str], float], list[TikaResult | None]]
+    ) -> TikaResult | None:
+        """Add a file to the open batch, returning its result or None if it must be parsed on its own.
+
+        send(file_paths, read_timeout) parses a batch, returning a result or None for each file. It is given
+        the longest read timeout of the files in the batch.
+        """
+        entry = _Entry(file_path, size, timeout)
+        with self._cond:
+            batch = self._open
+            if batch is not None and batch.size + size > self.max_bytes:
+                self._close(batch)
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            batch.entries.append(entry)
+            batch.size += size
+            if len(batch.entries) >= self.max_files:
+                self._close(batch)
+            if leader:
+                deadline = time.monotonic() + self.linger
+                # no use waiting once every running job is in the batch
+                while not batch.closed and self.jobs > len(batch.entries):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._close(batch)
+        if leader:
+            self._send(batch, send)
+        entry.done.wait()
+        return entry.result
+
+    def _send(self, batch: _Batch, send: Callable[[list[str], float], list[TikaResult | None]]):
+        entries = batch.entries
+        results = [None] * len(entries)
+        try:
+            if len(entries) > 1:
+                results = send([e.file_path for e in entries], max(e.timeout for e in entries))
+                with self._cond:
+                    self.batches += 1
+                    self.batched += sum(1 for r in results if r is not None)
+        finally:
+            # waiting jobs are always released, to parse their files alone if the batch failed
+            for entry, result in zip(entries, results, strict=False):
+                entry.result = result
+                entry.done.set()
+            for entry in entries[len(results) :]:
+                entry.done.set()
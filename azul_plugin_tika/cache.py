@@ -0,0 +1,308 @@
+"""Local cache of tika unpack results, and of its failures, so content that was already analysed skips tika."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from .client import CHUNK_SIZE
+from .result import TikaResult
+
+# Classes of failure remembered by the NegativeCache
+EMPTY = "empty"
+TIMEOUT = "timeout"
+ERROR = "error"
+# Characters of a failure message remembered
+MESSAGE_LENGTH = 200
+
+
+def cache_key(sha256: str, tika_version: str, settings: dict) -> str:
+    """Key a result on the content hash, the tika server version and the settings that change the result."""
+    material = json.dumps([sha256, tika_version, settings], sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _size_of(data) -> int:
+    """Size in bytes of attachment data held as bytes or as a file object."""
+    if isinstance(data, bytes):
+        return len(data)
+    return os.fstat(data.fileno()).st_size
+
+
+def _result_size(result: TikaResult) -> int:
+    """Approximate memory footprint of an unpack result."""
+    size = len(result.content) + len(json.dumps(result.metadata))
+    for name, data in result.attachments.items():
+        size += len(name) + _size_of(data)
+    return size
+
+
+class ResultCache:
+    """Base for result cache backends, counting hits and misses."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> TikaResult | None:
+        """Return the cached unpack result for key, or None."""
+        result = self._get(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def put(self, key: str, result: TikaResult):
+        """Store an unpack result, leaving any attachment file objects rewound for the caller."""
+        raise NotImplementedError()
+
+    def _get(self, key: str) -> TikaResult | None:
+        raise NotImplementedError()
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counters for reporting how many tika calls were saved."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryCache(ResultCache):
+    """In-memory least recently used cache bounded by the total size of cached results."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[TikaResult, int]] = OrderedDict()
+
+    def _get(self, key: str) -> TikaResult | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return entry[0].copy()
+
+    def put(self, key: str, result: TikaResult):
+        """Store a copy of the result, reading any spooled attachments into memory."""
+        size = _result_size(result)
+        if size > self.max_bytes:
+            return
+        stored = result.copy()
+        for name, data in result.attachments.items():
+            if not isinstance(data, bytes):
+                stored.attachments[name] = data.read()
+                data.seek(0)
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (stored, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+
+class DiskCache(ResultCache):
+    """On-disk cache storing one directory per result, evicting the least recently used once over max_bytes.
+
+    Each entry holds a 'result.json' with the metadata, text and attachment names, alongside the attachment
+    content stored under its sha256. Attachments are returned as open file objects so they are never all
+    loaded into memory at once, which the caller must close, see TikaResult.close().
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._sizes: dict[str, int] = {}
+        for entry in os.scandir(directory):
+            if entry.is_dir() and not entry.name.startswith("."):
+                self._sizes[entry.name] = self._dir_size(entry.path)
+        self.size = sum(self._sizes.values())
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+    def _get(self, key: str) -> TikaResult | None:
+        path = os.path.join(self.directory, key)
+        attachments = {}
+        try:
+            with open(os.path.join(path, "result.json"), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for name, digest in stored["attachments"].items():
+                attachments[name] = open(os.path.join(path, digest), "rb")
+            # directory mtime tracks recency of use for eviction
+            os.utime(path)
+        except BaseException as e:
+            for data in attachments.values():
+                data.close()
+            if isinstance(e, (FileNotFoundError, json.JSONDecodeError)):
+                # evicted by another worker sharing the directory, or a partial write
+                return None
+            raise
+        stored["attachments"] = attachments
+        return TikaResult.from_dict(stored)
+
+    def put(self, key: str, result: TikaResult):
+        """Write the result to a staging directory then move it into place, so readers never see partial entries."""
+        if _result_size(result) > self.max_bytes:
+            return
+        staging = tempfile.mkdtemp(prefix=".", dir=self.directory)
+        try:
+            names = {}
+            for name, data in result.attachments.items():
+                digest = hashlib.sha256()
+                with tempfile.NamedTemporaryFile(dir=staging, delete=False) as out:
+                    if isinstance(data, bytes):
+                        digest.update(data)
+                        out.write(data)
+                    else:
+                        for chunk in iter(lambda: data.read(CHUNK_SIZE), b""):  # noqa: B023
+                            digest.update(chunk)
+                            out.write(chunk)
+                        data.seek(0)
+                os.replace(out.name, os.path.join(staging, digest.hexdigest()))
+                names[name] = digest.hexdigest()
+            stored = result.as_dict()
+            stored["attachments"] = names
+            with open(os.path.join(staging, "result.json"), "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            size = self._dir_size(staging)
+            path = os.path.join(self.directory, key)
+            try:
+                os.rename(staging, path)
+            except OSError:
+                # already cached, possibly by another worker
+                return
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        with self._lock:
+            self._sizes[key] = size
+            self.size += size
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until back under max_bytes."""
+        by_age = []
+        for key in self._sizes:
+            try:
+                by_age.append((os.stat(os.path.join(self.directory, key)).st_mtime, key))
+            except FileNotFoundError:
+                by_age.append((0, key))
+        for _, key in sorted(by_age):
+            if self.size <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            self.size -= self._sizes.pop(key)
+
+
+class NegativeCache:
+    """Failures of files tika could not parse, so resubmitted files skip tika until the entry expires.
+
+    Entries map a result cache key to the class of failure (EMPTY, TIMEOUT or ERROR) and its message, and expire
+    ttl seconds after they were added. At most max_entries are kept, the least recently used going first.
+    With a path, entries are also appended to that file and loaded from it when the cache is created, so they
+    survive restarts. Once the file holds twice max_entries lines it is rewritten with only the live entries,
+    dropping any added by other processes since this one loaded it.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, path: str = ""):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        # short-circuited jobs by failure class, each one a tika call saved
+        self.hits: dict[str, int] = {}
+        self._entries: OrderedDict[str, tuple[str, str, float]] = OrderedDict()
+        self._lines = 0
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        """Number of failures remembered, including any that expired but haven't been looked up since."""
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        """Return the failure class and message remembered for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            failure, message, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits[failure] = self.hits.get(failure, 0) + 1
+        return failure, message
+
+    def put(self, key: str, failure: str, message: str = ""):
+        """Remember that tika failed on the content for key."""
+        message = message[:MESSAGE_LENGTH]
+        # wall clock rather than monotonic time, as expiry times are persisted
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(key, failure, message, expires)
+            if self.path:
+                self._append(key, failure, message, expires)
+
+    def _store(self, key: str, failure: str, message: str, expires: float):
+        self._entries.pop(key, None)
+        self._entries[key] = (failure, message, expires)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self):
+        now = time.time()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        entry = json.loads(line)
+                        if entry["expires"] > now:
+                            self._store(entry["key"], entry["failure"], entry["message"], entry["expires"])
+                    except (ValueError, KeyError, TypeError):
+                        # partial line from an interrupted write
+                        continue
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _line(key: str, failure: str, message: str, expires: float) -> str:
+        return json.dumps({"key": key, "failure": failure, "message": message, "expires": expires}) + "\n"
+
+    def _append(self, key: str, failure: str, message: str, expires: float):
+        if self._lines >= 2 * self.max_entries:
+            self._compact()
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(self._line(key, failure, message, expires))
+        self._lines += 1
+
+    def _compact(self):
+        """Rewrite the file with the live entries, replacing it in one step so readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix=".", dir=directory)
+        now = time.time()
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for key, (failure, message, expires) in self._entries.items():
+                    if expires > now:
+                        f.write(self._line(key, failure, message, expires))
+            os.replace(staging, self.path)
+        except OSError:
+            os.remove(staging)
+            raise
+        self._lines = len(self._entries)
@@ -0,0 +1,725 @@
+"""HTTP client for the Tika server that reuses pooled keep-alive connections across jobs."""
+
+import codecs
+import csv
+import hashlib
+import io
+import os
+import re
+import socket
+import stat
+import tarfile
+import tempfile
+import time
+from contextlib import closing, contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from .concurrency import AdaptiveLimiter
+from .endpoints import Endpoint, EndpointPool
+from .result import EmbeddedDocument, TikaResult, intern
+
+METADATA_MEMBER = "__METADATA__"
+# Keys of the '/rmeta' documents holding the text and where a document sits in the embedded tree
+RMETA_CONTENT = "X-TIKA:content"
+RMETA_PATH = "X-TIKA:embedded_resource_path"
+# Bookkeeping keys '/rmeta' adds that '/unpack/all' doesn't report
+RMETA_INTERNAL = (
+    RMETA_PATH,
+    "X-TIKA:embedded_id",
+    "X-TIKA:embedded_id_path",
+    "X-TIKA:embedded_depth",
+    "X-TIKA:parse_time_millis",
+    "embeddedResourceType",
+)
+# Metadata tika gives the members of a batch tar that describes the tar entry rather than the file
+BATCH_ENTRY_METADATA = ("resourceName", "Content-Length", "X-TIKA:internalPath")
+BATCH_ENTRY_MODIFIED = "1970-01-01T00:00:00Z"
+TEXT_MEMBER = "__TEXT__"
+# Read size used when streaming responses and spooling attachments to disk
+CHUNK_SIZE = 64 * 1024
+# Set by tika when it stopped writing text at the requested write limit
+WRITE_LIMIT_REACHED = "X-TIKA:WRITE_LIMIT_REACHED"
+# Extra characters allowed past the text limit so leading whitespace doesn't hide truncation
+WRITE_LIMIT_SLACK = 1024
+NON_SPACE = re.compile(r"\S")
+
+
+class TikaResponseError(Exception):
+    """Tika server answered with an unexpected HTTP status."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(status, reason)
+        self.status = status
+        self.reason = reason
+
+    def __str__(self):
+        """Describe the failing response."""
+        return f"Tika server returned status {self.status} {self.reason}"
+
+
+def _sendfile_body(body, headers) -> bool:
+    """Whether a request body is a regular file sent with a Content-Length, so it can go out with sendfile()."""
+    if not any(key.lower() == "content-length" for key in headers or {}):
+        return False
+    try:
+        return stat.S_ISREG(os.fstat(body.fileno()).st_mode)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+
+class _SendfileConnection(HTTPConnection):
+    """HTTPConnection uploading file bodies with sendfile(), straight from the file descriptor to the socket.
+
+    Other bodies, and chunked requests, are sent as usual.
+    """
+
+    def request(self, method, url, body=None, headers=None, **kwargs):
+        if kwargs.get("chunked") or not _sendfile_body(body, headers):
+            return super().request(method, url, body=body, headers=headers, **kwargs)
+        # the headers already carry the Content-Length so no body framing is added
+        super().request(method, url, body=None, headers=headers, **kwargs)
+        self.sock.sendfile(body, body.tell())
+
+
+class _SendfilePool(HTTPConnectionPool):
+    ConnectionCls = _SendfileConnection
+
+
+class _TikaAdapter(HTTPAdapter):
+    """HTTPAdapter for tika connections.
+
+    keep_alive enables TCP keep-alive probes on pooled sockets so idle connections stay usable, and sendfile
+    uploads files over plain http with sendfile() rather than reading them through python in blocks.
+    """
+
+    def __init__(self, keep_alive: bool = True, sendfile: bool = True, **kwargs):
+        # set before HTTPAdapter.__init__ creates the pool manager
+        self.keep_alive = keep_alive
+        self.sendfile = sendfile
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keep_alive:
+            keep_alive = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + keep_alive
+        # bodies that can't use sendfile (https, chunked) are still read in large blocks
+        kwargs["blocksize"] = CHUNK_SIZE
+        super().init_poolmanager(*args, **kwargs)
+        if self.sendfile:
+            self.poolmanager.pool_classes_by_scheme = {
+                **self.poolmanager.pool_classes_by_scheme,
+                "http": _SendfilePool,
+            }
+
+
+class AttachmentLimits:
+    """Per job limits on the attachments kept from an unpack, 0 disables a limit.
+
+    max_ratio limits the total attachment bytes as a multiple of the size of the unpacked file (input_size),
+    catching decompression bombs.
+    """
+
+    def __init__(
+        self, max_count: int = 0, max_size: int = 0, max_total: int = 0, max_ratio: float = 0, input_size: int = 0
+    ):
+        self.max_count = max_count
+        self.max_size = max_size
+        self.max_total = max_total
+        self.max_ratio = max_ratio
+        self.input_size = input_size
+
+    def exceeded(self, count: int, total: int, size: int) -> str | None:
+        """The limit another attachment of size bytes would break, given those kept so far, or None."""
+        if self.max_count and count >= self.max_count:
+            return "max_count"
+        if self.max_size and size > self.max_size:
+            return "max_size"
+        if self.max_total and total + size > self.max_total:
+            return "max_total"
+        if self.max_ratio and self.input_size and total + size > self.max_ratio * self.input_size:
+            return "max_ratio"
+        return None
+
+
+@contextmanager
+def raw_errors():
+    """Raise errors reading a streamed response body as the requests exceptions they amount to.
+
+    urllib3 raises its own exceptions from the raw response, which requests only translates for content it reads.
+    """
+    try:
+        yield
+    except ReadTimeoutError as e:
+        raise requests.ReadTimeout(e) from e
+    except ProtocolError as e:
+        raise requests.ConnectionError(e) from e
+
+
+class TikaClient:
+    """Client for one or more Tika servers holding a bounded pool of persistent connections to each.
+
+    Unlike the tika-python module helpers this never probes for or starts a local server, and the
+    underlying session is reused for every request so the TCP/HTTP setup is only paid once per connection.
+    Requests are balanced across the servers by an EndpointPool, see there for the ejection options.
+    Files are streamed from disk rather than read into memory, using sendfile() over plain http.
+    """
+
+    def __init__(
+        self,
+        server: str | list[str],
+        pool_size: int = 4,
+        connect_timeout: float = 10,
+        read_timeout: float = 160,
+        keep_alive: bool = True,
+        sendfile: bool = True,
+        spool_limit: int | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        **endpoint_options,
+    ):
+        self.endpoints = EndpointPool(server, probe=self._probe, **endpoint_options)
+        self.timeout = (connect_timeout, read_timeout)
+        # optional limit on requests in flight across every thread using this client
+        self.limiter = limiter
+        # when set, responses are streamed and attachments beyond this many bytes are spooled to disk
+        self.spool_limit = spool_limit
+        self.session = requests.Session()
+        # pool_block stops the pool growing past pool_size under concurrent use
+        adapter = _TikaAdapter(
+            keep_alive=keep_alive,
+            sendfile=sendfile,
+            pool_connections=len(self.endpoints.endpoints),
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+    @contextmanager
+    def _endpoint(self, lane: str | None = None):
+        """Reserve an endpoint for the duration of a request, reporting back whether the server failed.
+
+        lane is the limiter lane the request waits in, if any.
+        """
+        in_flight = self.limiter.acquire(lane) if self.limiter else 0
+        endpoint = self.endpoints.acquire()
+        start = time.monotonic()
+        failed = False
+        try:
+            yield endpoint
+        except TikaResponseError as e:
+            # server errors count against the endpoint, others are down to the file being parsed
+            failed = e.status >= 500
+            raise
+        except (requests.ConnectionError, requests.Timeout):
+            failed = True
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            self.endpoints.release(endpoint, failed, elapsed)
+            if self.limiter:
+                self.limiter.release(in_flight, elapsed, failed, lane)
+
+    def _probe(self, endpoint: Endpoint) -> bool:
+        """Health check an endpoint that is due to come back from ejection."""
+        try:
+            resp = self.session.get(f"{endpoint.url}/version", headers=endpoint.headers, timeout=self.timeout[0])
+        except requests.RequestException:
+            return False
+        return resp.status_code == 200
+
+    def ready(self) -> bool:
+        """Whether any of the tika servers answers its health check, without counting failures against it."""
+        return any(self._probe(endpoint) for endpoint in self.endpoints.endpoints)
+
+    def version(self) -> str:
+        """Return the tika server version string, e.g. 'Apache Tika 3.2.3'."""
+        with self._endpoint() as endpoint:
+            resp = self.session.get(f"{endpoint.url}/version", headers=endpoint.headers, timeout=self.timeout)
+            if resp.status_code != 200:
+                raise TikaResponseError(resp.status_code, resp.reason)
+            return resp.text.strip()
+
+    def detect(self, file_path: str, max_bytes: int) -> str:
+        """Detect the mime type with '/detect/stream' from only the first max_bytes of the file."""
+        with open(file_path, "rb") as f:
+            head = f.read(max_bytes)
+        with self._endpoint() as endpoint:
+            resp = self.session.put(
+                f"{endpoint.url}/detect/stream",
+                data=head,
+                headers={
+                    **endpoint.headers,
+                    "Accept": "text/plain",
+                    "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
+                },
+                timeout=self.timeout,
+            )
+            if resp.status_code != 200:
+                raise TikaResponseError(resp.status_code, resp.reason)
+            return resp.text.strip()
+
+    def meta(
+        self,
+        file_path: str,
+        max_bytes: int | None = None,
+        stats: dict | None = None,
+        read_timeout: float | None = None,
+    ) -> dict:
+        """Metadata of the file from the '/meta' endpoint, which doesn't return any text.
+
+        With max_bytes only the leading bytes of the file are uploaded, which is enough for tika to identify
+        the type and charset of a text file. stats and read_timeout are as for unpack().
+        """
+        stats = {} if stats is None else stats
+        headers = {
+            "Accept": "application/json",
+            "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
+        }
+        with self._endpoint() as endpoint, open(file_path, "rb") as f:
+            resp = self.session.put(
+                f"{endpoint.url}/meta",
+                data=f if max_bytes is None else f.read(max_bytes),
+                headers={**endpoint.headers, **headers},
+                timeout=self.timeout if read_timeout is None else (self.timeout[0], read_timeout),
+            )
+            stats["tika"] = resp.elapsed.total_seconds()
+            with closing(resp):
+                if resp.status_code == 204:
+                    return {}
+                if resp.status_code != 200:
+                    raise TikaResponseError(resp.status_code, resp.reason)
+                stats["bytes_out"] = len(resp.content)
+                return resp.json() if resp.content else {}
+
+    def unpack(
+        self,
+        file_path: str,
+        max_text: int | None = None,
+        stats: dict | None = None,
+        read_timeout: float | None = None,
+        attachments_only: bool = False,
+        limits: AttachmentLimits | None = None,
+        lane: str | None = None,
+    ) -> TikaResult | None:
+        """Unpack the file with the '/unpack/all' endpoint, or '/unpack' for only the attachments.
+
+        Returns the metadata, content and attachments as a TikaResult, see parse_unpack(), or None if Tika had
+        nothing to say about the file.
+
+        The content is returned stripped of surrounding whitespace. With max_text, tika is asked to stop
+        writing text shortly after that many characters, at most max_text characters are decoded, and
+        content_truncated is set in the result when there was more text.
+
+        When the client has a spool_limit the tar is decoded as it is read off the socket, and any
+        attachments that don't fit in the memory budget are returned as temporary file objects instead of bytes.
+
+        If a stats dict is given it is filled with the seconds spent waiting for tika to upload and parse the
+        file ('tika'), downloading the response ('download', only when not streaming) and decoding the tar
+        ('decode', including the download when streaming), and the bytes received ('bytes_out').
+
+        read_timeout overrides the client's read timeout for this request, limiting how long tika may parse.
+        limits are applied to the attachments as they are decoded, see parse_unpack().
+        lane is the concurrency limiter lane the request waits in, see AdaptiveLimiter.
+        """
+        path = "/unpack" if attachments_only else "/unpack/all"
+        streaming = self.spool_limit is not None
+        stats = {} if stats is None else stats
+        headers = {
+            "Accept": "application/x-tar",
+            "Content-Disposition": f"attachment; filename={os.path.basename(file_path)}",
+        }
+        if max_text is not None:
+            headers["writeLimit"] = str(max_text + WRITE_LIMIT_SLACK)
+        with self._endpoint(lane) as endpoint:
+            start = time.perf_counter()
+            with open(file_path, "rb") as f:
+                resp = self.session.put(
+                    f"{endpoint.url}{path}",
+                    data=f,
+                    headers={**endpoint.headers, **headers},
+                    timeout=self.timeout if read_timeout is None else (self.timeout[0], read_timeout),
+                    stream=streaming,
+                )
+            received = time.perf_counter()
+            stats["tika"] = resp.elapsed.total_seconds()
+            with closing(resp):
+                if resp.status_code == 204:
+                    return None
+                if resp.status_code != 200:
+                    raise TikaResponseError(resp.status_code, resp.reason)
+                if not streaming:
+                    stats["download"] = max(0.0, received - start - stats["tika"])
+                    stats["bytes_out"] = len(resp.content)
+                    if not resp.content:
+                        return None
+                    result = parse_unpack(io.BytesIO(resp.content), max_text=max_text, limits=limits)
+                    stats["decode"] = time.perf_counter() - received
+                    return result
+                resp.raw.decode_content = True
+                body = io.BufferedReader(resp.raw, CHUNK_SIZE)
+                with raw_errors():
+                    if not body.peek(1):
+                        return None
+                    result = parse_unpack(body, spool_limit=self.spool_limit, max_text=max_text, limits=limits)
+                    # drain the end of archive padding so the connection is returned to the pool rather than dropped
+                    resp.raw.drain_conn()
+                stats["decode"] = time.perf_counter() - received
+                stats["bytes_out"] = resp.raw.tell()
+                return result
+
+    def rmeta(
+        self,
+        file_path: str,
+        max_text: int | None = None,
+        stats: dict | None = None,
+        read_timeout: float | None = None,
+        lane: str | None = None,
+    ) -> list[dict]:
+        """Parse the file and every document embedded in it with the '/rmeta/text' endpoint.
+
+        Returns tika's list of metadata dicts, the container first then each embedded document, with the
+        text of each in 'X-TIKA:content' and its place in the tree in 'X-TIKA:embedded_resource_path'.
+        max_text, stats, read_timeout and lane are as for unpack(), except the text limit applies across all
+        documents.
+        """
+        with open(file_path, "rb") as f:
+            return self._rmeta(f, os.path.basename(file_path), max_text, stats, read_timeout, lane)
+
+    def _rmeta(
+        self,
+        f,
+        filename: str,
+        max_text: int | None,
+        stats: dict | None,
+        read_timeout: float | None,
+        lane: str | None = None,
+    ) -> list[dict]:
+        headers = {
+            "Accept": "application/json",
+            "Content-Disposition": f"attachment; filename={filename}",
+        }
+        if max_text is not None:
+            headers["writeLimit"] = str(max_text + WRITE_LIMIT_SLACK)
+        stats = {} if stats is None else stats
+        with self._endpoint(lane) as endpoint:
+            start = time.perf_counter()
+            resp = self.session.put(
+                f"{endpoint.url}/rmeta/text",
+                data=f,
+                headers={**endpoint.headers, **headers},
+                timeout=self.timeout if read_timeout is None else (self.timeout[0], read_timeout),
+            )
+            received = time.perf_counter()
+            stats["tika"] = resp.elapsed.total_seconds()
+            with closing(resp):
+                if resp.status_code == 204:
+                    return []
+                if resp.status_code != 200:
+                    raise TikaResponseError(resp.status_code, resp.reason)
+                stats["download"] = max(0.0, received - start - stats["tika"])
+                stats["bytes_out"] = len(resp.content)
+                documents = resp.json() if resp.content else []
+                stats["decode"] = time.perf_counter() - received
+                return documents
+
+    def rmeta_batch(
+        self,
+        file_paths: list[str],
+        max_text: int | None = None,
+        stats: dict | None = None,
+        read_timeout: float | None = None,
+    ) -> list[TikaResult | None]:
+        """Parse several small files in a single '/rmeta/text' request by uploading them together as a tar.
+
+        Returns a result for each file in order, see split_rmeta_batch(). The text limit applies to each file.
+        """
+        with tempfile.TemporaryFile() as batch:
+            with tarfile.open(fileobj=batch, mode="w") as tar:
+                for index, file_path in enumerate(file_paths):
+                    # entries carry no timestamp or owner that tika could mistake for the file's own metadata
+                    info = tarfile.TarInfo(str(index))
+                    info.size = os.path.getsize(file_path)
+                    with open(file_path, "rb") as f:
+                        tar.addfile(info, f)
+            batch.seek(0)
+            batch_text = None if max_text is None else (max_text + WRITE_LIMIT_SLACK) * len(file_paths)
+            documents = self._rmeta(batch, "batch.tar", batch_text, stats, read_timeout)
+        return split_rmeta_batch(documents, len(file_paths), max_text)
+
+    def unpack_rmeta(
+        self,
+        file_path: str,
+        max_text: int | None = None,
+        stats: dict | None = None,
+        read_timeout: float | None = None,
+        limits: AttachmentLimits | None = None,
+        lane: str | None = None,
+    ) -> TikaResult | None:
+        """Parse the whole embedded document tree with '/rmeta', returning parse_rmeta()'s TikaResult.
+
+        Attachment data is only fetched, with '/unpack', when tika found embedded documents, so files without
+        any still take a single request. Files with embedded documents are uploaded and parsed twice.
+        stats accumulates over both requests.
+        """
+        stats = {} if stats is None else stats
+        result = parse_rmeta(self.rmeta(file_path, max_text, stats, read_timeout, lane), max_text)
+        if result is not None and result.embedded:
+            unpack_stats = {}
+            unpacked = self.unpack(
+                file_path,
+                stats=unpack_stats,
+                read_timeout=read_timeout,
+                attachments_only=True,
+                limits=limits,
+                lane=lane,
+            )
+            if unpacked is not None:
+                result.attachments = unpacked.attachments
+                result.duplicates = unpacked.duplicates
+                result.skipped = unpacked.skipped
+            for key, value in unpack_stats.items():
+                stats[key] = stats.get(key, 0) + value
+        return result
+
+
+def _truncate_nulls(lines):
+    # Tika can write null characters into the metadata csv (TIKA-3070)
+    for line in lines:
+        yield line.replace("\0", "")
+
+
+def parse_metadata(f) -> dict:
+    """Parse the csv formatted '__METADATA__' member, one key per line with list values as extra columns."""
+    metadata = {}
+    with closing(f):
+        text = io.StringIO(f.read().decode("utf-8"), newline=None)
+    for line in csv.reader(_truncate_nulls(text)):
+        if len(line) < 2:
+            continue
+        metadata[intern(line[0])] = line[1:] if len(line) > 2 else line[1]
+    return metadata
+
+
+def write_text(
+    f, out, max_text: int | None = None, encoding: str = "utf-8", errors: str = "strict"
+) -> tuple[int, bool]:
+    """Stream the text in f to the text stream out, stripped of surrounding whitespace and cut at max_text.
+
+    Text is decoded from encoding and written a chunk at a time, and whitespace is held back until more text
+    follows it, so memory use is bounded by the chunk size rather than by the size of the extracted text.
+    Text past the limit is not read. Returns the characters written and whether text was cut.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    size = 0
+    # whitespace only written if more text follows, kept up to the remaining limit
+    pending = ""
+    pending_size = 0
+    started = False
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if not started:
+            text = text.lstrip()
+            started = bool(text)
+        body = text.rstrip()
+        if body:
+            if max_text is not None and size + pending_size + len(body) > max_text:
+                remaining = max_text - size
+                out.write(pending[:remaining])
+                out.write(body[: max(0, remaining - len(pending))])
+                return max_text, True
+            out.write(pending)
+            out.write(body)
+            size += pending_size + len(body)
+            pending = ""
+            pending_size = 0
+            text = text[len(body) :]
+        if text:
+            pending_size += len(text)
+            pending = (pending + text) if max_text is None else (pending + text)[: max_text - size]
+        if not chunk:
+            return size, False
+
+
+def read_text(f, max_text: int | None = None, encoding: str = "utf-8", errors: str = "strict") -> tuple[str, bool]:
+    """Decode the utf-8 '__TEXT__' member stripped of surrounding whitespace, keeping at most max_text characters.
+
+    Returns the text and whether it was truncated, see write_text(), which also decodes text files read locally.
+    """
+    out = io.StringIO()
+    _, truncated = write_text(f, out, max_text, encoding, errors)
+    return out.getvalue(), truncated
+
+
+def _spool(f) -> tuple[tempfile.TemporaryFile, str]:
+    """Copy a tar member to an anonymous temporary file, returned rewound along with its sha256."""
+    spooled = tempfile.TemporaryFile()
+    digest = hashlib.sha256()
+    while chunk := f.read(CHUNK_SIZE):
+        digest.update(chunk)
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+
+def parse_unpack(
+    fileobj, spool_limit: int | None = None, max_text: int | None = None, limits: AttachmentLimits | None = None
+) -> TikaResult:
+    """Decode an '/unpack/all' tar response into metadata, text content and attachments, in a single pass.
+
+    Without a spool_limit the whole tar must be seekable and every attachment is returned as bytes.
+    With a spool_limit the tar is read as a forward-only stream, and attachments are only kept in memory
+    while their combined size stays within spool_limit, the rest are spooled to temporary files.
+
+    Attachments are hashed as they are read and identical content is only kept once, under the first name
+    it was found with. Any other names for it are listed under that name in duplicates.
+
+    Attachments that would break the limits are skipped from their tar header without being read. They are
+    summarised in skipped as the number and total bytes skipped for each limit.
+    """
+    metadata = {}
+    content = ""
+    truncated = False
+    attachments = {}
+    in_memory = 0
+    first_names = {}
+    duplicates = {}
+    kept = 0
+    skipped = {}
+    with tarfile.open(fileobj=fileobj, mode="r" if spool_limit is None else "r|") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            if member.name == METADATA_MEMBER:
+                metadata = parse_metadata(tar.extractfile(member))
+                continue
+            if member.name == TEXT_MEMBER:
+                with closing(tar.extractfile(member)) as f:
+                    content, truncated = read_text(f, max_text)
+                continue
+            exceeded = limits and limits.exceeded(len(attachments), kept, member.size)
+            if exceeded:
+                count, size = skipped.get(exceeded, (0, 0))
+                skipped[exceeded] = (count + 1, size + member.size)
+                continue
+            f = tar.extractfile(member)
+            if spool_limit is None or in_memory + member.size <= spool_limit:
+                with closing(f):
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                if digest in first_names:
+                    duplicates[first_names[digest]].append(member.name)
+                    continue
+                in_memory += member.size
+                first_names[digest] = member.name
+                duplicates[member.name] = []
+                attachments[member.name] = data
+                kept += member.size
+            else:
+                with closing(f):
+                    data, digest = _spool(f)
+                if digest in first_names:
+                    data.close()
+                    duplicates[first_names[digest]].append(member.name)
+                    continue
+                first_names[digest] = member.name
+                duplicates[member.name] = []
+                attachments[member.name] = data
+                kept += member.size
+    if metadata.pop(WRITE_LIMIT_REACHED, "false") == "true":
+        truncated = True
+    return TikaResult(
+        metadata,
+        content,
+        truncated,
+        attachments,
+        duplicates={name: others for name, others in duplicates.items() if others},
+        skipped=skipped,
+    )
+
+
+def limit_text(text: str, max_text: int | None = None) -> tuple[str, bool]:
+    """Strip surrounding whitespace and keep at most max_text characters, returning whether text was dropped.
+
+    Only the kept characters are copied, the rest of the text is just scanned for anything but whitespace.
+    """
+    first = NON_SPACE.search(text)
+    if first is None:
+        return "", False
+    start = first.start()
+    end = len(text) if max_text is None else start + max_text
+    if NON_SPACE.search(text, end):
+        return text[start:end], True
+    return text[start:end].rstrip(), False
+
+
+def _rmeta_document(doc: dict, max_text: int | None) -> tuple[dict, str, bool]:
+    """Split an '/rmeta' document into metadata with interned keys, limited text and whether text was cut."""
+    metadata = {intern(k): v for k, v in doc.items() if k not in RMETA_INTERNAL}
+    content, truncated = limit_text(metadata.pop(RMETA_CONTENT, None) or "", max_text)
+    if metadata.pop(WRITE_LIMIT_REACHED, "false") == "true":
+        truncated = True
+    return metadata, content, truncated
+
+
+def parse_rmeta(documents: list[dict], max_text: int | None = None) -> TikaResult | None:
+    """Map an '/rmeta' response onto the TikaResult parse_unpack() returns, without any attachment data.
+
+    The container's metadata and text become the result's. Each directly embedded document's metadata and
+    text are returned in embedded, keyed by the name tika gives the attachment, marked nested when it has
+    embedded documents of its own. None when tika returned no documents.
+    """
+    if not documents:
+        return None
+    result = TikaResult(*_rmeta_document(documents[0], max_text))
+    paths = [doc.get(RMETA_PATH, "") for doc in documents[1:]]
+    nested = {p.split("/")[1] for p in paths if p.count("/") > 1}
+    for doc, path in zip(documents[1:], paths, strict=True):
+        if path.count("/") == 1:
+            name = path[1:]
+            result.embedded[name] = EmbeddedDocument(*_rmeta_document(doc, max_text), nested=name in nested)
+    return result
+
+
+def _batch_entry_metadata(doc: dict) -> dict:
+    """Remove what tika reports about the tar entry a batched file was sent in."""
+    doc = {k: v for k, v in doc.items() if k not in BATCH_ENTRY_METADATA}
+    modified = doc.get("dcterms:modified")
+    if modified == BATCH_ENTRY_MODIFIED:
+        del doc["dcterms:modified"]
+    elif isinstance(modified, list) and BATCH_ENTRY_MODIFIED in modified:
+        doc["dcterms:modified"] = [v for v in modified if v != BATCH_ENTRY_MODIFIED]
+    return doc
+
+
+def split_rmeta_batch(documents: list[dict], count: int, max_text: int | None = None) -> list[TikaResult | None]:
+    """Split the '/rmeta' response for a batch tar into a result for each of the count files in it.
+
+    Each result is a TikaResult as parse_unpack() returns, with no attachments. A file gets None instead when
+    it must be parsed on its own: tika found embedded documents in it (the batch can't return their data),
+    failed to parse it, stopped writing its text at the write limit, or didn't report it at all.
+    """
+    results = [None] * count
+    paths = [doc.get(RMETA_PATH, "") for doc in documents[1:]]
+    nested = {p.split("/")[1] for p in paths if p.count("/") > 1}
+    for doc, path in zip(documents[1:], paths, strict=True):
+        name = path[1:]
+        if path.count("/") != 1 or name in nested or not name.isdigit() or int(name) >= count:
+            continue
+        failed = any(k.startswith("X-TIKA:EXCEPTION:") and k != "X-TIKA:EXCEPTION:warn" for k in doc)
+        if failed or doc.get(WRITE_LIMIT_REACHED) == "true":
+            continue
+        results[int(name)] = TikaResult(*_rmeta_document(_batch_entry_metadata(doc), max_text))
+    return results
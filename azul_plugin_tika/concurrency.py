@@ -0,0 +1,256 @@
+"""Limit how many requests are in flight to tika, adapting the limit to how quickly tika responds."""
+
+import fcntl
+import json
+import math
+import os
+import threading
+
+# Files in a SharedLimiter's directory
+STATE_FILE = "state.json"
+STATE_LOCK = "state.lock"
+WAITING_LOCK = "waiting.lock"
+
+
+class AdaptiveLimiter:
+    """Concurrency limit for tika requests shared by every job in the process.
+
+    Uses a gradient on response times: a slow moving baseline is compared with recent latency, and while
+    they match the limit grows (tika has idle threads), when recent latency rises the limit shrinks in
+    proportion (requests are queueing inside tika rather than running in parallel). Failed requests cut
+    the limit by 10%. With adaptive off it is a fixed size semaphore at max_limit.
+
+    Requests may also be put in a lane with its own limit (lane_limits), such as one for large files, so
+    they can't hold every slot. Lane requests never take the last free slot (unless the limit is 1), wait
+    while requests outside any lane are queued, and their latency doesn't move the limit.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial: int | None = None,
+        adaptive: bool = True,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        lane_limits: dict[str, int] | tuple[tuple[str, int], ...] = (),
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.limit = float(self.max_limit if not adaptive else (initial or self.min_limit))
+        self.in_flight = 0
+        self.lane_limits = dict(lane_limits)
+        self.lane_in_flight = {lane: 0 for lane in self.lane_limits}
+        # requests outside any lane waiting for a slot, which lane requests give way to
+        self.waiting = 0
+        self.recent_latency: float | None = None
+        self.baseline_latency: float | None = None
+        self._cond = threading.Condition()
+
+    def acquire(self, lane: str | None = None) -> int:
+        """Wait for a free slot, returning the number of requests in flight including this one."""
+        with self._cond:
+            if lane is None:
+                self.waiting += 1
+                try:
+                    while self.in_flight >= int(self.limit):
+                        self._cond.wait()
+                finally:
+                    self.waiting -= 1
+            else:
+                while not self._lane_free(lane):
+                    self._cond.wait()
+                self.lane_in_flight[lane] += 1
+            self.in_flight += 1
+            return self.in_flight
+
+    def _lane_free(self, lane: str) -> bool:
+        if self.waiting or self.lane_in_flight[lane] >= self.lane_limits[lane]:
+            return False
+        return self.in_flight < max(1, int(self.limit) - 1)
+
+    def release(self, in_flight: int, latency: float, failed: bool, lane: str | None = None):
+        """Free a slot, adapting the limit to the request's latency or failure."""
+        with self._cond:
+            self.in_flight -= 1
+            if lane is not None:
+                self.lane_in_flight[lane] -= 1
+            if self.adaptive and (lane is None or failed):
+                self._update(latency, failed, in_flight)
+            self._cond.notify_all()
+
+    def _update(self, latency: float, failed: bool, in_flight: int):
+        if failed:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            return
+        if self.recent_latency is None:
+            self.recent_latency = self.baseline_latency = latency
+        else:
+            self.recent_latency += (latency - self.recent_latency) * 0.5
+            self.baseline_latency += (latency - self.baseline_latency) * 0.01
+        # don't grow the limit when it wasn't the constraint
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_latency / self.recent_latency))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+
+class SharedLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter shared by every process using the same directory, such as the runner's plugin instances.
+
+    The runner runs each of its concurrent_plugin_instances in a separate process, so a slot is a lock file in
+    the directory held with flock() while the request is in flight, and the adaptive limit and latencies are
+    kept in a state file beside them. The kernel drops the locks of a process that exits, so its slots can't
+    leak. Requests waiting for a slot look again every poll_interval seconds, or sooner when a request from
+    the same process finishes.
+
+    Lane requests also hold one of their lane's slot files, and only take slots below the last one. Requests
+    outside any lane hold a shared lock on a waiting file while they wait, which lane requests in every process
+    give way to.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_limit: int,
+        min_limit: int = 1,
+        initial: int | None = None,
+        adaptive: bool = True,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        lane_limits: dict[str, int] | tuple[tuple[str, int], ...] = (),
+        poll_interval: float = 0.05,
+    ):
+        super().__init__(max_limit, min_limit, initial, adaptive, tolerance, smoothing, lane_limits)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.poll_interval = poll_interval
+        # descriptors of the slot files locked by this process's requests, by lane
+        self._slots = {lane: [] for lane in (None, *self.lane_limits)}
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _try_lock(self, name: str) -> int | None:
+        """Lock the named file without waiting, returning its open descriptor or None when it is already locked."""
+        fd = os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _load(self):
+        """Take up the limit and latencies other processes have saved, if any."""
+        if not self.adaptive:
+            return
+        try:
+            with open(self._path(STATE_FILE)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.limit = max(self.min_limit, min(self.max_limit, state["limit"]))
+        self.recent_latency = state["recent_latency"]
+        self.baseline_latency = state["baseline_latency"]
+
+    def _save(self):
+        temp_path = self._path(f"{STATE_FILE}.{os.getpid()}")
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "limit": self.limit,
+                    "recent_latency": self.recent_latency,
+                    "baseline_latency": self.baseline_latency,
+                },
+                f,
+            )
+        os.replace(temp_path, self._path(STATE_FILE))
+
+    def acquire(self, lane: str | None = None) -> int:
+        """Wait for a free slot, returning the number of requests in flight including this one.
+
+        Slots are taken lowest first, so the count is of the requests holding lower slots when this one started.
+        """
+        with self._cond:
+            slot = self._try_acquire(lane)
+            if slot is None:
+                waiting = None
+                if lane is None:
+                    self.waiting += 1
+                    waiting = os.open(self._path(WAITING_LOCK), os.O_RDWR | os.O_CREAT, 0o600)
+                    fcntl.flock(waiting, fcntl.LOCK_SH)
+                try:
+                    while slot is None:
+                        self._cond.wait(self.poll_interval)
+                        slot = self._try_acquire(lane)
+                finally:
+                    if waiting is not None:
+                        self.waiting -= 1
+                        os.close(waiting)
+            index, fds = slot
+            self._slots[lane].append(fds)
+            if lane is not None:
+                self.lane_in_flight[lane] += 1
+            self.in_flight += 1
+            return index + 1
+
+    def _try_lock_any(self, prefix: str, count: int) -> tuple[int, int] | None:
+        """Lock the lowest free of count numbered files, returning its number and descriptor, or None."""
+        for index in range(count):
+            fd = self._try_lock(f"{prefix}-{index}.lock")
+            if fd is not None:
+                return index, fd
+        return None
+
+    def _unlaned_idle(self) -> bool:
+        """Whether no process has a request outside any lane waiting for a slot."""
+        fd = self._try_lock(WAITING_LOCK)
+        if fd is None:
+            return False
+        os.close(fd)
+        return True
+
+    def _try_acquire(self, lane: str | None) -> tuple[int, tuple[int, ...]] | None:
+        self._load()
+        if lane is None:
+            slot = self._try_lock_any("slot", int(self.limit))
+            return None if slot is None else (slot[0], (slot[1],))
+        if self.waiting or self.lane_in_flight[lane] >= self.lane_limits[lane]:
+            return None
+        if not self._unlaned_idle():
+            return None
+        lane_slot = self._try_lock_any(lane, self.lane_limits[lane])
+        if lane_slot is None:
+            return None
+        # lane requests never take the last slot
+        slot = self._try_lock_any("slot", max(1, int(self.limit) - 1))
+        if slot is None:
+            os.close(lane_slot[1])
+            return None
+        return slot[0], (slot[1], lane_slot[1])
+
+    def release(self, in_flight: int, latency: float, failed: bool, lane: str | None = None):
+        """Free a slot, adapting the shared limit to the request's latency or failure."""
+        with self._cond:
+            for fd in self._slots[lane].pop():
+                os.close(fd)
+            self.in_flight -= 1
+            if lane is not None:
+                self.lane_in_flight[lane] -= 1
+            if self.adaptive and (lane is None or failed):
+                fd = os.open(self._path(STATE_LOCK), os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                    self._load()
+                    self._update(latency, failed, in_flight)
+                    self._save()
+                finally:
+                    os.close(fd)
+            self._cond.notify_all()
@@ -0,0 +1,163 @@
+"""Balance requests across several tika servers, ejecting servers that fail or respond slowly."""
+
+import math
+import socket
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit, urlunsplit
+
+
+class Endpoint:
+    """A single tika server and its recent health."""
+
+    def __init__(self, url: str, host: str | None = None):
+        self.url = url.rstrip("/")
+        # original host for the Host header when the url was resolved to an address
+        self.host = host
+        self.outstanding = 0
+        self.requests = 0
+        self.strikes = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Headers needed to address this endpoint."""
+        return {"Host": self.host} if self.host else {}
+
+
+def resolve(url: str) -> list[Endpoint]:
+    """Resolve the url's hostname to an endpoint for each of its addresses."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        return [Endpoint(url)]
+    endpoints = []
+    for address in sorted({info[4][0] for info in infos}):
+        if ":" in address:
+            address = f"[{address}]"
+        endpoints.append(Endpoint(urlunsplit(parts._replace(netloc=f"{address}:{port}")), host=parts.netloc))
+    return endpoints or [Endpoint(url)]
+
+
+class EndpointPool:
+    """Pick the healthy endpoint with the fewest outstanding requests.
+
+    An endpoint that fails (or is slower than slow_seconds) eject_after times in a row is ejected for
+    eject_seconds, doubling for each repeated ejection. Once the ejection expires it must pass the health
+    probe before it gets requests again. If every endpoint is ejected the one due back soonest is used
+    rather than failing outright.
+    """
+
+    def __init__(
+        self,
+        servers: str | list[str],
+        resolve_dns: bool = False,
+        eject_after: int = 3,
+        eject_seconds: float = 30,
+        slow_seconds: float = 0,
+        probe: Callable[[Endpoint], bool] | None = None,
+        refresh_seconds: float = 60,
+    ):
+        if isinstance(servers, str):
+            servers = [s.strip() for s in servers.split(",") if s.strip()]
+        if not servers:
+            raise ValueError("At least one tika server is required")
+        self.servers = servers
+        self.resolve_dns = resolve_dns
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.slow_seconds = slow_seconds
+        self.probe = probe
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._resolved_at = 0.0
+        self._turn = 0
+        self.endpoints: list[Endpoint] = []
+        self._refresh()
+
+    def _refresh(self):
+        """Resolve the server list again, keeping state for endpoints that are still present."""
+        if not self.resolve_dns:
+            if not self.endpoints:
+                self.endpoints = [Endpoint(s) for s in self.servers]
+            return
+        current = {e.url: e for e in self.endpoints}
+        endpoints = []
+        for server in self.servers:
+            endpoints.extend(current.get(e.url, e) for e in resolve(server))
+        self.endpoints = endpoints
+        self._resolved_at = time.monotonic()
+
+    def acquire(self) -> Endpoint:
+        """Reserve the best endpoint for a request, which must be given back with release()."""
+        now = time.monotonic()
+        with self._lock:
+            if self.resolve_dns and now - self._resolved_at > self.refresh_seconds:
+                self._refresh()
+            due = [e for e in self.endpoints if e.ejected_until and e.ejected_until <= now]
+        # probe outside the lock as it makes a request
+        for endpoint in due:
+            healthy = self.probe is None or self.probe(endpoint)
+            with self._lock:
+                if healthy:
+                    endpoint.ejected_until = 0.0
+                    endpoint.strikes = 0
+                else:
+                    self._eject(endpoint, now)
+        with self._lock:
+            live = [e for e in self.endpoints if not e.ejected_until]
+            if live:
+                # rotate the starting point so ties are spread over the endpoints
+                self._turn = (self._turn + 1) % len(live)
+                endpoint = min(live[self._turn :] + live[: self._turn], key=lambda e: e.outstanding)
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, failed: bool, elapsed: float):
+        """Return an endpoint after a request, recording whether it failed or was slow."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            if failed or (self.slow_seconds and elapsed > self.slow_seconds):
+                endpoint.strikes += 1
+                if endpoint.strikes >= self.eject_after:
+                    self._eject(endpoint, time.monotonic())
+            else:
+                endpoint.strikes = 0
+                endpoint.ejections = 0
+
+    def _eject(self, endpoint: Endpoint, now: float):
+        endpoint.ejected_until = now + self.eject_seconds * 2 ** min(endpoint.ejections, 5)
+        endpoint.ejections += 1
+        endpoint.strikes = 0
+
+    def get(self, url: str) -> Endpoint | None:
+        """The endpoint for a server url, if it is one of the endpoints."""
+        with self._lock:
+            return next((e for e in self.endpoints if e.url == url.rstrip("/")), None)
+
+    def hold(self, url: str):
+        """Stop sending requests to a server until resume() is called, e.g. while it restarts."""
+        endpoint = self.get(url)
+        if endpoint is not None:
+            with self._lock:
+                endpoint.ejected_until = math.inf
+
+    def resume(self, url: str):
+        """Send requests to a held or ejected server again."""
+        endpoint = self.get(url)
+        if endpoint is not None:
+            with self._lock:
+                endpoint.ejected_until = 0.0
+                endpoint.strikes = 0
+
+    def live(self) -> int:
+        """Number of endpoints currently accepting requests."""
+        with self._lock:
+            return sum(1 for e in self.endpoints if not e.ejected_until)
@@ -1,11 +1,14 @@
 """Analyse files with Apache Tika to detect and extract metadata and text."""
 
-import logging
+import contextlib
+import hashlib
+import json
 import os
+import threading
 import time
 import traceback
-from urllib.error import URLError
 
+import requests
 from azul_runner import (
     BinaryPlugin,
     Feature,
@@ -17,11 +20,65 @@ from azul_runner import (
     add_settings,
     cmdline_run,
 )
-from requests import ConnectionError
-from tika import unpack
 
-# PyTika is very noisy, set the level to only log CRITICAL errors
-logging.getLogger("tika.tika").setLevel(logging.CRITICAL)
+from .batching import Batcher
+from .cache import (
+    EMPTY,
+    ERROR,
+    TIMEOUT,
+    DiskCache,
+    MemoryCache,
+    NegativeCache,
+    ResultCache,
+    cache_key,
+)
+from .client import (
+    CHUNK_SIZE,
+    AttachmentLimits,
+    TikaClient,
+    TikaResponseError,
+    read_text,
+)
+from .concurrency import AdaptiveLimiter, SharedLimiter
+from .metadata import DEFAULT_DROP, MetadataRules, parse_pairs
+from .metrics import JobMetrics, Metrics, create_metrics
+from .preflight import detect_magic, detect_text
+from .resilience import CircuitBreaker, Resilience, is_retryable
+from .result import EmbeddedDocument, TikaResult, intern_keys
+from .startup import Startup
+from .supervisor import TikaSupervisor
+from .timeouts import TimeoutPolicy, parse_timeout_table
+
+# Concurrency limiter lane for files expected to take a long time to parse
+LARGE_LANE = "large"
+
+# Tika clients, limits, circuit state and caches are shared by every plugin instance in the process with the
+# same settings, so instances running jobs concurrently on separate threads coordinate their use of tika.
+_shared_objects = {}
+_shared_lock = threading.Lock()
+
+
+def _shared(factory, *args, **kwargs):
+    """Return the object factory(*args, **kwargs) creates, creating it only once per process for those arguments."""
+    key = (factory, args, tuple(sorted(kwargs.items())))
+    with _shared_lock:
+        if key not in _shared_objects:
+            _shared_objects[key] = factory(*args, **kwargs)
+        return _shared_objects[key]
+
+
+def _shared_result(factory, *args, **kwargs):
+    """Like _shared(), for slow factories such as network calls, which are run without holding the lock.
+
+    Calls racing to create the object may each run the factory, the first result stored is kept.
+    """
+    key = (factory, args, tuple(sorted(kwargs.items())))
+    with _shared_lock:
+        if key in _shared_objects:
+            return _shared_objects[key]
+    result = factory(*args, **kwargs)
+    with _shared_lock:
+        return _shared_objects.setdefault(key, result)
 
 
 class AzulPluginTika(BinaryPlugin):
@@ -32,7 +89,88 @@ class AzulPluginTika(BinaryPlugin):
         filter_data_types={"content": []},
         filter_max_content_size=(int, 20 * 1024 * 1024),  # File size to process
         max_text_size=(int, 10 * 1024 * 1024),  # Max text size before truncation
-        tika_server=(str, "http://localhost:9998"),
+        tika_server=(str, "http://localhost:9998"),  # Comma separated to balance over several tika servers
+        tika_resolve_dns=(bool, False),  # Balance over every address the tika_server hostnames resolve to
+        tika_eject_after=(int, 3),  # Consecutive failures before a tika server is temporarily ejected
+        tika_eject_seconds=(float, 30.0),  # Initial ejection period, doubling while the server keeps failing
+        tika_slow_seconds=(float, 0.0),  # Requests slower than this count as failures, 0 to disable
+        tika_pool_size=(int, 4),  # Max persistent connections kept open to the tika server
+        tika_connect_timeout=(float, 10.0),
+        tika_read_timeout=(float, 160.0),
+        tika_keep_alive=(bool, True),
+        tika_supervisor_jar=(str, ""),  # Run and supervise local tika servers from this jar instead of tika_server
+        tika_supervisor_processes=(int, 1),  # Local tika servers each plugin process runs, on consecutive ports
+        tika_supervisor_port=(int, 9998),  # Lowest port used by local tika servers, each process takes processes + 1
+        tika_supervisor_java=(str, "java"),
+        tika_supervisor_heap=(str, "1g"),  # Max heap of each local tika server
+        tika_supervisor_args=(list[str], []),  # Extra tika server arguments
+        tika_supervisor_max_documents=(int, 10000),  # Recycle a local tika server after this many requests, 0 never
+        tika_supervisor_max_rss=(int, 0),  # Recycle a local tika server above this resident size in bytes, 0 never
+        tika_supervisor_startup_timeout=(float, 120.0),  # Seconds a local tika server has to start answering
+        # Directory the plugin's processes on a host claim their local tika server ports through
+        tika_supervisor_lock_dir=(str, "/tmp/azul-plugin-tika"),  # nosec B108
+        # Seconds to wait for tika to answer before the first job, 0 to not wait (or with tika_supervisor_jar, to wait
+        # up to tika_supervisor_startup_timeout)
+        tika_ready_timeout=(float, 0.0),
+        tika_warmup=(bool, False),  # Parse sample files before the first job to warm tika's parsers
+        tika_warmup_dir=(str, ""),  # Directory of warm-up files, the built-in samples are used when empty
+        tika_sendfile=(bool, True),  # Upload files to tika over plain http with sendfile() to avoid copying them
+        tika_timeout_table=(list[str], ["text/*=30"]),  # Initial parse timeouts as 'mime=seconds', 'type/*' allowed
+        tika_adaptive_timeout=(bool, True),  # Learn parse timeouts per mime type from recent parse times
+        tika_timeout_factor=(float, 3.0),  # Multiple of the p99 parse time (scaled by size) allowed
+        tika_timeout_min=(float, 5.0),  # Floor on learned timeouts, tika_read_timeout is the ceiling
+        tika_retries=(int, 2),  # Retries of transient failures (connection errors, 429/502/503/504)
+        tika_retry_base_delay=(float, 0.5),  # Backoff before the first retry, doubling with random jitter
+        tika_retry_max_delay=(float, 10.0),
+        tika_retry_budget=(float, 0.2),  # Max retries as a fraction of requests
+        tika_circuit_failures=(int, 5),  # Consecutive transient failures before requests stop
+        tika_circuit_reset_seconds=(float, 30.0),  # Time before a trial request is let through
+        tika_circuit_pause=(bool, True),  # Pause jobs while the circuit is open rather than failing them
+        tika_max_concurrency=(int, 4),  # Max tika requests in flight from all of the plugin's processes on the host
+        tika_min_concurrency=(int, 1),
+        tika_adaptive_concurrency=(bool, True),  # Adjust concurrency between min and max from tika response times
+        # Directory the plugin's processes on a host share tika limits through, empty to limit each process alone
+        tika_coordination_dir=(str, ""),
+        tika_large_concurrency=(int, 1),  # Max requests in flight for large files, 0 to not treat them separately
+        tika_large_size=(int, 4 * 1024 * 1024),  # Files at least this size are large
+        tika_large_seconds=(float, 10.0),  # As are files expected to take this long from past parses of their type
+        unpack_streaming=(bool, True),  # Decode the unpacked tar as it is received rather than buffering it
+        attachment_memory_limit=(int, 16 * 1024 * 1024),  # Attachment bytes kept in memory before spooling to disk
+        # Small files from jobs running on threads parsed in one request, 0 disables. Only for applications embedding
+        # the plugin on threads, such as the benchmark harness, the runner's one job per process never batches
+        batch_max_files=(int, 0),
+        batch_max_file_size=(int, 64 * 1024),  # Only files up to this size are batched
+        batch_max_bytes=(int, 1024 * 1024),  # Max total size of a batch
+        batch_linger=(float, 0.05),  # Seconds a batch waits for more files before it is sent
+        text_fast_path_size=(int, 1024 * 1024),  # Text files at least this size are decoded locally, 0 disables
+        text_fast_path_bytes=(int, 64 * 1024),  # Leading bytes the charset is detected from and tika is sent
+        text_fast_path_types=(  # Types tika may report for the text to be decoded locally
+            list[str],
+            ["text/plain", "text/csv", "text/tab-separated-values", "application/json", "application/x-ndjson"],
+        ),
+        preflight=(bool, True),  # Check for ignore_types locally before uploading the file to tika
+        preflight_detect_bytes=(int, 64 * 1024),  # Leading bytes sent to tika when the local check is inconclusive
+        max_children=(int, 1000),  # Per job limits on the attachments extracted, 0 disables each limit
+        max_child_size=(int, 0),
+        max_children_bytes=(int, 1024 * 1024 * 1024),
+        max_children_ratio=(float, 100.0),  # Total attachment bytes as a multiple of the file's size
+        # 'unpack', or 'rmeta' to also get metadata for every embedded document, which parses files with any twice
+        extract_mode=(str, "unpack"),
+        seed_child_results=(bool, True),  # In rmeta mode, cache attachment results so their own jobs skip tika
+        result_cache=(str, ""),  # Cache unpack results locally, one of '', 'memory' or 'disk'
+        result_cache_max_bytes=(int, 512 * 1024 * 1024),
+        result_cache_dir=(str, "/tmp/azul-plugin-tika-cache"),  # nosec B108
+        negative_cache_ttl=(float, 0.0),  # Seconds a file tika failed on gets its previous outcome, 0 disables
+        negative_cache_max_entries=(int, 100000),
+        negative_cache_path=(str, ""),  # File the failures are persisted to, only kept in memory when empty
+        negative_cache_failures=(list[str], [EMPTY, TIMEOUT, ERROR]),  # Failures remembered
+        metrics_port=(int, 0),  # Serve Prometheus metrics on this port at /metrics, 0 to disable
+        metrics_log=(bool, False),  # Log a json summary of each job's timing and output
+        metadata_drop=(list[str], DEFAULT_DROP),  # Metadata keys never featured
+        metadata_drop_prefixes=(list[str], []),  # Metadata keys starting with any of these are never featured
+        metadata_drop_patterns=(list[str], []),  # Regular expressions matching metadata keys never featured
+        metadata_aliases=(list[str], []),  # 'alias=canonical' metadata keys to feature under one label
+        metadata_length_limits=(list[str], []),  # 'key=length' overrides of max_value_length for a metadata key
         ignore_types=(
             list[str],
             [
@@ -48,6 +186,11 @@ class AzulPluginTika(BinaryPlugin):
         Feature("file_metadata", "Metadata field extracted by tika, label is the field name", type=FeatureType.String),
         Feature("filename", "Attachment filename extracted from content", type=FeatureType.String),
         Feature("mime", "Magic mime type", type=FeatureType.String),
+        Feature(
+            "skipped_attachments",
+            "Attachments not extracted because a per-job limit was reached, label is the limit.",
+            type=FeatureType.String,
+        ),
         Feature(
             "dropped_metadata",
             "Metadata that was too long so a sample was kept and the remainder dropped.",
@@ -55,101 +198,611 @@ class AzulPluginTika(BinaryPlugin):
         ),
     ]
 
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        """Limit on tika requests in flight, shared by the plugin's processes on the host using the same servers.
+
+        The runner's concurrent_plugin_instances are separate processes, which only coordinate when
+        tika_coordination_dir is set, through lock files in it, see SharedLimiter. Without it the limit applies to
+        this process alone, which runs one job at a time.
+        """
+        kwargs = dict(
+            max_limit=self.cfg.tika_max_concurrency,
+            min_limit=self.cfg.tika_min_concurrency,
+            adaptive=self.cfg.tika_adaptive_concurrency,
+            lane_limits=((LARGE_LANE, self.cfg.tika_large_concurrency),) if self.cfg.tika_large_concurrency else (),
+        )
+        if not self.cfg.tika_coordination_dir:
+            return _shared(AdaptiveLimiter, **kwargs)
+        servers = hashlib.sha256(self.servers.encode()).hexdigest()[:16]
+        return _shared(SharedLimiter, os.path.join(self.cfg.tika_coordination_dir, f"limits-{servers}"), **kwargs)
+
+    @property
+    def supervisor(self) -> TikaSupervisor | None:
+        """Local tika servers run by this process, when tika_supervisor_jar is set.
+
+        Each of the runner's plugin processes on a host runs its own servers, on ports it claims through
+        tika_supervisor_lock_dir.
+        """
+        if not self.cfg.tika_supervisor_jar:
+            return None
+        supervisor = _shared(
+            TikaSupervisor,
+            self.cfg.tika_supervisor_jar,
+            processes=self.cfg.tika_supervisor_processes,
+            port=self.cfg.tika_supervisor_port,
+            java=self.cfg.tika_supervisor_java,
+            heap=self.cfg.tika_supervisor_heap,
+            server_args=tuple(self.cfg.tika_supervisor_args),
+            max_documents=self.cfg.tika_supervisor_max_documents,
+            max_rss=self.cfg.tika_supervisor_max_rss,
+            startup_timeout=self.cfg.tika_supervisor_startup_timeout,
+            lock_dir=self.cfg.tika_supervisor_lock_dir,
+        )
+        supervisor.start()
+        return supervisor
+
+    @property
+    def servers(self) -> str:
+        """Comma separated tika servers requests are sent to."""
+        supervisor = self.supervisor
+        return ",".join(supervisor.urls) if supervisor else self.cfg.tika_server
+
+    @property
+    def tika(self) -> TikaClient:
+        """Client for the tika servers, created on first use and reused for every job."""
+        supervisor = self.supervisor
+        client = _shared(
+            TikaClient,
+            self.servers,
+            pool_size=self.cfg.tika_pool_size,
+            connect_timeout=self.cfg.tika_connect_timeout,
+            read_timeout=self.cfg.tika_read_timeout,
+            keep_alive=self.cfg.tika_keep_alive,
+            sendfile=self.cfg.tika_sendfile,
+            spool_limit=self.cfg.attachment_memory_limit if self.cfg.unpack_streaming else None,
+            limiter=self.limiter,
+            resolve_dns=self.cfg.tika_resolve_dns,
+            eject_after=self.cfg.tika_eject_after,
+            eject_seconds=self.cfg.tika_eject_seconds,
+            slow_seconds=self.cfg.tika_slow_seconds,
+        )
+        if supervisor and supervisor.pool is None:
+            supervisor.attach(client.endpoints)
+        return client
+
+    @property
+    def resilience(self) -> Resilience:
+        """Retry and circuit breaker state shared by every job."""
+        breaker = _shared(CircuitBreaker, self.cfg.tika_circuit_failures, self.cfg.tika_circuit_reset_seconds)
+        return _shared(
+            Resilience,
+            retries=self.cfg.tika_retries,
+            base_delay=self.cfg.tika_retry_base_delay,
+            max_delay=self.cfg.tika_retry_max_delay,
+            budget_ratio=self.cfg.tika_retry_budget,
+            breaker=breaker,
+            pause_when_open=self.cfg.tika_circuit_pause,
+        )
+
+    @property
+    def timeouts(self) -> TimeoutPolicy:
+        """Parse timeouts per mime type, learned from every job's parse times."""
+        return _shared(
+            TimeoutPolicy,
+            self.cfg.tika_read_timeout,
+            table=tuple(sorted(parse_timeout_table(self.cfg.tika_timeout_table).items())),
+            adaptive=self.cfg.tika_adaptive_timeout,
+            factor=self.cfg.tika_timeout_factor,
+            min_timeout=self.cfg.tika_timeout_min,
+        )
+
+    @property
+    def result_cache(self) -> ResultCache | None:
+        """Optional cache of unpack results shared by every job."""
+        if self.cfg.result_cache == "memory":
+            return _shared(MemoryCache, self.cfg.result_cache_max_bytes)
+        if self.cfg.result_cache == "disk":
+            return _shared(DiskCache, self.cfg.result_cache_dir, self.cfg.result_cache_max_bytes)
+        if self.cfg.result_cache:
+            raise ValueError(f"Unknown result_cache backend {self.cfg.result_cache}")
+        return None
+
+    @property
+    def negative_cache(self) -> NegativeCache | None:
+        """Optional cache of the files tika failed on, shared by every job."""
+        if not self.cfg.negative_cache_ttl:
+            return None
+        return _shared(
+            NegativeCache,
+            self.cfg.negative_cache_ttl,
+            self.cfg.negative_cache_max_entries,
+            self.cfg.negative_cache_path,
+        )
+
+    @property
+    def metrics(self) -> Metrics:
+        """Metrics shared by every job, served over http when metrics_port is set.
+
+        Only the first of the runner's plugin processes on a host to bind metrics_port serves its metrics.
+        """
+        metrics = _shared(create_metrics)
+        if self.cfg.metrics_port:
+            metrics.serve(self.cfg.metrics_port, logger=self.logger)
+        return metrics
+
+    @property
+    def batcher(self) -> Batcher:
+        """Batches of small files gathered from the jobs running concurrently in this process."""
+        return _shared(Batcher, self.cfg.batch_max_files, self.cfg.batch_max_bytes, self.cfg.batch_linger)
+
+    @property
+    def startup(self) -> Startup:
+        """Readiness check and warm-up run once per process before the first job."""
+        return _shared(Startup, self.ready_timeout, self.cfg.tika_warmup, self.cfg.tika_warmup_dir)
+
+    @property
+    def ready_timeout(self) -> float:
+        """Seconds the first job waits for tika to answer, by default as long as local tika servers take to start."""
+        if self.cfg.tika_ready_timeout or not self.cfg.tika_supervisor_jar:
+            return self.cfg.tika_ready_timeout
+        return self.cfg.tika_supervisor_startup_timeout
+
+    @property
+    def metadata_rules(self) -> MetadataRules:
+        """Metadata filtering rules, compiled once per process for the configured settings."""
+        return _shared(
+            MetadataRules,
+            self.cfg.max_value_length,
+            # the Content-Type is featured as the mime
+            drop=("Content-Type", *self.cfg.metadata_drop),
+            drop_prefixes=tuple(self.cfg.metadata_drop_prefixes),
+            drop_patterns=tuple(self.cfg.metadata_drop_patterns),
+            aliases=tuple(parse_pairs(self.cfg.metadata_aliases).items()),
+            length_limits=tuple(parse_pairs(self.cfg.metadata_length_limits, int).items()),
+        )
+
+    @property
+    def tika_version(self) -> str | None:
+        """Version string of the tika server, fetched once per process as part of the cache keys.
+
+        None while tika can't be asked, so the caches are bypassed for the job rather than failing it.
+        """
+        try:
+            return _shared_result(self.resilience.call, self.tika.version)
+        except Exception:
+            self.logger.warning(f"Failed to get the tika version, bypassing the caches {traceback.format_exc()}")
+            return None
+
     def execute(self, job: Job):
         """Submit the data to tika, mapping any extracted metadata/content into output."""
+        if self.ready_timeout or self.cfg.tika_warmup:
+            self.startup.run(self.tika.ready, self.warmup_parse, self.logger)
+        stats = JobMetrics()
+        try:
+            with self.batcher.job() if self.cfg.batch_max_files > 1 else contextlib.nullcontext():
+                state = self._execute(job, stats)
+            if state is None:
+                stats.outcome = "completed"
+            return state
+        finally:
+            try:
+                self.record_metrics(stats)
+            except Exception:
+                self.logger.warning(f"Failed to record job metrics {traceback.format_exc()}")
+
+    def _execute(self, job: Job, stats: JobMetrics):
         data = job.get_data()
+        if self.cfg.preflight:
+            with stats.phase("preflight"):
+                detected = self.preflight(data.get_filepath(), job.event.entity.mime)
+            if detected:
+                mime, source = detected
+                self.logger.info(f"Opting out of {mime} identified by {source} pre-flight check")
+                stats.mime = mime
+                stats.opt_out(f"preflight_{source}")
+                return State.Label.OPT_OUT
+        sha256 = job.event.entity.sha256
+        failed = self.known_failure(sha256)
+        if failed:
+            return self.failure_state(stats, *failed)
         # Providing file instead of buffer because there is a bug with tika 2.6 from_buffer method
-        result = self.unpack(data.get_filepath())
+        with stats.phase("unpack"):
+            try:
+                result = self.cached_unpack(sha256, data.get_filepath(), stats, job.event.entity.mime)
+            except requests.ReadTimeout:
+                message = f"Tika did not finish parsing within {stats.timeout:.0f}s"
+                self.remember_failure(sha256, TIMEOUT, message)
+                return self.failure_state(stats, TIMEOUT, message)
+            except TikaResponseError as e:
+                if not is_retryable(e):
+                    self.remember_failure(sha256, ERROR, str(e))
+                raise
         if not result:
-            return State.Label.OPT_OUT
+            self.remember_failure(sha256, EMPTY)
+            return self.failure_state(stats, EMPTY)
+
+        try:
+            return self.add_result(result, data.get_filepath(), stats)
+        finally:
+            # attachments spooled to disk or read from the disk cache are open files
+            result.close()
 
+    def add_result(self, result: TikaResult, file_path: str, stats: JobMetrics):
+        """Add the features, text and children from what tika extracted from the file."""
         features = {}
         # Print to gather data for unit tests.
         # print(f"METADATA FOR TEST WITH FILE WITH SHA256: {job.event.entity}")
         # print(result)
-        if "metadata" in result:
-            metadata = result["metadata"]
-            # use and dump the 'Content-Type' field
-            if "Content-Type" in metadata:
-                # some file types we choose to ignore
-                if metadata["Content-Type"] in self.cfg.ignore_types:
-                    return State.Label.OPT_OUT
-                elif isinstance(metadata["Content-Type"], str):
-                    content_type = [metadata["Content-Type"]]
-                else:
-                    content_type = metadata["Content-Type"]
-                features["mime"] = content_type
-                del metadata["Content-Type"]
-
-            # dump pointless metadata the 'Content-Length' 'Content-Encoding', 'X-Parsed-By' and 'resourceName'
-            # Note: the metadata keys changes between versions so you'll need to keep checking back.
-            for field in [
-                "Content-Length",
-                "Content-Encoding",
-                "X-Parsed-By",
-                "X-TIKA:Parsed-By",
-                "X-TIKA:Parsed-By-Full-Set",
-                "resourceName",
-                "X-TIKA:EXCEPTION:embedded_stream_exception",  # Drop bad content from zip files
-            ]:
-                if field in metadata:
-                    del metadata[field]
-
-            # feature the remaining metadata
-            for meta_key, meta_value in metadata.items():
-                if isinstance(meta_value, str):
-                    meta_value = [meta_value]
-                for cur_meta_value in meta_value:
-                    if not cur_meta_value:
-                        continue
-                    if len(cur_meta_value) > self.cfg.max_value_length:
-                        # For content that is too long just take a sample of it.
-                        features.setdefault("dropped_metadata", []).append(
-                            FeatureValue(cur_meta_value[:100], label=meta_key)
-                        )
-                    else:
-                        features.setdefault("file_metadata", []).append(FeatureValue(cur_meta_value, label=meta_key))
+        metadata_start = time.perf_counter()
+        metadata = result.metadata
+        # use and dump the 'Content-Type' field
+        if "Content-Type" in metadata:
+            # some file types we choose to ignore
+            if metadata["Content-Type"] in self.cfg.ignore_types:
+                stats.mime = metadata["Content-Type"]
+                stats.opt_out("ignore_type")
+                return State.Label.OPT_OUT
+            elif isinstance(metadata["Content-Type"], str):
+                content_type = [metadata["Content-Type"]]
+            else:
+                content_type = metadata["Content-Type"]
+            features["mime"] = content_type
+            stats.mime = content_type[0] if content_type else "unknown"
+        features.update(self.metadata_features(metadata))
+        stats.add_phase("metadata", time.perf_counter() - metadata_start)
 
         # Set the text field as the returned plaintext content
-        if "content" in result:
-            content = result["content"].strip()
-            if content:
-                if len(content) > self.cfg.max_text_size:
+        if result.content:
+            with stats.phase("text"):
+                # the client has already stripped and limited the text, it is only copied to mark truncation
+                content = result.content
+                if result.content_truncated or len(content) > self.cfg.max_text_size:
                     content = content[: self.cfg.max_text_size] + "\n(truncated)"
+                    stats.text_truncated = True
+                stats.text_chars = len(content)
                 self.add_text(content)
 
         # Add any attachments as children entities
-        if "attachments" in result:
-            for child_name, child_data in result["attachments"].items():
-                c = self.add_child_with_data({"action": "extracted"}, child_data)
+        if result.attachments:
+            stats.attachments = len(result.attachments)
+            children_start = time.perf_counter()
+            for child_name, child_data in result.attachments.items():
+                if isinstance(child_data, bytes):
+                    c = self.add_child_with_data({"action": "extracted"}, child_data)
+                else:
+                    # large attachments are spooled to temporary files when streaming
+                    c = self.add_child_with_data_file({"action": "extracted"}, child_data)
+                # identical attachments are emitted once with every name they were found under,
                 # sometimes it just uses the original file name, which is randomly generated
-                if os.path.basename(data.get_filepath()) not in child_name:
-                    c.add_feature_values("filename", Filepath(child_name))
+                filenames = [
+                    Filepath(name)
+                    for name in [child_name, *result.duplicates.get(child_name, ())]
+                    if os.path.basename(file_path) not in name
+                ]
+                if filenames:
+                    c.add_feature_values("filename", filenames)
+                # in rmeta mode tika has already parsed the attachment as part of this document
+                embedded = result.embedded.get(child_name)
+                if embedded is not None:
+                    for feature, values in self.child_features(embedded).items():
+                        c.add_feature_values(feature, values)
+                    if self.cfg.seed_child_results and self.seed_child_result(child_data, embedded):
+                        stats.children_seeded += 1
+            stats.add_phase("children", time.perf_counter() - children_start)
+        # let analysts know content was left out
+        for limit, (count, size) in result.skipped.items():
+            features.setdefault("skipped_attachments", []).append(
+                FeatureValue(f"{count} attachments ({size} bytes)", label=limit)
+            )
+            stats.children_skipped += count
         self.add_many_feature_values(features)
 
-    def unpack(self, file_path: str):
-        """Use the Tika server to unpack the given buffer.
+    def known_failure(self, sha256: str) -> tuple[str, str] | None:
+        """Failure class and message remembered for the content when tika failed on it before, or None."""
+        negative = self.negative_cache
+        if negative is None:
+            return None
+        key = self.result_cache_key(sha256)
+        if key is None:
+            return None
+        return negative.get(key)
+
+    def remember_failure(self, sha256: str, failure: str, message: str = ""):
+        """Remember tika failed on the content, so resubmissions are answered without calling tika."""
+        negative = self.negative_cache
+        if negative is None or failure not in self.cfg.negative_cache_failures:
+            return
+        key = self.result_cache_key(sha256)
+        if key is None:
+            return
+        try:
+            negative.put(key, failure, message)
+        except Exception:
+            self.logger.warning(f"Failed to remember tika failure {traceback.format_exc()}")
+
+    def failure_state(self, stats: JobMetrics, failure: str, message: str = ""):
+        """Job state for a failure, either seen now or remembered by the negative cache."""
+        if failure == EMPTY:
+            stats.opt_out("empty")
+            return State.Label.OPT_OUT
+        stats.outcome = failure
+        if failure == TIMEOUT:
+            # pathological files are labelled apart from other errors so they can be found and excluded
+            return State(State.Label.ERROR_EXCEPTION, failure_name="Tika Parse Timeout", message=message)
+        return State(State.Label.ERROR_EXCEPTION, failure_name="Tika Parse Error", message=message)
+
+    def metadata_features(self, metadata: dict) -> dict[str, list]:
+        """Map tika metadata, other than the Content-Type, to file_metadata and dropped_metadata features."""
+        features = {}
+        for feature, label, value in self.metadata_rules.apply(metadata):
+            features.setdefault(feature, []).append(FeatureValue(value, label=label))
+        return features
+
+    def child_features(self, embedded: EmbeddedDocument) -> dict[str, list]:
+        """Features for an attachment from the metadata tika extracted while parsing its parent."""
+        metadata = embedded.metadata
+        features = self.metadata_features(metadata)
+        content_type = metadata.get("Content-Type")
+        if content_type:
+            features["mime"] = [content_type] if isinstance(content_type, str) else content_type
+        return features
+
+    def seed_child_result(self, child_data, embedded: EmbeddedDocument) -> bool:
+        """Cache what tika found in an attachment while parsing its parent, so the attachment's own job skips tika.
+
+        Only attachments without embedded documents of their own are cached, as the parent's result doesn't
+        include the data of deeper attachments, and only when all of their text was kept.
+        """
+        cache = self.result_cache
+        if cache is None or embedded.nested or embedded.content_truncated:
+            return False
+        digest = hashlib.sha256()
+        if isinstance(child_data, bytes):
+            digest.update(child_data)
+        else:
+            child_data.seek(0)
+            for chunk in iter(lambda: child_data.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+            child_data.seek(0)
+        key = self.result_cache_key(digest.hexdigest())
+        if key is None:
+            return False
+        cache.put(key, TikaResult(dict(embedded.metadata), embedded.content))
+        return True
+
+    def record_metrics(self, stats: JobMetrics):
+        """Add a finished job and the current state of the shared tika client to the metrics."""
+        metrics = self.metrics
+        stats.record(metrics)
+        resilience = self.resilience
+        metrics.set("tika_plugin_retries_total", resilience.retry_count)
+        metrics.set("tika_plugin_circuit_open", int(resilience.breaker.state != resilience.breaker.CLOSED))
+        metrics.set("tika_plugin_circuit_opens_total", resilience.breaker.opens)
+        metrics.set("tika_plugin_concurrency_limit", int(self.limiter.limit))
+        metrics.set("tika_plugin_in_flight", self.limiter.in_flight)
+        for lane, in_flight in self.limiter.lane_in_flight.items():
+            metrics.set("tika_plugin_lane_in_flight", in_flight, lane=lane)
+        metrics.set("tika_plugin_live_endpoints", self.tika.endpoints.live())
+        supervisor = self.supervisor
+        if supervisor:
+            metrics.set("tika_plugin_supervised_live", supervisor.live())
+            for reason, count in supervisor.restarts.items():
+                metrics.set("tika_plugin_supervised_restarts_total", count, reason=reason)
+        startup = self.startup
+        if startup.ready_seconds is not None:
+            metrics.set("tika_plugin_ready_seconds", startup.ready_seconds)
+        if startup.warmup_seconds is not None:
+            metrics.set("tika_plugin_warmup_seconds", startup.warmup_seconds)
+        cache = self.result_cache
+        if cache is not None:
+            cache_stats = cache.stats()
+            metrics.set("tika_plugin_cache_hits_total", cache_stats["hits"])
+            metrics.set("tika_plugin_cache_misses_total", cache_stats["misses"])
+        negative = self.negative_cache
+        if negative is not None:
+            metrics.set("tika_plugin_negative_cache_entries", len(negative))
+            for failure, hits in negative.hits.items():
+                metrics.set("tika_plugin_negative_cache_hits_total", hits, failure=failure)
+        if self.cfg.metrics_log:
+            self.logger.info(f"tika job metrics {json.dumps(stats.as_dict())}")
 
-        Provides limited retry on connection issues.
+    def preflight(self, file_path: str, mime: str | None = None) -> tuple[str, str] | None:
+        """Cheaply identify files that will be ignored, without a full tika unpack.
+
+        The mime type the dispatcher identified is checked first, then the file's leading bytes.
+        Returns the ignored mime type and which check identified it ('dispatcher', 'magic' or 'tika-detect'),
+        or None.
         """
-        result = None
+        if mime in self.cfg.ignore_types:
+            return mime, "dispatcher"
+        mime, inconclusive = detect_magic(file_path)
+        if mime in self.cfg.ignore_types:
+            return mime, "magic"
+        if not inconclusive:
+            return None
+        # looks like a zip but the directory can't be read locally, let tika look at the leading entries
+        try:
+            mime = self.tika.detect(file_path, self.cfg.preflight_detect_bytes)
+        except Exception:
+            self.logger.warning(f"Pre-flight detection failed, continuing with unpack {traceback.format_exc()}")
+            return None
+        if mime in self.cfg.ignore_types:
+            return mime, "tika-detect"
+        return None
+
+    @property
+    def extract(self):
+        """Client method parsing a file in the configured extract_mode."""
+        if self.cfg.extract_mode == "rmeta":
+            return self.tika.unpack_rmeta
+        if self.cfg.extract_mode == "unpack":
+            return self.tika.unpack
+        raise ValueError(f"Unknown extract_mode {self.cfg.extract_mode}")
+
+    def lane(self, mime: str | None, size: int) -> str | None:
+        """Concurrency limiter lane for the file, LARGE_LANE for files expected to be slow to parse or None."""
+        if not self.cfg.tika_large_concurrency:
+            return None
+        if size >= self.cfg.tika_large_size:
+            return LARGE_LANE
+        expected = self.timeouts.expected(mime, size)
+        if expected is not None and expected >= self.cfg.tika_large_seconds:
+            return LARGE_LANE
+        return None
+
+    def batch_parse(self, file_paths: list[str], read_timeout: float) -> list[TikaResult | None]:
+        """Parse a batch of small files from several jobs, or give every job None to parse its file alone."""
         try:
-            result = unpack.from_file(file_path, self.cfg.tika_server, requestOptions={"timeout": 160})
-        except TimeoutError:
-            raise
-        except ConnectionError:
-            # sleep in-between each connection attempt
-            self.logger.error(f"Warning issue contacting tika server with error {traceback.format_exc()}")
-        except URLError:
-            self.logger.error(f"Can't contact tika server with error {traceback.format_exc()}")
+            return self.resilience.call(
+                self.tika.rmeta_batch, file_paths, max_text=self.cfg.max_text_size, read_timeout=read_timeout
+            )
         except Exception:
-            self.logger.error(traceback.format_exc())
-            self.logger.warning("Unexpected error from tika retrying.")
-        if result:
+            self.logger.warning(
+                f"Batch of {len(file_paths)} files failed, parsing each alone {traceback.format_exc()}"
+            )
+            return [None] * len(file_paths)
+
+    def warmup_parse(self, file_path: str):
+        """Parse a warm-up file the same way jobs are parsed, discarding the result."""
+        result = self.extract(file_path, max_text=self.cfg.max_text_size)
+        for data in result.attachments.values() if result else ():
+            if not isinstance(data, bytes):
+                data.close()
+
+    def cached_unpack(
+        self, sha256: str, file_path: str, stats: JobMetrics | None = None, mime: str | None = None
+    ) -> TikaResult | None:
+        """Unpack the file, answering from the result cache when the same content was already unpacked."""
+        cache = self.result_cache
+        key = self.result_cache_key(sha256) if cache is not None else None
+        if key is None:
+            return self.unpack(file_path, stats, mime)
+        result = cache.get(key)
+        if result is not None:
+            self.logger.debug(f"result cache hit for {sha256} {cache.stats()}")
+            if stats is not None:
+                stats.cache_hit = True
+            return result
+        result = self.unpack(file_path, stats, mime)
+        if result is not None:
+            cache.put(key, result)
+        return result
+
+    def result_cache_key(self, sha256: str) -> str | None:
+        """Result cache key for content unpacked with the current settings, None when the tika version is unknown."""
+        tika_version = self.tika_version
+        if tika_version is None:
+            return None
+        # settings that change what unpack returns must be part of the key
+        settings = {
+            "version": self.VERSION,
+            "max_text_size": self.cfg.max_text_size,
+            "extract_mode": self.cfg.extract_mode,
+            "text_fast_path": [self.cfg.text_fast_path_size, sorted(self.cfg.text_fast_path_types)],
+            "limits": [
+                self.cfg.max_children,
+                self.cfg.max_child_size,
+                self.cfg.max_children_bytes,
+                self.cfg.max_children_ratio,
+            ],
+        }
+        return cache_key(sha256, tika_version, settings)
+
+    def text_unpack(
+        self, file_path: str, size: int, stats: JobMetrics | None, read_timeout: float
+    ) -> TikaResult | None:
+        """Decode a text file locally with only its metadata from tika, or return None to have tika unpack it.
+
+        The charset is detected from the leading text_fast_path_bytes, which are all that tika is sent for
+        '/meta'. Files tika doesn't report one of the text_fast_path_types for, such as markup, are left to
+        tika to extract.
+        """
+        charset = detect_text(file_path, self.cfg.text_fast_path_bytes)
+        if charset is None:
+            return None
+        meta_stats = {}
+        try:
+            metadata = self.resilience.call(
+                self.tika.meta,
+                file_path,
+                max_bytes=self.cfg.text_fast_path_bytes,
+                stats=meta_stats,
+                read_timeout=read_timeout,
+            )
+        finally:
+            if stats is not None:
+                stats.timeout = read_timeout
+                stats.add_phase("tika", meta_stats.get("tika", 0.0))
+        content_type = metadata.get("Content-Type") or ""
+        if not isinstance(content_type, str):
+            content_type = content_type[0]
+        if content_type.split(";")[0].strip() not in self.cfg.text_fast_path_types:
+            return None
+        start = time.perf_counter()
+        with open(file_path, "rb") as f:
+            content, truncated = read_text(f, self.cfg.max_text_size, charset, errors="replace")
+        result = TikaResult(intern_keys(metadata), content, truncated)
+        if stats is not None:
+            stats.local_text = True
+            stats.bytes_in = min(size, self.cfg.text_fast_path_bytes)
+            stats.bytes_out = meta_stats.get("bytes_out", 0)
+            stats.add_phase("local_text", time.perf_counter() - start)
+        return result
+
+    def unpack(self, file_path: str, stats: JobMetrics | None = None, mime: str | None = None) -> TikaResult | None:
+        """Use the Tika server to unpack the given file.
+
+        Transient failures are retried with backoff, errors caused by the file itself are raised immediately.
+        The parse is given a timeout for the file's mime type (as reported by the dispatcher) and size.
+        In rmeta mode the result also holds the metadata and text of each attachment in embedded.
+        Small files may be parsed in a batch with those of other jobs, see Batcher, large text files are decoded
+        locally, see text_unpack(), and other large or slow files wait in their own lane for a tika slot, see lane().
+        """
+        extract = self.extract
+        size = os.path.getsize(file_path)
+        timeout = self.timeouts.timeout(mime, size)
+        if self.cfg.batch_max_files > 1 and size <= self.cfg.batch_max_file_size:
+            start = time.perf_counter()
+            result = self.batcher.submit(file_path, size, timeout, self.batch_parse)
+            if stats is not None:
+                stats.add_phase("batch", time.perf_counter() - start)
+            if result is not None:
+                if stats is not None:
+                    stats.batched = True
+                    stats.timeout = timeout
+                    stats.bytes_in = size
+                return result
+        if self.cfg.text_fast_path_size and size >= self.cfg.text_fast_path_size:
+            result = self.text_unpack(file_path, size, stats, timeout)
+            if result is not None:
+                return result
+        client_stats = {}
+        try:
+            result = self.resilience.call(
+                extract,
+                file_path,
+                max_text=self.cfg.max_text_size,
+                stats=client_stats,
+                read_timeout=timeout,
+                lane=self.lane(mime, size),
+                limits=AttachmentLimits(
+                    max_count=self.cfg.max_children,
+                    max_size=self.cfg.max_child_size,
+                    max_total=self.cfg.max_children_bytes,
+                    max_ratio=self.cfg.max_children_ratio,
+                    input_size=size,
+                ),
+            )
+            self.timeouts.observe(mime, size, client_stats.get("tika", 0.0))
             return result
-        time.sleep(1)
-        # One more re-attempt or simply give the error.
-        return unpack.from_file(file_path, self.cfg.tika_server, requestOptions={"timeout": 160})
+        finally:
+            if stats is not None:
+                stats.timeout = timeout
+                stats.bytes_in = size
+                stats.bytes_out = client_stats.pop("bytes_out", 0)
+                for phase, seconds in client_stats.items():
+                    stats.add_phase(phase, seconds)
 
 
 def main():
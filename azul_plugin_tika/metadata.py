@@ -0,0 +1,126 @@
+"""Rules for filtering, renaming and limiting the metadata tika extracts before it is featured."""
+
+import re
+import threading
+from typing import Iterator
+
+FILE_METADATA = "file_metadata"
+DROPPED_METADATA = "dropped_metadata"
+# Characters of an over long value kept as a sample in dropped_metadata
+SAMPLE_LENGTH = 100
+
+# Metadata that is pointless to keep, the Content-Type is always dropped as it is featured separately.
+# Note: the metadata keys changes between versions so you'll need to keep checking back.
+DEFAULT_DROP = [
+    "Content-Length",
+    "Content-Encoding",
+    "X-Parsed-By",
+    "X-TIKA:Parsed-By",
+    "X-TIKA:Parsed-By-Full-Set",
+    "resourceName",
+    "X-TIKA:EXCEPTION:embedded_stream_exception",  # Drop bad content from zip files
+]
+# Legacy names older tika versions (and some parsers) emit alongside the standard ones, not applied by default
+DEFAULT_ALIASES = [
+    "Author=dc:creator",
+    "meta:author=dc:creator",
+    "creator=dc:creator",
+    "title=dc:title",
+    "Keywords=meta:keyword",
+    "Creation-Date=dcterms:created",
+    "meta:creation-date=dcterms:created",
+    "Last-Modified=dcterms:modified",
+    "Last-Save-Date=dcterms:modified",
+    "meta:save-date=dcterms:modified",
+    "modified=dcterms:modified",
+]
+
+
+def parse_pairs(entries: list[str], kind: type = str) -> dict:
+    """Parse 'key=value' entries into a dict, converting values with kind."""
+    pairs = {}
+    for entry in entries:
+        key, sep, value = entry.rpartition("=")
+        if not sep or not key:
+            raise ValueError(f"Expected 'key=value', not {entry!r}")
+        pairs[key.strip()] = kind(value.strip())
+    return pairs
+
+
+class MetadataRules:
+    """Filter, rename and limit metadata values in a single pass.
+
+    Keys are dropped by exact name, prefix or regular expression, aliases are renamed to their canonical key
+    (repeated values under the canonical key are only kept once), and values longer than the key's length
+    limit (max_length unless set in length_limits) are kept as a sample in dropped_metadata.
+    What to do with each key is worked out the first time the key is seen and remembered.
+    """
+
+    # bound on remembered keys, in case a parser generates unique key names
+    MAX_REMEMBERED = 10000
+
+    def __init__(
+        self,
+        max_length: int,
+        drop: tuple[str, ...] = tuple(DEFAULT_DROP),
+        drop_prefixes: tuple[str, ...] = (),
+        drop_patterns: tuple[str, ...] = (),
+        aliases: dict[str, str] | tuple[tuple[str, str], ...] = (),
+        length_limits: dict[str, int] | tuple[tuple[str, int], ...] = (),
+    ):
+        self.max_length = max_length
+        self.drop = frozenset(drop)
+        self.drop_prefixes = tuple(drop_prefixes)
+        self.drop_pattern = re.compile("|".join(f"(?:{p})" for p in drop_patterns)) if drop_patterns else None
+        self.aliases = dict(aliases)
+        self.length_limits = dict(length_limits)
+        self._targets = frozenset(self.aliases.values())
+        self._rules: dict[str, tuple[str, int, bool] | None] = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, key: str) -> tuple[str, int, bool] | None:
+        """The canonical key, its length limit and whether it has aliases to collapse, or None to drop the key."""
+        if key in self.drop or key.startswith(self.drop_prefixes):
+            return None
+        if self.drop_pattern and self.drop_pattern.search(key):
+            return None
+        canonical = self.aliases.get(key, key)
+        if canonical in self.drop:
+            return None
+        return canonical, self.length_limits.get(canonical, self.max_length), canonical in self._targets
+
+    def rule(self, key: str) -> tuple[str, int, bool] | None:
+        """Remembered rule for key, see _compile()."""
+        try:
+            return self._rules[key]
+        except KeyError:
+            pass
+        rule = self._compile(key)
+        with self._lock:
+            if len(self._rules) >= self.MAX_REMEMBERED:
+                self._rules.clear()
+            self._rules[key] = rule
+        return rule
+
+    def apply(self, metadata: dict) -> Iterator[tuple[str, str, str]]:
+        """Yield (feature, label, value) for each value kept, feature being file_metadata or dropped_metadata."""
+        rule = self.rule
+        seen = set()
+        for key, values in metadata.items():
+            kept = rule(key)
+            if kept is None:
+                continue
+            label, limit, collapse = kept
+            for value in (values,) if isinstance(values, str) else values:
+                if not value:
+                    continue
+                if collapse:
+                    # the same value reported under several aliases is only kept once
+                    if (label, value) in seen:
+                        continue
+                    seen.add((label, value))
+                if len(value) > limit:
+                    # For content that is too long just take a sample of it.
+                    yield DROPPED_METADATA, label, value[:SAMPLE_LENGTH]
+                else:
+                    yield FILE_METADATA, label, value
@@ -0,0 +1,258 @@
+"""Per job timing and process wide metrics, exposed in the Prometheus text format or logged as json."""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """Counters, gauges and histograms shared by every job in the process.
+
+    Metrics must be described before use. Samples are keyed by their label values, and rendered in the
+    Prometheus text exposition format by render() or over http by serve().
+    """
+
+    def __init__(self):
+        self._meta: dict[str, tuple[str, str, tuple]] = {}
+        self._values: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, list]] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        # why the server could not be started, after which it isn't tried again
+        self.serve_error: OSError | None = None
+
+    def describe(self, name: str, kind: str, help: str, buckets: tuple = SECONDS_BUCKETS):
+        """Declare a metric, its type and help text, and the bucket bounds of a histogram."""
+        with self._lock:
+            self._meta.setdefault(name, (kind, help, tuple(buckets)))
+            (self._histograms if kind == HISTOGRAM else self._values).setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            samples = self._values[name]
+            samples[key] = samples.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge, or a counter tracked elsewhere as a running total."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[name][key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value in a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            buckets = self._meta[name][2]
+            samples = self._histograms[name]
+            # per bucket counts followed by the total count and sum
+            sample = samples.setdefault(key, [0] * (len(buckets) + 1) + [0.0])
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    sample[i] += 1
+            sample[-2] += 1
+            sample[-1] += value
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help, buckets) in self._meta.items():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind != HISTOGRAM:
+                    for key, value in self._values[name].items():
+                        lines.append(f"{name}{_labels(key)} {_number(value)}")
+                    continue
+                for key, sample in self._histograms[name].items():
+                    for bound, count in zip(buckets, sample, strict=False):
+                        lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {sample[-2]}")
+                    lines.append(f"{name}_count{_labels(key)} {sample[-2]}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(sample[-1])}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, address: str = "", logger: logging.Logger | None = None) -> bool:
+        """Serve the metrics at /metrics from a background thread, only the first call starts a server.
+
+        Returns whether the metrics are served. When the port can't be bound, such as when another process
+        already serves on it, a warning is logged once and later calls return False without trying again.
+        """
+        with self._lock:
+            if self._server or self.serve_error:
+                return self._server is not None
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = metrics.render().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            try:
+                self._server = ThreadingHTTPServer((address, port), Handler)
+            except OSError as e:
+                self.serve_error = e
+                (logger or logging.getLogger(__name__)).warning(f"Not serving metrics on port {port}: {e}")
+                return False
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="tika-metrics", daemon=True).start()
+            return True
+
+
+class JobMetrics:
+    """Timing of the phases of one job and what it produced, recorded into Metrics when it finishes."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.mime = "unknown"
+        self.outcome = "error"
+        self.opt_out_reason = None
+        self.cache_hit = False
+        self.batched = False
+        self.local_text = False
+        self.timeout = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.attachments = 0
+        self.children_seeded = 0
+        self.children_skipped = 0
+        self.text_chars = 0
+        self.text_truncated = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as the named phase, adding to any earlier time in the same phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float):
+        """Add time measured elsewhere to the named phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def opt_out(self, reason: str):
+        """Mark the job as opted out for the given reason."""
+        self.outcome = "opt_out"
+        self.opt_out_reason = reason
+
+    def as_dict(self) -> dict:
+        """Summary of the job for structured logging."""
+        return {
+            "mime": self.mime,
+            "outcome": self.outcome,
+            "opt_out_reason": self.opt_out_reason,
+            "cache_hit": self.cache_hit,
+            "batched": self.batched,
+            "local_text": self.local_text,
+            "timeout": self.timeout,
+            "seconds": round(time.perf_counter() - self.start, 6),
+            "phases": {k: round(v, 6) for k, v in self.phases.items()},
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "attachments": self.attachments,
+            "children_seeded": self.children_seeded,
+            "children_skipped": self.children_skipped,
+            "text_chars": self.text_chars,
+            "text_truncated": self.text_truncated,
+        }
+
+    def record(self, metrics: Metrics):
+        """Add this job to the process metrics."""
+        mime = self.mime
+        metrics.inc("tika_plugin_jobs_total", mime=mime, outcome=self.outcome)
+        metrics.observe("tika_plugin_job_seconds", time.perf_counter() - self.start, mime=mime)
+        for phase, seconds in self.phases.items():
+            metrics.observe("tika_plugin_phase_seconds", seconds, mime=mime, phase=phase)
+        if self.batched:
+            metrics.inc("tika_plugin_batched_total", mime=mime)
+        if self.local_text:
+            metrics.inc("tika_plugin_local_text_total", mime=mime)
+        if self.opt_out_reason:
+            metrics.inc("tika_plugin_opt_outs_total", mime=mime, reason=self.opt_out_reason)
+        metrics.inc("tika_plugin_bytes_in_total", self.bytes_in, mime=mime)
+        metrics.inc("tika_plugin_bytes_out_total", self.bytes_out, mime=mime)
+        metrics.inc("tika_plugin_text_chars_total", self.text_chars, mime=mime)
+        if self.text_truncated:
+            metrics.inc("tika_plugin_text_truncated_total", mime=mime)
+        if self.outcome == "completed":
+            metrics.observe("tika_plugin_attachments", self.attachments, mime=mime)
+            metrics.inc("tika_plugin_children_seeded_total", self.children_seeded, mime=mime)
+            metrics.inc("tika_plugin_children_skipped_total", self.children_skipped, mime=mime)
+
+
+def create_metrics() -> Metrics:
+    """Metrics with everything the plugin records declared."""
+    metrics = Metrics()
+    metrics.describe("tika_plugin_jobs_total", COUNTER, "Jobs finished by mime type and outcome.")
+    metrics.describe("tika_plugin_job_seconds", HISTOGRAM, "Total time spent executing a job.")
+    metrics.describe("tika_plugin_phase_seconds", HISTOGRAM, "Time spent in each phase of a job.")
+    metrics.describe("tika_plugin_opt_outs_total", COUNTER, "Jobs opted out by reason.")
+    metrics.describe("tika_plugin_batched_total", COUNTER, "Jobs whose file was parsed in a batch with others.")
+    metrics.describe(
+        "tika_plugin_local_text_total", COUNTER, "Jobs whose text was decoded locally, with only metadata from tika."
+    )
+    metrics.describe("tika_plugin_bytes_in_total", COUNTER, "Bytes of content uploaded to tika.")
+    metrics.describe("tika_plugin_bytes_out_total", COUNTER, "Bytes of unpack responses received from tika.")
+    metrics.describe("tika_plugin_text_chars_total", COUNTER, "Characters of extracted text added to results.")
+    metrics.describe("tika_plugin_text_truncated_total", COUNTER, "Jobs whose extracted text was truncated.")
+    metrics.describe("tika_plugin_attachments", HISTOGRAM, "Attachments extracted per job.", COUNT_BUCKETS)
+    metrics.describe(
+        "tika_plugin_children_seeded_total", COUNTER, "Attachments cached from their parent's parse to skip tika."
+    )
+    metrics.describe("tika_plugin_children_skipped_total", COUNTER, "Attachments skipped by the per job limits.")
+    # state of the shared tika client, updated after every job
+    metrics.describe("tika_plugin_retries_total", COUNTER, "Tika requests retried after transient failures.")
+    metrics.describe("tika_plugin_circuit_open", GAUGE, "1 while the tika circuit breaker is open or half open.")
+    metrics.describe("tika_plugin_circuit_opens_total", COUNTER, "Times the tika circuit breaker opened.")
+    metrics.describe("tika_plugin_concurrency_limit", GAUGE, "Current limit on tika requests in flight.")
+    metrics.describe("tika_plugin_in_flight", GAUGE, "Tika requests in flight.")
+    metrics.describe("tika_plugin_lane_in_flight", GAUGE, "Tika requests in flight in each limiter lane.")
+    metrics.describe("tika_plugin_live_endpoints", GAUGE, "Tika servers not currently ejected.")
+    metrics.describe("tika_plugin_supervised_live", GAUGE, "Local tika servers answering health checks.")
+    metrics.describe("tika_plugin_supervised_restarts_total", COUNTER, "Local tika servers restarted by reason.")
+    metrics.describe("tika_plugin_ready_seconds", GAUGE, "Time tika took to become ready at startup.")
+    metrics.describe("tika_plugin_warmup_seconds", GAUGE, "Time spent parsing the warm-up files at startup.")
+    metrics.describe("tika_plugin_cache_hits_total", COUNTER, "Result cache hits.")
+    metrics.describe("tika_plugin_cache_misses_total", COUNTER, "Result cache misses.")
+    metrics.describe(
+        "tika_plugin_negative_cache_hits_total", COUNTER, "Tika calls saved by remembering failures, by failure."
+    )
+    metrics.describe("tika_plugin_negative_cache_entries", GAUGE, "Failures remembered by the negative cache.")
+    return metrics
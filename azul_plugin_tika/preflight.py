@@ -0,0 +1,75 @@
+"""Cheap classification of files before they are uploaded to tika for a full unpack."""
+
+import codecs
+import zipfile
+
+AR_MAGIC = b"!<arch>\n"
+ZIP_MAGIC = b"PK\x03\x04"
+# Byte order marks and the charset they identify, longest first as utf-32 starts like utf-16
+TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# Bytes expected in text, anything else is a control character
+TEXT_BYTES = bytes(range(0x20, 0x100)) + b"\t\n\r\f\v\x1b"
+# Fraction of control characters tolerated in text, as stray ones turn up in logs
+MAX_CONTROL_RATIO = 0.01
+# Single byte charset assumed for text that isn't utf-8
+FALLBACK_CHARSET = "cp1252"
+
+
+def detect_magic(file_path: str) -> tuple[str | None, bool]:
+    """Identify the archive types tika is commonly told to ignore from the file's leading bytes.
+
+    Only reports a mime type when it matches what tika itself would detect, otherwise None.
+    The second value is True when the file looks like a zip but its directory could not be read,
+    meaning the type can only be settled by tika.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(len(AR_MAGIC) + len("debian-binary"))
+    if head.startswith(AR_MAGIC):
+        # debian packages are ar archives but tika gives them their own type
+        if head[len(AR_MAGIC) :].startswith(b"debian-binary"):
+            return "application/x-debian-package", False
+        return "application/x-archive", False
+    if not head.startswith(ZIP_MAGIC):
+        return None, False
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            names = set(zf.namelist())
+    except (zipfile.BadZipFile, OSError, ValueError):
+        return None, True
+    if "AndroidManifest.xml" in names:
+        return "application/vnd.android.package-archive", False
+    if "META-INF/MANIFEST.MF" in names:
+        # web and enterprise archives are also jars but tika reports their more specific types
+        if "META-INF/application.xml" in names or any(n.startswith("WEB-INF/") for n in names):
+            return None, False
+        return "application/java-archive", False
+    return None, False
+
+
+def detect_text(file_path: str, sample_bytes: int) -> str | None:
+    """Charset of the file if its first sample_bytes look like text, otherwise None.
+
+    Text has a byte order mark, or no NUL bytes and few other control characters. Text without a byte
+    order mark is utf-8 if the sample decodes as such and FALLBACK_CHARSET if not.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(sample_bytes)
+    if not head:
+        return None
+    for bom, charset in TEXT_BOMS:
+        if head.startswith(bom):
+            return charset
+    if b"\0" in head or len(head.translate(None, TEXT_BYTES)) > len(head) * MAX_CONTROL_RATIO:
+        return None
+    try:
+        # not final, the sample may end part way through a character
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return FALLBACK_CHARSET
+    return "utf-8"
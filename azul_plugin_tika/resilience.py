@@ -0,0 +1,174 @@
+"""Retry and circuit breaking around tika requests, so transient outages are ridden out without retry storms."""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+import requests
+
+from .client import TikaResponseError
+
+# Statuses returned while tika is overloaded or restarting behind a proxy
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Tika has been failing and requests are not being sent until it recovers."""
+
+
+def is_retryable(e: Exception) -> bool:
+    """Whether a failure is transient and worth retrying.
+
+    Connection failures and overload statuses are retried. Parse errors (422) and read timeouts are
+    properties of the file, so retrying them just repeats the same expensive parse.
+    """
+    if isinstance(e, TikaResponseError):
+        return e.status in RETRYABLE_STATUSES
+    if isinstance(e, requests.ReadTimeout):
+        return False
+    return isinstance(e, (requests.ConnectionError, requests.Timeout, ConnectionError))
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of requests, so an outage can't multiply the load on tika."""
+
+    def __init__(self, ratio: float, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Credit the budget for a new request."""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a retry from the budget, False if it is exhausted."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """Stop sending requests after consecutive transient failures until tika recovers.
+
+    Closed passes everything. After failure_threshold consecutive failures the circuit opens for
+    reset_seconds, then half opens to let a single trial request through; its outcome closes or reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, logger: logging.Logger | None = None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        if state != self.state:
+            self.logger.warning(f"tika circuit breaker {self.state} -> {state}")
+            self.state = state
+
+    def retry_after(self) -> float:
+        """Seconds until a request may be attempted, 0 if one may be attempted now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if self._trial:
+                # a trial request is in flight, wait a moment for its outcome
+                return min(1.0, self.reset_seconds)
+            self._transition(self.HALF_OPEN)
+            self._trial = True
+            return 0.0
+
+    def record_success(self):
+        """Close the circuit after a request reached tika."""
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Count a transient failure, opening the circuit at the threshold or if the half open trial failed."""
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                if self.state != self.OPEN:
+                    self.opens += 1
+                self._transition(self.OPEN)
+
+
+class Resilience:
+    """Run tika requests with jittered exponential backoff, a retry budget and a circuit breaker."""
+
+    def __init__(
+        self,
+        retries: int,
+        base_delay: float,
+        max_delay: float,
+        budget_ratio: float,
+        breaker: CircuitBreaker,
+        pause_when_open: bool = True,
+        logger: logging.Logger | None = None,
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = RetryBudget(budget_ratio)
+        self.breaker = breaker
+        self.pause_when_open = pause_when_open
+        self.logger = logger or logging.getLogger(__name__)
+        self.retry_count = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter delay before the given retry attempt (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))  # nosec B311
+
+    def _wait_for_circuit(self):
+        while wait := self.breaker.retry_after():
+            if not self.pause_when_open:
+                raise CircuitOpenError(f"tika is unavailable, retry in {wait:.0f}s")
+            # blocking here pauses job intake until tika is expected back
+            time.sleep(wait)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call fn, retrying transient failures while the attempt limit and retry budget allow."""
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            self._wait_for_circuit()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    # tika answered, even if the file couldn't be parsed
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries or not self.budget.withdraw():
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                self.retry_count += 1
+                self.logger.warning(f"Retrying tika request in {delay:.1f}s after {type(e).__name__}: {e}")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,141 @@
+"""Compact, typed representation of what tika extracted from a file, shared by the client, cache and plugin."""
+
+import sys
+
+# Metadata keys repeat across every document, interning them keeps one copy of each key string per process
+# and lets dict lookups on them (such as MetadataRules) match by identity.
+intern = sys.intern
+
+
+def intern_keys(metadata: dict) -> dict:
+    """Copy of metadata with its keys interned."""
+    return {intern(key): value for key, value in metadata.items()}
+
+
+class EmbeddedDocument:
+    """Metadata and text tika extracted from an attachment while parsing its parent in rmeta mode.
+
+    nested is set when the attachment has embedded documents of its own.
+    """
+
+    __slots__ = ("metadata", "content", "content_truncated", "nested")
+
+    def __init__(self, metadata: dict, content: str = "", content_truncated: bool = False, nested: bool = False):
+        self.metadata = metadata
+        self.content = content
+        self.content_truncated = content_truncated
+        self.nested = nested
+
+    def __eq__(self, other):
+        """Documents are equal when all of their fields are."""
+        if not isinstance(other, EmbeddedDocument):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        """Show every field."""
+        return f"EmbeddedDocument({self.metadata!r}, {self.content!r}, {self.content_truncated}, {self.nested})"
+
+    def as_dict(self) -> dict:
+        """Plain dict of the document, only including content_truncated and nested when set."""
+        doc = {"metadata": self.metadata, "content": self.content}
+        if self.content_truncated:
+            doc["content_truncated"] = True
+        if self.nested:
+            doc["nested"] = True
+        return doc
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> "EmbeddedDocument":
+        """Document from the dict as_dict() returns."""
+        return cls(
+            intern_keys(doc.get("metadata", {})),
+            doc.get("content", ""),
+            doc.get("content_truncated", False),
+            doc.get("nested", False),
+        )
+
+
+class TikaResult:
+    """Metadata, text and attachments tika extracted from a file.
+
+    metadata maps interned keys to a value or a list of values. attachments maps names to their content as
+    bytes, or as temporary file objects for attachments spooled to disk. duplicates holds the other names of
+    attachments found more than once, skipped the number and total bytes of the attachments left out by each
+    limit, and embedded the EmbeddedDocument for each attachment tika parsed along with the file in rmeta mode.
+    """
+
+    __slots__ = ("metadata", "content", "content_truncated", "attachments", "duplicates", "skipped", "embedded")
+
+    def __init__(
+        self,
+        metadata: dict | None = None,
+        content: str = "",
+        content_truncated: bool = False,
+        attachments: dict | None = None,
+        duplicates: dict[str, list[str]] | None = None,
+        skipped: dict[str, tuple[int, int]] | None = None,
+        embedded: dict[str, EmbeddedDocument] | None = None,
+    ):
+        self.metadata = {} if metadata is None else metadata
+        self.content = content
+        self.content_truncated = content_truncated
+        self.attachments = {} if attachments is None else attachments
+        self.duplicates = {} if duplicates is None else duplicates
+        self.skipped = {} if skipped is None else skipped
+        self.embedded = {} if embedded is None else embedded
+
+    def __eq__(self, other):
+        """Results are equal when all of their fields are."""
+        if not isinstance(other, TikaResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        """Show every field."""
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"TikaResult({fields})"
+
+    def copy(self) -> "TikaResult":
+        """Copy that can be changed without affecting this result, sharing the attachment content."""
+        return TikaResult(
+            dict(self.metadata),
+            self.content,
+            self.content_truncated,
+            dict(self.attachments),
+            dict(self.duplicates),
+            dict(self.skipped),
+            dict(self.embedded),
+        )
+
+    def close(self):
+        """Close the attachments held as file objects."""
+        for data in self.attachments.values():
+            if not isinstance(data, bytes):
+                data.close()
+
+    def as_dict(self) -> dict:
+        """Plain dict of the result, only including the optional fields when set. Attachments are left as they are."""
+        result = {"metadata": self.metadata, "content": self.content, "attachments": self.attachments}
+        if self.content_truncated:
+            result["content_truncated"] = True
+        if self.duplicates:
+            result["duplicates"] = self.duplicates
+        if self.skipped:
+            result["skipped"] = {limit: list(summary) for limit, summary in self.skipped.items()}
+        if self.embedded:
+            result["embedded"] = {name: doc.as_dict() for name, doc in self.embedded.items()}
+        return result
+
+    @classmethod
+    def from_dict(cls, result: dict) -> "TikaResult":
+        """Result from the dict as_dict() returns."""
+        return cls(
+            intern_keys(result.get("metadata", {})),
+            result.get("content", ""),
+            result.get("content_truncated", False),
+            dict(result.get("attachments", {})),
+            result.get("duplicates"),
+            {limit: tuple(summary) for limit, summary in result.get("skipped", {}).items()},
+            {name: EmbeddedDocument.from_dict(doc) for name, doc in result.get("embedded", {}).items()},
+        )
@@ -0,0 +1,227 @@
+"""Wait for the tika server to come up and warm its parsers before the first job is sent to it."""
+
+import email.message
+import io
+import os
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+WARMUP_TEXT = "Tika warm-up sample"
+# fixed timestamp so the generated samples are identical every time
+ZIP_DATE = (2020, 1, 1, 0, 0, 0)
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+OOXML_TYPE = "application/vnd.openxmlformats-officedocument"
+
+
+def _zip(members: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, ZIP_DATE), data)
+    return buf.getvalue()
+
+
+def _ooxml(main_part: str, main_type: str, parts: dict[str, str], overrides: dict[str, str]) -> bytes:
+    """Minimal office open xml package with main_part as its main document."""
+    types = "".join(f'<Override PartName="/{name}" ContentType="{kind}"/>' for name, kind in overrides.items())
+    members = {
+        "[Content_Types].xml": (
+            f'<?xml version="1.0" encoding="UTF-8"?><Types xmlns="{CONTENT_TYPES_NS}">'
+            f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            f'<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/{main_part}" ContentType="{main_type}"/>{types}</Types>'
+        ),
+        "_rels/.rels": (
+            f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{RELATIONSHIPS_NS}">'
+            f'<Relationship Id="rId1" Type="{OFFICE_RELS}/officeDocument" Target="{main_part}"/></Relationships>'
+        ),
+        **parts,
+    }
+    return _zip({name: data.encode() for name, data in members.items()})
+
+
+def sample_pdf() -> bytes:
+    """Single page pdf with a line of text."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({WARMUP_TEXT}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R"
+        b" /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def sample_png() -> bytes:
+    """8x8 greyscale png."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    pixels = b"".join(b"\x00" + bytes(range(0, 256, 32)) for _ in range(8))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 8, 8, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(pixels))
+        + chunk(b"IEND", b"")
+    )
+
+
+def sample_docx() -> bytes:
+    """Word document with one paragraph."""
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    document = (
+        f'<w:document xmlns:w="{ns}"><w:body><w:p><w:r><w:t>{WARMUP_TEXT}</w:t></w:r></w:p></w:body></w:document>'
+    )
+    return _ooxml(
+        "word/document.xml",
+        f"{OOXML_TYPE}.wordprocessingml.document.main+xml",
+        {"word/document.xml": document},
+        {},
+    )
+
+
+def sample_xlsx() -> bytes:
+    """Workbook with a single cell of text."""
+    ns = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    workbook = (
+        f'<workbook xmlns="{ns}" xmlns:r="{OFFICE_RELS}">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    )
+    rels = (
+        f'<Relationships xmlns="{RELATIONSHIPS_NS}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_RELS}/worksheet" Target="worksheets/sheet1.xml"/></Relationships>'
+    )
+    sheet = (
+        f'<worksheet xmlns="{ns}"><sheetData><row r="1"><c r="A1" t="inlineStr"><is><t>{WARMUP_TEXT}</t></is></c>'
+        "</row></sheetData></worksheet>"
+    )
+    return _ooxml(
+        "xl/workbook.xml",
+        f"{OOXML_TYPE}.spreadsheetml.sheet.main+xml",
+        {"xl/workbook.xml": workbook, "xl/_rels/workbook.xml.rels": rels, "xl/worksheets/sheet1.xml": sheet},
+        {"xl/worksheets/sheet1.xml": f"{OOXML_TYPE}.spreadsheetml.worksheet+xml"},
+    )
+
+
+def sample_zip() -> bytes:
+    """Zip archive holding a text file and an image, to exercise embedded document extraction."""
+    return _zip({"readme.txt": WARMUP_TEXT.encode(), "image.png": sample_png()})
+
+
+def sample_eml() -> bytes:
+    """Email with a text body and an image attachment."""
+    message = email.message.EmailMessage()
+    message["From"] = "warmup@example.com"
+    message["To"] = "tika@example.com"
+    message["Subject"] = WARMUP_TEXT
+    message["Date"] = "Wed, 01 Jan 2020 00:00:00 +0000"
+    message.set_content(WARMUP_TEXT)
+    message.add_attachment(sample_png(), maintype="image", subtype="png", filename="image.png")
+    return message.as_bytes()
+
+
+SAMPLES = {
+    "sample.pdf": sample_pdf,
+    "sample.docx": sample_docx,
+    "sample.xlsx": sample_xlsx,
+    "sample.png": sample_png,
+    "sample.zip": sample_zip,
+    "sample.eml": sample_eml,
+}
+
+
+@contextmanager
+def warmup_files(directory: str = "") -> Iterator[list[str]]:
+    """Paths of the files in directory, or of the built-in samples written to a temporary directory."""
+    if directory:
+        yield sorted(e.path for e in os.scandir(directory) if e.is_file())
+        return
+    with tempfile.TemporaryDirectory(prefix="tika-warmup-") as tmp:
+        paths = []
+        for name, sample in SAMPLES.items():
+            path = os.path.join(tmp, name)
+            with open(path, "wb") as f:
+                f.write(sample())
+            paths.append(path)
+        yield paths
+
+
+class Startup:
+    """Wait once per process for tika to answer, then optionally parse sample files to warm its parsers.
+
+    Every job calls run() before it starts, only the first does the work while the others wait for it.
+    If tika isn't ready within ready_timeout (0 skips the check) jobs start anyway and the warm-up is skipped.
+    """
+
+    def __init__(self, ready_timeout: float, warmup: bool, warmup_dir: str = "", poll_interval: float = 1.0):
+        self.ready_timeout = ready_timeout
+        self.warmup = warmup
+        self.warmup_dir = warmup_dir
+        self.poll_interval = poll_interval
+        self.done = False
+        self.ready_seconds = None
+        self.warmup_seconds = None
+        self.warmed = 0
+        self._lock = threading.Lock()
+
+    def run(self, ready: Callable[[], bool], parse: Callable[[str], object], logger) -> bool:
+        """Wait for ready() to return True then parse() each warm-up file, returning whether this call did so."""
+        if self.done:
+            return False
+        with self._lock:
+            if self.done:
+                return False
+            try:
+                if self._wait(ready, logger) and self.warmup:
+                    self._warm(parse, logger)
+            finally:
+                self.done = True
+            return True
+
+    def _wait(self, ready: Callable[[], bool], logger) -> bool:
+        if not self.ready_timeout:
+            return True
+        start = time.monotonic()
+        while not ready():
+            if time.monotonic() - start >= self.ready_timeout:
+                logger.warning(f"Tika was not ready after {self.ready_timeout:.0f}s, starting jobs anyway")
+                return False
+            time.sleep(self.poll_interval)
+        self.ready_seconds = time.monotonic() - start
+        logger.info(f"Tika ready after {self.ready_seconds:.1f}s")
+        return True
+
+    def _warm(self, parse: Callable[[str], object], logger):
+        start = time.monotonic()
+        with warmup_files(self.warmup_dir) as paths:
+            for path in paths:
+                try:
+                    parse(path)
+                except Exception as e:
+                    logger.warning(f"Tika warm-up parse of {os.path.basename(path)} failed: {e}")
+                    continue
+                self.warmed += 1
+        self.warmup_seconds = time.monotonic() - start
+        logger.info(f"Warmed tika parsers with {self.warmed} of {len(paths)} files in {self.warmup_seconds:.1f}s")
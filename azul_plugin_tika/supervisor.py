@@ -0,0 +1,302 @@
+"""Run and supervise local tika server processes, restarting them when they die, hang or grow too large."""
+
+import atexit
+import fcntl
+import logging
+import os
+import subprocess  # nosec B404
+import threading
+import time
+
+import requests
+
+from .endpoints import EndpointPool
+
+# Reasons a process is restarted, used as metric labels
+EXITED = "exited"
+STARTUP = "startup"
+UNHEALTHY = "unhealthy"
+MEMORY = "memory"
+DOCUMENTS = "documents"
+
+# Most supervisors, such as one per runner plugin instance, that can claim ports on a host
+MAX_INSTANCES = 64
+
+
+def resident_bytes(pid: int) -> int | None:
+    """Resident memory of a process from /proc, or None where that isn't available."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class TikaProcess:
+    """One supervised tika server and its current state."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.popen: subprocess.Popen | None = None
+        self.started_at = 0.0
+        self.ready = False
+        self.failures = 0
+        # requests the endpoint had served when the process started
+        self.served_at_start = 0
+        self.restarts = 0
+        # quick successive crashes back off before the next start
+        self.crashes = 0
+        self.next_start = 0.0
+        # a failed recycle isn't tried again before this time
+        self.recycle_after = 0.0
+
+
+class TikaSupervisor:
+    """Run a tika-server jar as processes listening on consecutive local ports and keep them serving.
+
+    A monitor thread checks each process every probe_interval seconds and restarts it when it exits, isn't
+    answering /version within startup_timeout of starting, or fails probe_failures health checks in a row.
+    Processes that keep exiting are restarted with a doubling delay up to max_backoff.
+
+    A process with a resident size over max_rss bytes or that has served max_documents requests is recycled
+    by starting its replacement on a spare port first. Once the replacement answers, the old process gets no
+    new requests, those in flight are given up to drain_seconds, and its port becomes the spare. If the
+    replacement doesn't start, the old process keeps serving and recycling is tried again after startup_timeout.
+
+    Each supervisor uses processes + 1 ports. With lock_dir set, supervisors on the same host (such as one in
+    each of the runner's plugin processes) claim consecutive ranges of ports from port up by locking a file in
+    it, so each runs its own servers. Requests are balanced across the processes by the client's EndpointPool,
+    created for urls, which attach() connects so the supervisor can count requests and take processes out of
+    rotation while they restart.
+    """
+
+    def __init__(
+        self,
+        jar: str,
+        processes: int = 1,
+        port: int = 9998,
+        java: str = "java",
+        heap: str = "1g",
+        server_args: tuple[str, ...] = (),
+        max_documents: int = 0,
+        max_rss: int = 0,
+        startup_timeout: float = 120,
+        probe_interval: float = 5,
+        probe_failures: int = 3,
+        drain_seconds: float = 30,
+        max_backoff: float = 60,
+        lock_dir: str = "",
+        logger: logging.Logger | None = None,
+    ):
+        self.jar = jar
+        self.java = java
+        self.heap = heap
+        self.server_args = tuple(server_args)
+        self.max_documents = max_documents
+        self.max_rss = max_rss
+        self.startup_timeout = startup_timeout
+        self.probe_interval = probe_interval
+        self.probe_failures = probe_failures
+        self.drain_seconds = drain_seconds
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger(__name__)
+        processes = max(1, processes)
+        self._instance_lock = None
+        self.instance = self._claim(lock_dir, port) if lock_dir else 0
+        first = port + self.instance * (processes + 1)
+        self.processes = [TikaProcess(first + i) for i in range(processes)]
+        self.spare_port = first + processes
+        # every port's url, for the client's endpoints, whichever ports processes are running on
+        self.urls = [f"http://127.0.0.1:{p}" for p in range(first, first + processes + 1)]
+        self.restarts: dict[str, int] = {}
+        self.pool: EndpointPool | None = None
+        self.session = requests.Session()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _claim(self, lock_dir: str, port: int) -> int:
+        """Lock the first instance number no other supervisor on the host holds for servers from port."""
+        os.makedirs(lock_dir, exist_ok=True)
+        for instance in range(MAX_INSTANCES):
+            fd = os.open(os.path.join(lock_dir, f"supervisor-{port}-{instance}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            # held until the process exits, when the kernel releases it
+            self._instance_lock = fd
+            return instance
+        raise RuntimeError(f"Every one of {MAX_INSTANCES} tika supervisor instances in {lock_dir} is in use")
+
+    def command(self, process: TikaProcess) -> list[str]:
+        """Command line starting a tika server for the process."""
+        return [
+            self.java,
+            f"-Xmx{self.heap}",
+            # die rather than limp on with a full heap, so the process is restarted
+            "-XX:+ExitOnOutOfMemoryError",
+            "-jar",
+            self.jar,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(process.port),
+            *self.server_args,
+        ]
+
+    def start(self):
+        """Start every process and the monitor thread, only the first call does anything."""
+        with self._lock:
+            if self._thread:
+                return
+            for process in self.processes:
+                self._launch(process)
+            self._thread = threading.Thread(target=self._monitor, name="tika-supervisor", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def attach(self, pool: EndpointPool):
+        """Connect the client's endpoints, so processes are held out of rotation while they restart."""
+        self.pool = pool
+        ready = {p.url for p in self.processes if p.ready}
+        for url in self.urls:
+            if url not in ready:
+                pool.hold(url)
+
+    def stop(self):
+        """Stop monitoring and terminate every process."""
+        self._stopping.set()
+        for process in self.processes:
+            self._terminate(process)
+
+    def live(self) -> int:
+        """Number of processes answering health checks."""
+        return sum(1 for p in self.processes if p.ready)
+
+    def _launch(self, process: TikaProcess):
+        process.popen = subprocess.Popen(  # nosec B603
+            self.command(process), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+        )
+        process.started_at = time.monotonic()
+        process.ready = False
+        process.failures = 0
+        process.served_at_start = self._served(process)
+        self.logger.info(f"Started tika server pid {process.popen.pid} on port {process.port}")
+
+    def _terminate(self, process: TikaProcess):
+        popen = process.popen
+        process.ready = False
+        if popen is None or popen.poll() is not None:
+            return
+        popen.terminate()
+        try:
+            popen.wait(10)
+        except subprocess.TimeoutExpired:
+            popen.kill()
+            popen.wait()
+
+    def _served(self, process: TikaProcess) -> int:
+        endpoint = self.pool.get(process.url) if self.pool else None
+        return endpoint.requests if endpoint else 0
+
+    def _healthy(self, process: TikaProcess) -> bool:
+        try:
+            return self.session.get(f"{process.url}/version", timeout=self.probe_interval).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _monitor(self):
+        while not self._stopping.wait(self.probe_interval):
+            for process in list(self.processes):
+                try:
+                    self.check(process)
+                except Exception:
+                    self.logger.exception(f"Supervising tika server on port {process.port} failed")
+
+    def check(self, process: TikaProcess):
+        """Check a process, restarting it if needed."""
+        now = time.monotonic()
+        if process.popen is None:
+            if now >= process.next_start:
+                self._launch(process)
+            return
+        if process.popen.poll() is not None:
+            self._restart(process, EXITED, f"exited with status {process.popen.returncode}")
+            return
+        healthy = self._healthy(process)
+        if not process.ready:
+            if healthy:
+                process.ready = True
+                process.crashes = 0
+                if self.pool:
+                    self.pool.resume(process.url)
+                self.logger.info(f"Tika server on port {process.port} ready after {now - process.started_at:.1f}s")
+            elif now - process.started_at > self.startup_timeout:
+                self._restart(process, STARTUP, f"not ready after {self.startup_timeout:.0f}s")
+            return
+        process.failures = 0 if healthy else process.failures + 1
+        if process.failures >= self.probe_failures:
+            self._restart(process, UNHEALTHY, f"failed {process.failures} health checks")
+            return
+        if now < process.recycle_after:
+            return
+        rss = resident_bytes(process.popen.pid) if self.max_rss else None
+        if rss is not None and rss > self.max_rss:
+            self._recycle(process, MEMORY, f"using {rss} bytes")
+            return
+        served = self._served(process) - process.served_at_start
+        if self.max_documents and served >= self.max_documents:
+            self._recycle(process, DOCUMENTS, f"served {served} requests")
+
+    def _recycle(self, process: TikaProcess, reason: str, detail: str):
+        """Replace a serving process with one started on the spare port, retiring it once the replacement is ready."""
+        replacement = TikaProcess(self.spare_port)
+        self.logger.warning(f"Recycling tika server on port {process.port} to port {replacement.port}, {detail}")
+        self._launch(replacement)
+        deadline = replacement.started_at + self.startup_timeout
+        while not self._healthy(replacement):
+            if replacement.popen.poll() is not None or time.monotonic() > deadline or self._stopping.is_set():
+                self.logger.warning(
+                    f"Replacement tika server on port {replacement.port} did not start, "
+                    f"keeping the one on port {process.port}"
+                )
+                self._terminate(replacement)
+                process.recycle_after = time.monotonic() + self.startup_timeout
+                return
+            time.sleep(self.probe_interval)
+        replacement.ready = True
+        replacement.restarts = process.restarts + 1
+        self.restarts[reason] = self.restarts.get(reason, 0) + 1
+        self.processes[self.processes.index(process)] = replacement
+        if self.pool:
+            self.pool.resume(replacement.url)
+            self.pool.hold(process.url)
+            endpoint = self.pool.get(process.url)
+            deadline = time.monotonic() + self.drain_seconds
+            while endpoint and endpoint.outstanding and time.monotonic() < deadline:
+                time.sleep(0.1)
+        self._terminate(process)
+        self.spare_port = process.port
+        self.logger.info(f"Tika server on port {replacement.port} replaced the one on port {process.port}")
+
+    def _restart(self, process: TikaProcess, reason: str, detail: str):
+        self.logger.warning(f"Restarting tika server on port {process.port}, {detail}")
+        self.restarts[reason] = self.restarts.get(reason, 0) + 1
+        process.restarts += 1
+        if self.pool:
+            self.pool.hold(process.url)
+        self._terminate(process)
+        process.popen = None
+        if reason in (EXITED, STARTUP):
+            process.crashes += 1
+            process.next_start = time.monotonic() + min(self.max_backoff, 2 ** (process.crashes - 1) - 1)
+        else:
+            process.next_start = 0.0
+        if time.monotonic() >= process.next_start:
+            self._launch(process)
@@ -0,0 +1,81 @@
+"""Choose how long tika may spend parsing a file from its mime type, size and past parse times."""
+
+import math
+import threading
+from collections import deque
+
+MIB = 1024 * 1024
+
+
+def parse_timeout_table(entries: list[str]) -> dict[str, float]:
+    """Parse 'mime=seconds' entries, where mime may be a 'type/*' wildcard."""
+    table = {}
+    for entry in entries:
+        mime, sep, seconds = entry.rpartition("=")
+        if not sep or not mime:
+            raise ValueError(f"Timeout table entry must be 'mime=seconds', not {entry!r}")
+        table[mime.strip().lower()] = float(seconds)
+    return table
+
+
+class TimeoutPolicy:
+    """Read timeout for a tika parse, learned per mime type from recent parse times.
+
+    Until a mime type has min_samples successful parses its timeout comes from the table (exact match, then
+    'type/*'), falling back to max_timeout. After that the p99 of recent parse times per MiB (files under
+    1 MiB count as 1 MiB) is scaled by the file's size and factor, and kept between min_timeout and max_timeout.
+    """
+
+    def __init__(
+        self,
+        max_timeout: float,
+        table: dict[str, float] | tuple[tuple[str, float], ...] = (),
+        adaptive: bool = True,
+        factor: float = 3.0,
+        min_timeout: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        self.max_timeout = max_timeout
+        self.table = dict(table)
+        self.adaptive = adaptive
+        self.factor = factor
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.window = window
+        self.min_samples = min_samples
+        self._rates: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _table_timeout(self, mime: str) -> float:
+        if mime in self.table:
+            return self.table[mime]
+        return self.table.get(mime.split("/")[0] + "/*", self.max_timeout)
+
+    def timeout(self, mime: str | None, size: int) -> float:
+        """Seconds tika may take to parse a file of this mime type and size in bytes."""
+        mime = (mime or "").lower()
+        with self._lock:
+            rates = sorted(self._rates.get(mime, ()))
+        if not self.adaptive or len(rates) < self.min_samples:
+            return min(self._table_timeout(mime), self.max_timeout)
+        p99 = rates[min(len(rates) - 1, math.ceil(len(rates) * 0.99) - 1)]
+        budget = p99 * max(1.0, size / MIB) * self.factor
+        return max(self.min_timeout, min(self.max_timeout, budget))
+
+    def expected(self, mime: str | None, size: int) -> float | None:
+        """Typical seconds to parse a file of this mime type and size, or None without enough parse history."""
+        mime = (mime or "").lower()
+        with self._lock:
+            rates = sorted(self._rates.get(mime, ()))
+        if len(rates) < self.min_samples:
+            return None
+        return rates[len(rates) // 2] * max(1.0, size / MIB)
+
+    def observe(self, mime: str | None, size: int, seconds: float):
+        """Record how long a successful parse took."""
+        if not self.adaptive:
+            return
+        mime = (mime or "").lower()
+        with self._lock:
+            rates = self._rates.setdefault(mime, deque(maxlen=self.window))
+            rates.append(seconds / max(1.0, size / MIB))
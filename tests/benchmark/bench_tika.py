@@ -0,0 +1,151 @@
+"""
+Tika Plugin Benchmark
+=====================
+Drives AzulPluginTika.execute against the local mock tika server and reports throughput, latency,
+peak RSS and memory allocated per job, so regressions in the transport, metadata mapping or child
+handling show up before they ship.
+
+Run with `python -m tests.benchmark.bench_tika --jobs 200 --concurrency 4 --latency 0.05`.
+
+"""
+
+import argparse
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+from azul_runner import test_template
+
+from azul_plugin_tika.main import AzulPluginTika
+
+from .mock_tika import MockTikaServer, add_options, options_from_args
+
+
+class BenchTika(test_template.TestPlugin):
+    """Test case used only for its do_execution harness."""
+
+    PLUGIN_TO_TEST = AzulPluginTika
+
+    def runTest(self):
+        """Required to instantiate the test case outside a test runner."""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run the benchmark, returning the collected measurements."""
+    latencies = []
+    allocations = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(args.jobs))
+
+    with MockTikaServer(options_from_args(args)) as server:
+        config = {"tika_server": server.url, "result_cache": args.result_cache, **dict(args.setting)}
+
+        def worker():
+            case = BenchTika()
+            case.setUpClass()
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                # unique content per job unless repeats are asked for, so the result cache only hits on purpose
+                seed = index % args.unique if args.unique else index
+                data = seed.to_bytes(8, "little") * (args.file_size // 8 + 1)
+                if args.trace_allocations:
+                    tracemalloc.reset_peak()
+                start = time.perf_counter()
+                try:
+                    case.do_execution(
+                        data_in=[("content", data[: args.file_size])], config=config, no_multiprocessing=True
+                    )
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if args.trace_allocations:
+                        allocations.append(tracemalloc.get_traced_memory()[1])
+
+        if args.trace_allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+        if args.trace_allocations:
+            tracemalloc.stop()
+        requests = dict(server.requests)
+
+    latencies.sort()
+    # ru_maxrss is kilobytes on linux and bytes on macos
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "jobs": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_seconds": wall,
+        "jobs_per_second": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": rss / 1024 / 1024,
+        "alloc_peak_per_job_kb": statistics.mean(allocations) / 1024 if allocations else None,
+        "tika_requests": requests,
+    }
+
+
+def parse_setting(value: str) -> tuple[str, str]:
+    """Parse a plugin setting override given as name=value."""
+    name, sep, setting = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("settings must be given as name=value")
+    return name, setting
+
+
+def main():
+    """Run the benchmark from the command line and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1, help="Plugin instances running jobs in parallel")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="Bytes of content per job")
+    parser.add_argument("--unique", type=int, default=0, help="Distinct files to cycle through, 0 for all unique")
+    parser.add_argument("--result-cache", default="", help="Result cache backend to enable ('memory' or 'disk')")
+    parser.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="Record the peak traced memory per job with tracemalloc (slower, most accurate with concurrency 1)",
+    )
+    parser.add_argument(
+        "--setting", type=parse_setting, action="append", default=[], help="Plugin setting as name=value"
+    )
+    add_options(parser)
+    args = parser.parse_args()
+
+    report = run(args)
+    width = max(len(k) for k in report)
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        print(f"{key.ljust(width)}  {value}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Mock Tika Server
+================
+A local stand-in for the tika server endpoints the plugin uses, with configurable latency and response
+sizes, or replaying responses recorded from a real server.
+
+Run standalone with `python -m tests.benchmark.mock_tika --port 9998`.
+
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import tarfile
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VERSION = "Apache Tika 3.2.3 (mock)"
+
+
+@dataclass
+class MockOptions:
+    """Shape of the responses the mock server generates."""
+
+    latency: float = 0.0  # seconds added to every parse request
+    latency_jitter: float = 0.0  # extra random seconds, uniformly distributed
+    text_size: int = 4 * 1024  # characters of extracted text
+    metadata_fields: int = 20
+    attachments: int = 2
+    attachment_size: int = 16 * 1024
+    content_type: str = "application/pdf"
+    replay_dir: str | None = None  # directory of recorded responses, see Handler.RECORDED
+
+
+def _make_text(size: int) -> str:
+    words = ("tika", "mock", "document", "text", "extracted", "content", "benchmark", "page")
+    rng = random.Random(size)  # nosec B311
+    out = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)[:size]
+
+
+class Responses:
+    """Synthetic responses, generated once per server so the mock itself stays cheap per request."""
+
+    def __init__(self, options: MockOptions):
+        self.options = options
+        self.text = _make_text(options.text_size)
+        self.metadata = {"Content-Type": options.content_type, "X-TIKA:Parsed-By": "org.apache.tika.parser.Mock"}
+        for i in range(options.metadata_fields):
+            self.metadata[f"mock:field-{i}"] = f"value {i}"
+        self.attachments = {
+            f"embedded{i}.bin": (bytes([i % 256]) * 8 + os.urandom(16)) * (options.attachment_size // 24 + 1)
+            for i in range(options.attachments)
+        }
+        self.attachments = {k: v[: options.attachment_size] for k, v in self.attachments.items()}
+        self.unpack_all = self._make_unpack(with_document=True)
+        self.unpack = self._make_unpack(with_document=False)
+        self.rmeta = self._make_rmeta()
+
+    def _make_unpack(self, with_document: bool) -> bytes:
+        members = dict(self.attachments)
+        if with_document:
+            lines = io.StringIO()
+            for key, value in self.metadata.items():
+                lines.write(json.dumps(key) + "," + json.dumps(value) + "\n")
+            members["__METADATA__"] = lines.getvalue().encode()
+            members["__TEXT__"] = self.text.encode()
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        return buf.getvalue()
+
+    def _make_rmeta(self) -> bytes:
+        documents = [dict(self.metadata, **{"X-TIKA:content": self.text})]
+        for i, name in enumerate(self.attachments):
+            documents.append(
+                {
+                    "Content-Type": "application/octet-stream",
+                    "resourceName": name,
+                    "X-TIKA:embedded_resource_path": f"/{name}",
+                    "X-TIKA:embedded_id": str(i + 2),
+                    "X-TIKA:content": "",
+                }
+            )
+        return json.dumps(documents).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Request handler, the server instance carries the options and prepared responses."""
+
+    protocol_version = "HTTP/1.1"
+    # recorded response files that override the synthetic ones when replaying
+    RECORDED = {
+        "/unpack/all": ("unpack_all.tar", "application/x-tar"),
+        "/unpack": ("unpack.tar", "application/x-tar"),
+        "/rmeta": ("rmeta.json", "application/json"),
+        "/rmeta/text": ("rmeta.json", "application/json"),
+        "/detect/stream": ("detect.txt", "text/plain"),
+        "/meta": ("meta.json", "application/json"),
+    }
+
+    def log_message(self, format, *args):
+        """Keep benchmark output clean."""
+
+    def _read_body(self) -> int:
+        """Consume the uploaded document, returning its size."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+                if not chunk_size:
+                    self.rfile.readline()
+                    return size
+                size += len(self.rfile.read(chunk_size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+        return length
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _recorded(self, path: str) -> tuple[bytes, str] | None:
+        replay_dir = self.server.options.replay_dir
+        if not replay_dir or path not in self.RECORDED:
+            return None
+        name, content_type = self.RECORDED[path]
+        try:
+            with open(os.path.join(replay_dir, name), "rb") as f:
+                return f.read(), content_type
+        except FileNotFoundError:
+            return None
+
+    def _parse_latency(self):
+        options = self.server.options
+        delay = options.latency + random.uniform(0, options.latency_jitter)  # nosec B311
+        if delay:
+            time.sleep(delay)
+
+    def do_GET(self):
+        """Serve the version and the welcome page used as health checks."""
+        self.server.count(self.path)
+        if self.path == "/version":
+            self._send(200, VERSION.encode())
+        elif self.path == "/tika":
+            self._send(200, b"This is Tika Server (mock). Please PUT\n")
+        else:
+            self._send(404, b"not found")
+
+    def do_PUT(self):
+        """Serve the parse endpoints."""
+        self.server.count(self.path, self._read_body())
+        path = self.path.split("?")[0]
+        responses = self.server.responses
+        recorded = self._recorded(path)
+        if path == "/detect/stream":
+            self._send(200, *(recorded or (self.server.options.content_type.encode(), "text/plain")))
+            return
+        self._parse_latency()
+        if recorded:
+            self._send(200, *recorded)
+        elif path == "/unpack/all":
+            self._send(200, responses.unpack_all, "application/x-tar")
+        elif path == "/unpack":
+            self._send(200, responses.unpack, "application/x-tar")
+        elif path == "/meta":
+            self._send(200, json.dumps(responses.metadata).encode(), "application/json")
+        elif path in ("/rmeta", "/rmeta/text"):
+            self._send(200, responses.rmeta, "application/json")
+        else:
+            self._send(404, b"not found")
+
+
+class MockTikaServer(ThreadingHTTPServer):
+    """Threaded mock tika server, use as a context manager to run it in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, options: MockOptions | None = None, port: int = 0):
+        super().__init__(("127.0.0.1", port), Handler)
+        self.options = options or MockOptions()
+        self.responses = Responses(self.options)
+        self.requests: dict[str, int] = {}
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base url of the running server."""
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, path: str, size: int = 0):
+        """Track requests per endpoint and the bytes uploaded."""
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.bytes_received += size
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+def add_options(parser: argparse.ArgumentParser):
+    """Add the mock response options to a command line parser."""
+    defaults = MockOptions()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds added to each parse")
+    parser.add_argument("--latency-jitter", type=float, default=defaults.latency_jitter)
+    parser.add_argument("--text-size", type=int, default=defaults.text_size, help="Characters of text")
+    parser.add_argument("--metadata-fields", type=int, default=defaults.metadata_fields)
+    parser.add_argument("--attachments", type=int, default=defaults.attachments)
+    parser.add_argument("--attachment-size", type=int, default=defaults.attachment_size)
+    parser.add_argument("--content-type", default=defaults.content_type)
+    parser.add_argument("--replay-dir", help="Directory of recorded responses (unpack_all.tar, rmeta.json, ...)")
+
+
+def options_from_args(args: argparse.Namespace) -> MockOptions:
+    """Build mock options from parsed command line arguments."""
+    return MockOptions(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        text_size=args.text_size,
+        metadata_fields=args.metadata_fields,
+        attachments=args.attachments,
+        attachment_size=args.attachment_size,
+        content_type=args.content_type,
+        replay_dir=args.replay_dir,
+    )
+
+
+def main():
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9998)
+    add_options(parser)
+    args = parser.parse_args()
+    server = MockTikaServer(options_from_args(args), port=args.port)
+    print(f"mock tika server listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Batcher Test Suite
+==================
+Tests gathering files from concurrent jobs into batches.
+
+"""
+
+import threading
+import time
+import unittest
+
+from azul_plugin_tika.batching import Batcher
+
+
+class RecordingSend:
+    """Batch parser returning each file's path as its result."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, file_paths: list[str], read_timeout: float) -> list:
+        with self.lock:
+            self.batches.append((sorted(file_paths), read_timeout))
+        if self.fail:
+            raise ValueError("batch failed")
+        return [{"content": p} for p in file_paths]
+
+
+def submit_all(batcher: Batcher, files: list[tuple[str, int, float]], send) -> dict:
+    results = {}
+    started = threading.Barrier(len(files))
+
+    def job(path, size, timeout):
+        with batcher.job():
+            started.wait()
+            try:
+                results[path] = batcher.submit(path, size, timeout, send)
+            except ValueError as e:
+                results[path] = e
+
+    threads = [threading.Thread(target=job, args=f) for f in files]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+class TestBatcher(unittest.TestCase):
+    def test_full_batches(self):
+        batcher = Batcher(max_files=3, max_bytes=1000, linger=5)
+        send = RecordingSend()
+        files = [(f"f{i}", 10, float(i)) for i in range(6)]
+        results = submit_all(batcher, files, send)
+        # batches are sent as soon as they are full rather than after the linger time
+        self.assertEqual(len(send.batches), 2)
+        self.assertEqual(sorted(len(paths) for paths, _ in send.batches), [3, 3])
+        self.assertEqual(results, {f"f{i}": {"content": f"f{i}"} for i in range(6)})
+        self.assertEqual(batcher.batched, 6)
+        # longest timeout of the batch
+        for paths, timeout in send.batches:
+            self.assertEqual(timeout, max(float(p[1:]) for p in paths))
+
+    def test_byte_limit(self):
+        batcher = Batcher(max_files=10, max_bytes=100, linger=0.2)
+        send = RecordingSend()
+        results = submit_all(batcher, [(f"f{i}", 60, 1.0) for i in range(4)], send)
+        self.assertTrue(all(len(paths) == 1 for paths, _ in send.batches))
+        # files left on their own are parsed alone
+        self.assertEqual(results, {f"f{i}": None for i in range(4)})
+
+    def test_linger(self):
+        batcher = Batcher(max_files=10, max_bytes=1000, linger=0.05)
+        send = RecordingSend()
+        # another job is running but never submits a file
+        with batcher.job(), batcher.job():
+            start = time.monotonic()
+            self.assertIsNone(batcher.submit("f0", 10, 1.0, send))
+            self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(send.batches, [])
+
+    def test_no_linger_alone(self):
+        batcher = Batcher(max_files=10, max_bytes=1000, linger=5)
+        send = RecordingSend()
+        # with no other jobs running, as under the runner, files are handed straight back
+        start = time.monotonic()
+        with batcher.job():
+            self.assertIsNone(batcher.submit("f0", 10, 1.0, send))
+        self.assertIsNone(batcher.submit("f1", 10, 1.0, send))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(send.batches, [])
+
+    def test_failed_batch_releases_jobs(self):
+        batcher = Batcher(max_files=2, max_bytes=1000, linger=5)
+        send = RecordingSend(fail=True)
+        results = submit_all(batcher, [("f0", 10, 1.0), ("f1", 10, 1.0)], send)
+        self.assertEqual(len(send.batches), 1)
+        # the job that sent the batch sees the error, the other parses its file alone
+        self.assertEqual(sorted(type(r).__name__ for r in results.values()), ["NoneType", "ValueError"])
+        self.assertEqual(batcher.batched, 0)
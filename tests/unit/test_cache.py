@@ -0,0 +1,196 @@
+"""
+Result Cache Test Suite
+=======================
+Tests the memory and disk backends of the unpack result cache, and the cache of tika failures.
+
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from azul_plugin_tika.cache import (
+    EMPTY,
+    ERROR,
+    TIMEOUT,
+    DiskCache,
+    MemoryCache,
+    NegativeCache,
+    cache_key,
+)
+from azul_plugin_tika.result import TikaResult
+
+
+def make_result(content: str = "text", attachment: bytes = b"child") -> TikaResult:
+    return TikaResult(
+        {"Content-Type": "application/pdf", "Author": ["a", "b"]},
+        content,
+        attachments={"image1.png": attachment},
+    )
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_key_changes(self):
+        key = cache_key("abc", "Apache Tika 3.2.3", {"version": "1"})
+        self.assertEqual(key, cache_key("abc", "Apache Tika 3.2.3", {"version": "1"}))
+        self.assertNotEqual(key, cache_key("abd", "Apache Tika 3.2.3", {"version": "1"}))
+        self.assertNotEqual(key, cache_key("abc", "Apache Tika 3.2.4", {"version": "1"}))
+        self.assertNotEqual(key, cache_key("abc", "Apache Tika 3.2.3", {"version": "2"}))
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = MemoryCache(1024)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", make_result())
+        result = cache.get("a")
+        self.assertEqual(result, make_result())
+        # callers may modify the result without corrupting the cache
+        del result.metadata["Content-Type"]
+        self.assertEqual(cache.get("a"), make_result())
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1})
+
+    def test_spooled_attachment(self):
+        cache = MemoryCache(1024)
+        spooled = tempfile.TemporaryFile()
+        spooled.write(b"spooled child")
+        spooled.seek(0)
+        cache.put("a", make_result(attachment=spooled))
+        self.assertEqual(spooled.read(), b"spooled child")
+        self.assertEqual(cache.get("a").attachments["image1.png"], b"spooled child")
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(450)
+        cache.put("a", make_result("a" * 100))
+        cache.put("b", make_result("b" * 100))
+        cache.get("a")
+        cache.put("c", make_result("c" * 100))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.size, 450)
+        # too large to ever fit
+        cache.put("d", make_result("d" * 500))
+        self.assertIsNone(cache.get("d"))
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_and_miss(self):
+        cache = DiskCache(self.directory, 1024 * 1024)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", make_result())
+        result = cache.get("a")
+        with result.attachments["image1.png"] as f:
+            self.assertEqual(f.read(), b"child")
+        self.assertEqual(result.metadata, make_result().metadata)
+        self.assertEqual(result.content, "text")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+        # entries survive a restart
+        cache = DiskCache(self.directory, 1024 * 1024)
+        self.assertGreater(cache.size, 0)
+        result = cache.get("a")
+        result.attachments["image1.png"].close()
+        self.assertEqual(result.content, "text")
+
+    def test_eviction(self):
+        cache = DiskCache(self.directory, 2500)
+        for key in ["a", "b", "c"]:
+            cache.put(key, make_result(attachment=key.encode() * 1000))
+        self.assertLessEqual(cache.size, 2500)
+        self.assertIsNone(cache.get("a"))
+        result = cache.get("c")
+        result.attachments["image1.png"].close()
+        self.assertIsNotNone(result)
+
+    def test_missing_attachment(self):
+        cache = DiskCache(self.directory, 1024 * 1024)
+        result = make_result()
+        result.attachments["image2.png"] = b"other"
+        cache.put("a", result)
+        os.remove(os.path.join(self.directory, "a", hashlib.sha256(b"other").hexdigest()))
+        opened = []
+        real_open = open
+
+        def tracking_open(*args, **kwargs):
+            f = real_open(*args, **kwargs)
+            opened.append(f)
+            return f
+
+        with mock.patch("builtins.open", tracking_open):
+            self.assertIsNone(cache.get("a"))
+        self.assertTrue(opened)
+        self.assertTrue(all(f.closed for f in opened))
+
+    def test_keeps_truncated_flag(self):
+        cache = DiskCache(self.directory, 1024 * 1024)
+        result = make_result()
+        result.content_truncated = True
+        cache.put("a", result)
+        result = cache.get("a")
+        result.attachments["image1.png"].close()
+        self.assertTrue(result.content_truncated)
+
+
+class TestNegativeCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "failures", "negative.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_expiry(self):
+        cache = NegativeCache(60, 10)
+        with mock.patch("azul_plugin_tika.cache.time.time", return_value=1000.0):
+            cache.put("a", TIMEOUT, "too slow")
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), (TIMEOUT, "too slow"))
+        with mock.patch("azul_plugin_tika.cache.time.time", return_value=1060.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, {TIMEOUT: 1})
+
+    def test_bounded(self):
+        cache = NegativeCache(60, 2)
+        cache.put("a", EMPTY)
+        cache.put("b", EMPTY)
+        cache.get("a")
+        cache.put("c", ERROR, "x" * 1000)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), (EMPTY, ""))
+        self.assertEqual(cache.get("c"), (ERROR, "x" * 200))
+
+    def test_persisted(self):
+        cache = NegativeCache(60, 10, self.path)
+        cache.put("a", EMPTY)
+        cache.put("b", ERROR, "Tika server returned status 422 Unprocessable Entity")
+        with open(self.path, "a") as f:
+            f.write('{"key": "partial')
+        loaded = NegativeCache(60, 10, self.path)
+        self.assertEqual(loaded.get("a"), (EMPTY, ""))
+        self.assertEqual(loaded.get("b"), (ERROR, "Tika server returned status 422 Unprocessable Entity"))
+        # expired entries aren't loaded
+        with mock.patch("azul_plugin_tika.cache.time.time", return_value=float(2**40)):
+            self.assertEqual(len(NegativeCache(60, 10, self.path)), 0)
+
+    def test_compaction(self):
+        cache = NegativeCache(60, 2, self.path)
+        for key in "abcdef":
+            cache.put(key, EMPTY)
+        with open(self.path) as f:
+            self.assertLessEqual(len(f.readlines()), 4)
+        loaded = NegativeCache(60, 2, self.path)
+        self.assertIsNotNone(loaded.get("f"))
+        self.assertIsNone(loaded.get("a"))
+        self.assertEqual([n for n in os.listdir(os.path.dirname(self.path)) if n.startswith(".")], [])
@@ -0,0 +1,467 @@
+"""
+Tika Client Test Suite
+======================
+Tests decoding of tika server responses and reuse of the pooled session.
+
+"""
+
+import datetime
+import io
+import os
+import socket
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from azul_plugin_tika.client import (
+    RMETA_CONTENT,
+    RMETA_PATH,
+    AttachmentLimits,
+    TikaClient,
+    TikaResponseError,
+    limit_text,
+    parse_rmeta,
+    parse_unpack,
+    read_text,
+    split_rmeta_batch,
+    write_text,
+)
+from azul_plugin_tika.result import EmbeddedDocument, TikaResult
+from tests.benchmark.mock_tika import MockOptions, MockTikaServer
+
+
+def make_unpack_tar(members: dict[str, bytes]) -> bytes:
+    """Build a tar in the same layout as the tika '/unpack/all' endpoint."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+UNPACK_TAR = make_unpack_tar(
+    {
+        "image1.png": b"\x89PNG fake image",
+        "__METADATA__": b'"Content-Type","application/pdf"\n"dc:creator","alice","bob"\n"X-Null","a\x00b"\n',
+        "__TEXT__": "  some text ✓\n".encode(),
+    }
+)
+
+
+RMETA_DOCUMENTS = [
+    {"Content-Type": "application/zip", "X-TIKA:content": "\n listing \n", "X-TIKA:parse_time_millis": "5"},
+    {
+        "Content-Type": "application/msword",
+        "resourceName": "doc.doc",
+        "X-TIKA:embedded_resource_path": "/doc.doc",
+        "X-TIKA:embedded_depth": "1",
+        "X-TIKA:content": "document text",
+        "dc:creator": "alice",
+    },
+    {
+        "Content-Type": "image/png",
+        "X-TIKA:embedded_resource_path": "/doc.doc/image1.png",
+        "X-TIKA:content": "",
+    },
+    {"Content-Type": "text/plain", "X-TIKA:embedded_resource_path": "/notes.txt", "X-TIKA:content": "notes"},
+]
+
+
+class MockRaw(io.BytesIO):
+    """Stand in for the urllib3 response used when streaming."""
+
+    def drain_conn(self):
+        self.read()
+
+
+class FailingRaw(MockRaw):
+    """Streamed response body that fails part way through, as urllib3 does when the server stalls or hangs up."""
+
+    def __init__(self, content: bytes, error: Exception):
+        super().__init__(content)
+        self.error = error
+
+    def readinto(self, buffer):
+        if self.tell():
+            raise self.error
+        return super().readinto(memoryview(buffer)[:512])
+
+
+def mock_response(status: int, content: bytes = b""):
+    resp = mock.MagicMock()
+    resp.status_code = status
+    resp.reason = "reason"
+    resp.content = content
+    resp.elapsed = datetime.timedelta(seconds=0.25)
+    return resp
+
+
+class TestTikaClient(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"%PDF-1.4 test")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_parse_unpack(self):
+        result = parse_unpack(io.BytesIO(UNPACK_TAR))
+        self.assertEqual(
+            result.as_dict(),
+            {
+                "metadata": {"Content-Type": "application/pdf", "dc:creator": ["alice", "bob"], "X-Null": "ab"},
+                "content": "some text ✓",
+                "attachments": {"image1.png": b"\x89PNG fake image"},
+            },
+        )
+
+    def test_unpack_reuses_session(self):
+        client = TikaClient("http://tika:9998/", pool_size=2, connect_timeout=1, read_timeout=5)
+        with mock.patch.object(client.session, "put", return_value=mock_response(200, UNPACK_TAR)) as put:
+            client.unpack(self.path)
+            result = client.unpack(self.path)
+        self.assertEqual(put.call_count, 2)
+        args, kwargs = put.call_args
+        self.assertEqual(args[0], "http://tika:9998/unpack/all")
+        self.assertEqual(kwargs["timeout"], (1, 5))
+        self.assertEqual(kwargs["headers"]["Accept"], "application/x-tar")
+        self.assertIn(os.path.basename(self.path), kwargs["headers"]["Content-Disposition"])
+        self.assertEqual(result.metadata["Content-Type"], "application/pdf")
+        adapter = client.session.get_adapter("http://tika:9998")
+        self.assertEqual(adapter._pool_maxsize, 2)
+        self.assertTrue(adapter._pool_block)
+
+    def test_unpack_empty(self):
+        client = TikaClient("http://tika:9998")
+        with mock.patch.object(client.session, "put", return_value=mock_response(204)):
+            self.assertIsNone(client.unpack(self.path))
+        with mock.patch.object(client.session, "put", return_value=mock_response(200)):
+            self.assertIsNone(client.unpack(self.path))
+
+    def test_unpack_error_status(self):
+        client = TikaClient("http://tika:9998")
+        with mock.patch.object(client.session, "put", return_value=mock_response(422, b"parse error")):
+            with self.assertRaises(TikaResponseError) as ctx:
+                client.unpack(self.path)
+        self.assertEqual(ctx.exception.status, 422)
+
+    def test_sendfile_upload(self):
+        with open(self.path, "wb") as f:
+            f.write(os.urandom(300 * 1024))
+        with MockTikaServer(MockOptions(attachments=1)) as server:
+            for sendfile in (True, False):
+                client = TikaClient(server.url, sendfile=sendfile)
+                with mock.patch("socket.socket.sendfile", autospec=True, side_effect=socket.socket.sendfile) as sent:
+                    result = client.unpack(self.path)
+                    # the connection is reused for a second upload
+                    client.unpack(self.path)
+                self.assertEqual(sent.call_count, 2 if sendfile else 0)
+                self.assertEqual(list(result.attachments), ["embedded0.bin"])
+                client.close()
+            self.assertEqual(server.bytes_received, 4 * 300 * 1024)
+
+    def test_split_rmeta_batch(self):
+        documents = [
+            {"Content-Type": "application/x-tar", RMETA_CONTENT: ""},
+            {
+                "Content-Type": "text/plain",
+                "resourceName": "0",
+                "Content-Length": "5",
+                "dcterms:modified": "1970-01-01T00:00:00Z",
+                RMETA_PATH: "/0",
+                RMETA_CONTENT: "  hello  ",
+            },
+            {"Content-Type": "application/zip", RMETA_PATH: "/1", RMETA_CONTENT: ""},
+            {"Content-Type": "text/plain", RMETA_PATH: "/1/inner.txt", RMETA_CONTENT: "inner"},
+            {"Content-Type": "application/pdf", "X-TIKA:EXCEPTION:embedded_exception": "bad", RMETA_PATH: "/2"},
+            {
+                "Content-Type": "application/pdf",
+                "dcterms:modified": "2021-06-27T17:39:21Z",
+                "X-TIKA:EXCEPTION:warn": "font",
+                RMETA_PATH: "/4",
+                RMETA_CONTENT: "abcdef",
+            },
+        ]
+        self.assertEqual(
+            split_rmeta_batch(documents, 5, max_text=4),
+            [
+                TikaResult({"Content-Type": "text/plain"}, "hell", content_truncated=True),
+                None,
+                None,
+                None,
+                TikaResult(
+                    {
+                        "Content-Type": "application/pdf",
+                        "dcterms:modified": "2021-06-27T17:39:21Z",
+                        "X-TIKA:EXCEPTION:warn": "font",
+                    },
+                    "abcd",
+                    content_truncated=True,
+                ),
+            ],
+        )
+        self.assertEqual(split_rmeta_batch([], 2), [None, None])
+
+    def test_rmeta_batch(self):
+        uploaded = {}
+
+        def put(url, data, headers, timeout):
+            with tarfile.open(fileobj=data) as tar:
+                for member in tar:
+                    uploaded[member.name] = (tar.extractfile(member).read(), member.mtime)
+            self.assertEqual(headers["writeLimit"], str(2 * (10 + 1024) + 1024))
+            resp = mock_response(200, b"[...]")
+            resp.json.return_value = [
+                {RMETA_PATH: ""},
+                {RMETA_PATH: "/1", RMETA_CONTENT: "one"},
+                {RMETA_PATH: "/0", RMETA_CONTENT: "zero"},
+            ]
+            return resp
+
+        client = TikaClient("http://tika:9998")
+        with mock.patch.object(client.session, "put", side_effect=put):
+            results = client.rmeta_batch([self.path, self.path], max_text=10)
+        self.assertEqual(uploaded, {"0": (b"%PDF-1.4 test", 0), "1": (b"%PDF-1.4 test", 0)})
+        self.assertEqual([r.content for r in results], ["zero", "one"])
+
+    def test_no_keep_alive(self):
+        client = TikaClient("http://tika:9998", keep_alive=False)
+        self.assertEqual(client.session.headers["Connection"], "close")
+
+    def test_parse_unpack_spools_to_disk(self):
+        tar = make_unpack_tar({"small.bin": b"a" * 10, "large.bin": b"b" * 100, "__TEXT__": b"text"})
+        result = parse_unpack(io.BytesIO(tar), spool_limit=50)
+        self.assertEqual(result.content, "text")
+        self.assertEqual(result.attachments["small.bin"], b"a" * 10)
+        with result.attachments["large.bin"] as spooled:
+            self.assertEqual(spooled.read(), b"b" * 100)
+
+    def test_parse_unpack_duplicates(self):
+        tar = make_unpack_tar(
+            {
+                "logo.png": b"logo",
+                "large.bin": b"b" * 100,
+                "image2.png": b"logo",
+                "copy.bin": b"b" * 100,
+                "image3.png": b"logo",
+                "other.png": b"other",
+            }
+        )
+        for spool_limit in (None, 50):
+            result = parse_unpack(io.BytesIO(tar), spool_limit=spool_limit)
+            self.assertEqual(list(result.attachments), ["logo.png", "large.bin", "other.png"])
+            self.assertEqual(result.duplicates, {"logo.png": ["image2.png", "image3.png"], "large.bin": ["copy.bin"]})
+        self.assertEqual(parse_unpack(io.BytesIO(UNPACK_TAR)).duplicates, {})
+
+    def test_parse_unpack_limits(self):
+        tar = make_unpack_tar(
+            {
+                "a.bin": b"a" * 10,
+                "huge.bin": b"h" * 1000,
+                "b.bin": b"b" * 10,
+                "c.bin": b"c" * 10,
+                "__TEXT__": b"text",
+            }
+        )
+        for spool_limit in (None, 15):
+            result = parse_unpack(io.BytesIO(tar), spool_limit=spool_limit, limits=AttachmentLimits(max_count=2))
+            self.assertEqual(list(result.attachments), ["a.bin", "huge.bin"])
+            self.assertEqual(result.skipped, {"max_count": (2, 20)})
+            self.assertEqual(result.content, "text")
+
+        result = parse_unpack(io.BytesIO(tar), limits=AttachmentLimits(max_size=100, max_total=25))
+        self.assertEqual(list(result.attachments), ["a.bin", "b.bin"])
+        self.assertEqual(result.skipped, {"max_size": (1, 1000), "max_total": (1, 10)})
+
+        result = parse_unpack(io.BytesIO(tar), limits=AttachmentLimits(max_ratio=2, input_size=10))
+        self.assertEqual(list(result.attachments), ["a.bin", "b.bin"])
+        self.assertEqual(result.skipped, {"max_ratio": (2, 1010)})
+        self.assertEqual(parse_unpack(io.BytesIO(tar), limits=AttachmentLimits()).skipped, {})
+
+    def test_unpack_streaming(self):
+        client = TikaClient("http://tika:9998", spool_limit=4)
+        resp = mock_response(200)
+        resp.raw = MockRaw(UNPACK_TAR)
+        with mock.patch.object(client.session, "put", return_value=resp) as put:
+            result = client.unpack(self.path)
+        self.assertTrue(put.call_args[1]["stream"])
+        self.assertEqual(result.metadata["dc:creator"], ["alice", "bob"])
+        self.assertEqual(result.content, "some text ✓")
+        self.assertEqual(result.attachments["image1.png"].read(), b"\x89PNG fake image")
+
+        resp = mock_response(200)
+        resp.raw = MockRaw(b"")
+        with mock.patch.object(client.session, "put", return_value=resp):
+            self.assertIsNone(client.unpack(self.path))
+
+    def test_unpack_streaming_errors(self):
+        client = TikaClient("http://tika:9998", spool_limit=4)
+        for error, expected in (
+            (ReadTimeoutError(None, "/unpack/all", "read timed out"), requests.ReadTimeout),
+            (ProtocolError("connection broken"), requests.ConnectionError),
+        ):
+            resp = mock_response(200)
+            resp.raw = FailingRaw(UNPACK_TAR, error)
+            with mock.patch.object(client.session, "put", return_value=resp), self.assertRaises(expected):
+                client.unpack(self.path)
+
+    def test_unpack_stats(self):
+        client = TikaClient("http://tika:9998")
+        stats = {}
+        with mock.patch.object(client.session, "put", return_value=mock_response(200, UNPACK_TAR)):
+            client.unpack(self.path, stats=stats)
+        self.assertEqual(stats["tika"], 0.25)
+        self.assertEqual(stats["bytes_out"], len(UNPACK_TAR))
+        self.assertIn("download", stats)
+        self.assertIn("decode", stats)
+
+        client = TikaClient("http://tika:9998", spool_limit=4)
+        resp = mock_response(200)
+        resp.raw = MockRaw(UNPACK_TAR)
+        stats = {}
+        with mock.patch.object(client.session, "put", return_value=resp):
+            client.unpack(self.path, stats=stats)
+        self.assertEqual(stats["bytes_out"], len(UNPACK_TAR))
+        self.assertNotIn("download", stats)
+        self.assertIn("decode", stats)
+
+    def test_parse_rmeta(self):
+        result = parse_rmeta(RMETA_DOCUMENTS, max_text=4)
+        self.assertEqual(result.metadata, {"Content-Type": "application/zip"})
+        self.assertEqual(result.content, "list")
+        self.assertTrue(result.content_truncated)
+        self.assertEqual(result.attachments, {})
+        self.assertEqual(
+            result.embedded,
+            {
+                "doc.doc": EmbeddedDocument(
+                    {
+                        "Content-Type": "application/msword",
+                        "resourceName": "doc.doc",
+                        "dc:creator": "alice",
+                    },
+                    "docu",
+                    content_truncated=True,
+                    nested=True,
+                ),
+                "notes.txt": EmbeddedDocument({"Content-Type": "text/plain"}, "note", content_truncated=True),
+            },
+        )
+        self.assertIsNone(parse_rmeta([]))
+
+    def test_unpack_rmeta(self):
+        client = TikaClient("http://tika:9998")
+        rmeta = mock_response(200, b"[]")
+        rmeta.json.return_value = RMETA_DOCUMENTS
+        attachments = make_unpack_tar({"doc.doc": b"doc", "notes.txt": b"notes"})
+        with mock.patch.object(client.session, "put", side_effect=[rmeta, mock_response(200, attachments)]) as put:
+            stats = {}
+            result = client.unpack_rmeta(self.path, stats=stats)
+        self.assertEqual(put.call_args_list[0][0][0], "http://tika:9998/rmeta/text")
+        self.assertEqual(put.call_args_list[1][0][0], "http://tika:9998/unpack")
+        self.assertEqual(result.content, "listing")
+        self.assertEqual(result.attachments, {"doc.doc": b"doc", "notes.txt": b"notes"})
+        self.assertEqual(stats["tika"], 0.5)
+
+        # no embedded documents, so no attachments to fetch
+        rmeta.json.return_value = RMETA_DOCUMENTS[:1]
+        with mock.patch.object(client.session, "put", return_value=rmeta) as put:
+            result = client.unpack_rmeta(self.path)
+        self.assertEqual(put.call_count, 1)
+        self.assertEqual(result.embedded, {})
+
+    def test_detect_sends_leading_bytes(self):
+        client = TikaClient("http://tika:9998")
+        resp = mock_response(200)
+        resp.text = "application/java-archive\n"
+        with mock.patch.object(client.session, "put", return_value=resp) as put:
+            self.assertEqual(client.detect(self.path, 4), "application/java-archive")
+        self.assertEqual(put.call_args[0][0], "http://tika:9998/detect/stream")
+        self.assertEqual(put.call_args[1]["data"], b"%PDF")
+
+    def test_meta_sends_leading_bytes(self):
+        client = TikaClient("http://tika:9998")
+        resp = mock_response(200, b"{}")
+        resp.json.return_value = {"Content-Type": "text/plain; charset=ISO-8859-1"}
+        with mock.patch.object(client.session, "put", return_value=resp) as put:
+            self.assertEqual(client.meta(self.path, 4), {"Content-Type": "text/plain; charset=ISO-8859-1"})
+        self.assertEqual(put.call_args[0][0], "http://tika:9998/meta")
+        self.assertEqual(put.call_args[1]["data"], b"%PDF")
+        self.assertEqual(put.call_args[1]["headers"]["Accept"], "application/json")
+
+    def test_unpack_limits_text(self):
+        client = TikaClient("http://tika:9998")
+        with mock.patch.object(client.session, "put", return_value=mock_response(200, UNPACK_TAR)) as put:
+            result = client.unpack(self.path, max_text=4)
+        self.assertEqual(put.call_args[1]["headers"]["writeLimit"], "1028")
+        self.assertEqual(result.content, "some")
+        self.assertTrue(result.content_truncated)
+
+        with mock.patch.object(client.session, "put", return_value=mock_response(200, UNPACK_TAR)):
+            result = client.unpack(self.path, max_text=11)
+        self.assertEqual(result.content, "some text ✓")
+        self.assertFalse(result.content_truncated)
+
+    def test_read_text(self):
+        self.assertEqual(read_text(io.BytesIO(b"\n  abc def \n\n"), 3), ("abc", True))
+        self.assertEqual(read_text(io.BytesIO(b"\n  abc  \n\n"), 3), ("abc", False))
+        self.assertEqual(read_text(io.BytesIO(b"\n  abc  \n\n")), ("abc", False))
+        self.assertEqual(read_text(io.BytesIO(b"  \n")), ("", False))
+        self.assertEqual(read_text(io.BytesIO("✓✓✓".encode()), 2), ("✓✓", True))
+
+    def test_read_text_charset(self):
+        self.assertEqual(read_text(io.BytesIO(" café ".encode("cp1252")), None, "cp1252"), ("café", False))
+        self.assertEqual(read_text(io.BytesIO("✓ text".encode("utf-16")), 1, "utf-16"), ("✓", True))
+        # undecodable bytes in local text files are replaced rather than failing the job
+        self.assertEqual(read_text(io.BytesIO(b"a\xffb"), None, "utf-8", "replace"), ("a\ufffdb", False))
+
+    @mock.patch("azul_plugin_tika.client.CHUNK_SIZE", 4)
+    def test_write_text_across_chunks(self):
+        out = io.StringIO()
+        self.assertEqual(write_text(io.BytesIO("  \n ab  \n    \n  cd ✓\n\n  \n".encode()), out), (16, False))
+        self.assertEqual(out.getvalue(), "ab  \n    \n  cd ✓")
+        # whitespace held back is cut at the limit along with the text following it
+        out = io.StringIO()
+        self.assertEqual(write_text(io.BytesIO(b"ab" + b" " * 20 + b"cd"), out, 6), (6, True))
+        self.assertEqual(out.getvalue(), "ab    ")
+        out = io.StringIO()
+        self.assertEqual(write_text(io.BytesIO(b"ab" + b" " * 20), out, 6), (2, False))
+        self.assertEqual(out.getvalue(), "ab")
+        # utf-8 characters split between chunks
+        out = io.BytesIO()
+        with io.TextIOWrapper(out, encoding="utf-8", write_through=True) as wrapper:
+            self.assertEqual(write_text(io.BytesIO("✓✓✓✓ ".encode()), wrapper, 3), (3, True))
+            self.assertEqual(out.getvalue(), "✓✓✓".encode())
+
+    def test_limit_text(self):
+        self.assertEqual(limit_text("\n  abc def \n\n", 3), ("abc", True))
+        self.assertEqual(limit_text("\n  abc  \n\n", 3), ("abc", False))
+        self.assertEqual(limit_text("\n  abc  \n\n"), ("abc", False))
+        self.assertEqual(limit_text("  \n", 3), ("", False))
+        text = "abc"
+        self.assertIs(limit_text(text, 10)[0], text)
+
+    def test_write_limit_reached(self):
+        tar = make_unpack_tar({"__METADATA__": b'"X-TIKA:WRITE_LIMIT_REACHED","true"\n', "__TEXT__": b"text"})
+        result = parse_unpack(io.BytesIO(tar), max_text=10)
+        self.assertEqual(result.metadata, {})
+        self.assertTrue(result.content_truncated)
+
+    def test_failures_counted_per_server(self):
+        client = TikaClient("http://a:9998,http://b:9998", eject_after=1)
+        with mock.patch.object(client.session, "put", side_effect=requests.ConnectionError):
+            with self.assertRaises(requests.ConnectionError):
+                client.unpack(self.path)
+        self.assertEqual(client.endpoints.live(), 1)
+        # parse failures are down to the file, not the server
+        with mock.patch.object(client.session, "put", return_value=mock_response(422)):
+            with self.assertRaises(TikaResponseError):
+                client.unpack(self.path)
+        self.assertEqual(client.endpoints.live(), 1)
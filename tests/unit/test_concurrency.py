@@ -0,0 +1,259 @@
+"""
+Concurrency Limit Test Suite
+============================
+Tests the adaptive limit on tika requests in flight.
+
+"""
+
+import multiprocessing
+import tempfile
+import threading
+import time
+import unittest
+
+from azul_plugin_tika.concurrency import AdaptiveLimiter, SharedLimiter
+
+
+def acquire_and_exit(directory: str):
+    """Take a slot in another process, exiting without releasing it."""
+    SharedLimiter(directory, max_limit=1, adaptive=False).acquire()
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def run_requests(self, limiter: AdaptiveLimiter, count: int, latency: float, busy: int = 0):
+        """Complete requests with the given latency, as if busy other requests were also in flight."""
+        for _ in range(count):
+            in_flight = limiter.acquire()
+            limiter.release(in_flight + busy, latency, failed=False)
+
+    def test_fixed_limit_blocks(self):
+        limiter = AdaptiveLimiter(max_limit=2, adaptive=False)
+        limiter.acquire()
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def third():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(2, 1, failed=False)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(limiter.limit, 2)
+
+    def test_grows_while_latency_is_steady(self):
+        limiter = AdaptiveLimiter(max_limit=8)
+        self.assertEqual(limiter.limit, 1)
+        self.run_requests(limiter, 50, 0.1, busy=8)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_no_growth_when_underused(self):
+        limiter = AdaptiveLimiter(max_limit=8)
+        self.run_requests(limiter, 50, 0.1)
+        self.assertLess(limiter.limit, 3)
+
+    def test_shrinks_when_latency_rises(self):
+        limiter = AdaptiveLimiter(max_limit=8, initial=8)
+        self.run_requests(limiter, 20, 0.1, busy=6)
+        self.run_requests(limiter, 20, 1.0, busy=6)
+        self.assertLess(limiter.limit, 6)
+        self.assertGreaterEqual(limiter.limit, 1)
+
+    def test_failures_cut_limit(self):
+        limiter = AdaptiveLimiter(max_limit=8, initial=8)
+        in_flight = limiter.acquire()
+        limiter.release(in_flight, 0.1, failed=True)
+        self.assertAlmostEqual(limiter.limit, 7.2)
+
+    def test_threads_never_exceed_limit(self):
+        limiter = AdaptiveLimiter(max_limit=3, adaptive=False)
+        peak = []
+
+        def request():
+            in_flight = limiter.acquire()
+            peak.append(limiter.in_flight)
+            time.sleep(0.01)
+            limiter.release(in_flight, 0.01, failed=False)
+
+        threads = [threading.Thread(target=request) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_lane_limit(self):
+        limiter = AdaptiveLimiter(max_limit=4, adaptive=False, lane_limits={"large": 2})
+        limiter.acquire("large")
+        limiter.acquire("large")
+        acquired = threading.Event()
+
+        def third():
+            limiter.acquire("large")
+            acquired.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        # the lane is full although the overall limit isn't
+        self.assertFalse(acquired.wait(0.1))
+        limiter.acquire()
+        limiter.release(3, 10.0, failed=False, lane="large")
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(limiter.lane_in_flight, {"large": 2})
+        self.assertEqual(limiter.in_flight, 3)
+
+    def test_lane_leaves_a_slot(self):
+        limiter = AdaptiveLimiter(max_limit=3, adaptive=False, lane_limits={"large": 3})
+        limiter.acquire("large")
+        limiter.acquire("large")
+        self.assertFalse(limiter._lane_free("large"))
+        # the last slot is kept for other requests
+        limiter.acquire()
+        self.assertEqual(limiter.in_flight, 3)
+        # but a lane can still run when the limit is a single request
+        single = AdaptiveLimiter(max_limit=1, adaptive=False, lane_limits={"large": 1})
+        single.acquire("large")
+        self.assertEqual(single.in_flight, 1)
+
+    def test_lane_gives_way(self):
+        limiter = AdaptiveLimiter(max_limit=3, adaptive=False, lane_limits={"large": 2})
+        for _ in range(3):
+            limiter.acquire()
+        order = []
+
+        def request(lane):
+            limiter.acquire(lane)
+            order.append(lane)
+
+        large = threading.Thread(target=request, args=("large",))
+        large.start()
+        time.sleep(0.05)
+        small = threading.Thread(target=request, args=(None,))
+        small.start()
+        time.sleep(0.05)
+        # the small request queued after the large one still goes first
+        limiter.release(3, 0.1, failed=False)
+        small.join(1)
+        self.assertEqual(order, [None])
+        limiter.release(3, 0.1, failed=False)
+        limiter.release(2, 0.1, failed=False)
+        large.join(1)
+        self.assertEqual(order, [None, "large"])
+
+    def test_lane_latency_ignored(self):
+        limiter = AdaptiveLimiter(max_limit=8, initial=4, lane_limits={"large": 1})
+        in_flight = limiter.acquire("large")
+        limiter.release(in_flight, 100.0, failed=False, lane="large")
+        self.assertIsNone(limiter.recent_latency)
+        self.assertEqual(limiter.limit, 4)
+        in_flight = limiter.acquire("large")
+        limiter.release(in_flight, 1.0, failed=True, lane="large")
+        self.assertAlmostEqual(limiter.limit, 3.6)
+
+
+class TestSharedLimiter(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def limiter(self, **kwargs) -> SharedLimiter:
+        """A limiter over the same directory, as another process would create."""
+        return SharedLimiter(self.dir.name, poll_interval=0.01, **kwargs)
+
+    def test_limit_spans_limiters(self):
+        first = self.limiter(max_limit=2, adaptive=False)
+        second = self.limiter(max_limit=2, adaptive=False)
+        self.assertEqual(first.acquire(), 1)
+        self.assertEqual(second.acquire(), 2)
+        acquired = threading.Event()
+
+        def third():
+            second.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=third)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        first.release(1, 0.1, failed=False)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual((first.in_flight, second.in_flight), (0, 2))
+
+    def test_exited_process_frees_slot(self):
+        process = multiprocessing.Process(target=acquire_and_exit, args=(self.dir.name,))
+        process.start()
+        process.join(10)
+        self.assertEqual(process.exitcode, 0)
+        limiter = self.limiter(max_limit=1, adaptive=False)
+        self.assertEqual(limiter.acquire(), 1)
+
+    def test_adaptive_limit_shared(self):
+        first = self.limiter(max_limit=8)
+        for _ in range(50):
+            in_flight = first.acquire()
+            first.release(in_flight + 8, 0.1, failed=False)
+        self.assertEqual(first.limit, 8)
+        second = self.limiter(max_limit=8)
+        self.assertEqual(second.limit, 8)
+        in_flight = second.acquire()
+        second.release(in_flight, 0.1, failed=True)
+        first.acquire()
+        self.assertAlmostEqual(first.limit, 7.2)
+
+    def test_lane_limit_spans_limiters(self):
+        first = self.limiter(max_limit=4, adaptive=False, lane_limits={"large": 1})
+        second = self.limiter(max_limit=4, adaptive=False, lane_limits={"large": 1})
+        first.acquire("large")
+        acquired = threading.Event()
+
+        def large():
+            second.acquire("large")
+            acquired.set()
+
+        thread = threading.Thread(target=large)
+        thread.start()
+        # the lane is full although the overall limit isn't
+        self.assertFalse(acquired.wait(0.1))
+        self.assertEqual(second.acquire(), 2)
+        first.release(1, 10.0, failed=False, lane="large")
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(second.lane_in_flight, {"large": 1})
+
+    def test_lane_leaves_a_slot(self):
+        first = self.limiter(max_limit=3, adaptive=False, lane_limits={"large": 3})
+        second = self.limiter(max_limit=3, adaptive=False, lane_limits={"large": 3})
+        first.acquire("large")
+        second.acquire("large")
+        self.assertIsNone(second._try_acquire("large"))
+        # the last slot is kept for other requests
+        self.assertEqual(second.acquire(), 3)
+
+    def test_lane_gives_way(self):
+        first = self.limiter(max_limit=3, adaptive=False, lane_limits={"large": 1})
+        second = self.limiter(max_limit=3, adaptive=False, lane_limits={"large": 1})
+        for _ in range(3):
+            first.acquire()
+        acquired = threading.Event()
+
+        def small():
+            second.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=small)
+        thread.start()
+        time.sleep(0.05)
+        # a request outside any lane is waiting in another process, so lane requests hold back
+        self.assertFalse(first._unlaned_idle())
+        self.assertIsNone(first._try_acquire("large"))
+        first.release(3, 0.1, failed=False)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertTrue(first._unlaned_idle())
+        first.release(2, 0.1, failed=False)
+        self.assertIsNotNone(first._try_acquire("large"))
@@ -0,0 +1,83 @@
+"""
+Endpoint Pool Test Suite
+========================
+Tests balancing and ejection across multiple tika servers.
+
+"""
+
+import unittest
+from unittest import mock
+
+from azul_plugin_tika.endpoints import EndpointPool
+
+
+class TestEndpointPool(unittest.TestCase):
+    def test_server_list(self):
+        pool = EndpointPool("http://a:9998/, http://b:9998")
+        self.assertEqual([e.url for e in pool.endpoints], ["http://a:9998", "http://b:9998"])
+        with self.assertRaises(ValueError):
+            EndpointPool(" , ")
+
+    def test_least_outstanding(self):
+        pool = EndpointPool(["http://a", "http://b"])
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first, second)
+        pool.release(first, failed=False, elapsed=1)
+        self.assertEqual(pool.acquire(), first)
+
+    def test_spreads_sequential_requests(self):
+        pool = EndpointPool(["http://a", "http://b"])
+        used = set()
+        for _ in range(2):
+            endpoint = pool.acquire()
+            used.add(endpoint.url)
+            pool.release(endpoint, failed=False, elapsed=1)
+        self.assertEqual(used, {"http://a", "http://b"})
+
+    def test_ejection_and_probe(self):
+        probe = mock.MagicMock(return_value=False)
+        pool = EndpointPool(["http://a", "http://b"], eject_after=2, eject_seconds=10, probe=probe)
+        a = pool.endpoints[0]
+        for _ in range(2):
+            pool.acquire()
+            pool.release(a, failed=True, elapsed=1)
+        self.assertEqual(pool.live(), 1)
+        for _ in range(3):
+            endpoint = pool.acquire()
+            self.assertEqual(endpoint.url, "http://b")
+            pool.release(endpoint, failed=False, elapsed=1)
+
+        # ejection expired but the probe still fails, so it is ejected for twice as long
+        a.ejected_until = 1
+        with mock.patch("azul_plugin_tika.endpoints.time.monotonic", return_value=100):
+            self.assertEqual(pool.acquire().url, "http://b")
+        probe.assert_called_once_with(a)
+        self.assertEqual(a.ejected_until, 120)
+
+        probe.return_value = True
+        a.ejected_until = 1
+        pool.acquire()
+        self.assertEqual(pool.live(), 2)
+
+    def test_slow_requests_count_as_failures(self):
+        pool = EndpointPool(["http://a", "http://b"], eject_after=1, slow_seconds=5)
+        a = pool.endpoints[0]
+        pool.release(a, failed=False, elapsed=4)
+        self.assertEqual(pool.live(), 2)
+        pool.release(a, failed=False, elapsed=6)
+        self.assertEqual(pool.live(), 1)
+
+    def test_all_ejected_uses_soonest(self):
+        pool = EndpointPool(["http://a", "http://b"], eject_after=1, eject_seconds=10)
+        a, b = pool.endpoints
+        pool.release(b, failed=True, elapsed=1)
+        pool.release(a, failed=True, elapsed=1)
+        self.assertEqual(pool.acquire(), b)
+
+    def test_resolve_dns(self):
+        infos = [(None, None, None, "", ("10.0.0.2", 9998)), (None, None, None, "", ("10.0.0.1", 9998))]
+        with mock.patch("azul_plugin_tika.endpoints.socket.getaddrinfo", return_value=infos):
+            pool = EndpointPool("http://tika:9998", resolve_dns=True)
+        self.assertEqual([e.url for e in pool.endpoints], ["http://10.0.0.1:9998", "http://10.0.0.2:9998"])
+        self.assertEqual(pool.endpoints[0].headers, {"Host": "tika:9998"})
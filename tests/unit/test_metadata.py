@@ -0,0 +1,89 @@
+"""
+Metadata Rules Test Suite
+=========================
+Tests dropping, renaming and limiting metadata before it is featured.
+
+"""
+
+import unittest
+
+from azul_plugin_tika.metadata import (
+    DEFAULT_ALIASES,
+    DROPPED_METADATA,
+    FILE_METADATA,
+    MetadataRules,
+    parse_pairs,
+)
+
+
+class TestMetadataRules(unittest.TestCase):
+    def test_parse_pairs(self):
+        self.assertEqual(parse_pairs(["Author=dc:creator", " a = b "]), {"Author": "dc:creator", "a": "b"})
+        self.assertEqual(parse_pairs(["dc:title=10"], int), {"dc:title": 10})
+        self.assertEqual(parse_pairs(DEFAULT_ALIASES)["meta:author"], "dc:creator")
+        with self.assertRaises(ValueError):
+            parse_pairs(["dc:title"])
+
+    def test_drop(self):
+        rules = MetadataRules(
+            100, drop=("Content-Type",), drop_prefixes=("ICC:", "X-TIKA:"), drop_patterns=(r"^Unknown tag",)
+        )
+        metadata = {
+            "Content-Type": "image/jpeg",
+            "ICC:Profile Size": "3144",
+            "X-TIKA:Parsed-By": ["a", "b"],
+            "Unknown tag (0x0001)": "x",
+            "tiff:ImageWidth": "100",
+            "Exif SubIFD:Unknown tag": "y",
+        }
+        self.assertEqual(
+            list(rules.apply(metadata)),
+            [(FILE_METADATA, "tiff:ImageWidth", "100"), (FILE_METADATA, "Exif SubIFD:Unknown tag", "y")],
+        )
+
+    def test_values(self):
+        rules = MetadataRules(5, drop=(), length_limits={"long": 10})
+        metadata = {"empty": "", "list": ["a", "", "b"], "too-long": "abcdef", "long": "abcdef"}
+        self.assertEqual(
+            list(rules.apply(metadata)),
+            [
+                (FILE_METADATA, "list", "a"),
+                (FILE_METADATA, "list", "b"),
+                (DROPPED_METADATA, "too-long", "abcdef"),
+                (FILE_METADATA, "long", "abcdef"),
+            ],
+        )
+        # samples of dropped values are capped
+        self.assertEqual(list(rules.apply({"k": "x" * 500})), [(DROPPED_METADATA, "k", "x" * 100)])
+
+    def test_aliases(self):
+        rules = MetadataRules(100, drop=("resourceName",), aliases=parse_pairs(DEFAULT_ALIASES))
+        metadata = {
+            "dc:creator": "alice",
+            "Author": "alice",
+            "meta:author": ["alice", "bob"],
+            "title": "report",
+            "resourceName": "a.doc",
+        }
+        self.assertEqual(
+            list(rules.apply(metadata)),
+            [
+                (FILE_METADATA, "dc:creator", "alice"),
+                (FILE_METADATA, "dc:creator", "bob"),
+                (FILE_METADATA, "dc:title", "report"),
+            ],
+        )
+        # values are only collapsed within one document
+        self.assertEqual(list(rules.apply({"Author": "alice"})), [(FILE_METADATA, "dc:creator", "alice")])
+
+    def test_alias_to_dropped_key(self):
+        rules = MetadataRules(100, drop=("dc:creator",), aliases={"Author": "dc:creator"})
+        self.assertEqual(list(rules.apply({"Author": "alice"})), [])
+
+    def test_rules_remembered(self):
+        rules = MetadataRules(100, drop=("a",))
+        list(rules.apply({"a": "1", "b": "2"}))
+        self.assertEqual(rules._rules, {"a": None, "b": ("b", 100, False)})
+        rules.MAX_REMEMBERED = 2
+        list(rules.apply({"c": "3"}))
+        self.assertEqual(rules._rules, {"c": ("c", 100, False)})
@@ -0,0 +1,94 @@
+"""
+Metrics Test Suite
+==================
+Tests recording job timings and rendering metrics in the Prometheus text format.
+
+"""
+
+import socket
+import unittest
+import urllib.request
+
+from azul_plugin_tika.metrics import (
+    COUNTER,
+    HISTOGRAM,
+    JobMetrics,
+    Metrics,
+    create_metrics,
+)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter(self):
+        metrics = Metrics()
+        metrics.describe("jobs_total", COUNTER, "Jobs.")
+        metrics.inc("jobs_total", mime="application/pdf")
+        metrics.inc("jobs_total", 2, mime="application/pdf")
+        metrics.inc("jobs_total", mime='text/"quoted"')
+        text = metrics.render()
+        self.assertIn("# TYPE jobs_total counter\n", text)
+        self.assertIn('jobs_total{mime="application/pdf"} 3\n', text)
+        self.assertIn('jobs_total{mime="text/\\"quoted\\""} 1\n', text)
+
+    def test_histogram(self):
+        metrics = Metrics()
+        metrics.describe("seconds", HISTOGRAM, "Seconds.", buckets=(0.1, 1))
+        metrics.observe("seconds", 0.05, phase="tika")
+        metrics.observe("seconds", 0.5, phase="tika")
+        metrics.observe("seconds", 5, phase="tika")
+        text = metrics.render()
+        self.assertIn('seconds_bucket{phase="tika",le="0.1"} 1\n', text)
+        self.assertIn('seconds_bucket{phase="tika",le="1"} 2\n', text)
+        self.assertIn('seconds_bucket{phase="tika",le="+Inf"} 3\n', text)
+        self.assertIn('seconds_count{phase="tika"} 3\n', text)
+        self.assertIn('seconds_sum{phase="tika"} 5.55\n', text)
+
+    def test_job_metrics(self):
+        metrics = create_metrics()
+        job = JobMetrics()
+        with job.phase("unpack"):
+            pass
+        job.add_phase("tika", 0.5)
+        job.add_phase("tika", 0.25)
+        job.mime = "application/pdf"
+        job.outcome = "completed"
+        job.bytes_in = 100
+        job.attachments = 2
+        job.record(metrics)
+        self.assertEqual(job.phases["tika"], 0.75)
+        self.assertEqual(job.as_dict()["outcome"], "completed")
+        text = metrics.render()
+        self.assertIn('tika_plugin_jobs_total{mime="application/pdf",outcome="completed"} 1\n', text)
+        self.assertIn('tika_plugin_bytes_in_total{mime="application/pdf"} 100\n', text)
+        self.assertIn('tika_plugin_phase_seconds_count{mime="application/pdf",phase="tika"} 1\n', text)
+        self.assertIn('tika_plugin_attachments_bucket{mime="application/pdf",le="2"} 1\n', text)
+
+        job = JobMetrics()
+        job.opt_out("preflight_magic")
+        job.record(metrics)
+        self.assertIn('tika_plugin_opt_outs_total{mime="unknown",reason="preflight_magic"} 1\n', metrics.render())
+
+    def test_serve(self):
+        metrics = create_metrics()
+        metrics.set("tika_plugin_in_flight", 3)
+        metrics.serve(0, "127.0.0.1")
+        metrics.serve(0, "127.0.0.1")
+        port = metrics._server.server_port
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:  # nosec B310
+                self.assertIn("tika_plugin_in_flight 3\n", resp.read().decode())
+        finally:
+            metrics._server.shutdown()
+            metrics._server.server_close()
+
+    def test_serve_port_in_use(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            sock.listen()
+            metrics = create_metrics()
+            with self.assertLogs("azul_plugin_tika.metrics", "WARNING"):
+                self.assertFalse(metrics.serve(sock.getsockname()[1], "127.0.0.1"))
+            # the failure is remembered rather than raised again, and metrics are still recorded
+            self.assertFalse(metrics.serve(sock.getsockname()[1], "127.0.0.1"))
+            JobMetrics().record(metrics)
+            self.assertIn("tika_plugin_jobs_total", metrics.render())
@@ -0,0 +1,85 @@
+"""
+Pre-flight Detection Test Suite
+===============================
+Tests local identification of ignored archive types and of text files.
+
+"""
+
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from azul_plugin_tika.preflight import FALLBACK_CHARSET, detect_magic, detect_text
+
+
+def make_zip(*names: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in names:
+            zf.writestr(name, b"data")
+    return buf.getvalue()
+
+
+def detect_content(detector, content: bytes, *args):
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return detector(path, *args)
+    finally:
+        os.remove(path)
+
+
+class TestDetectMagic(unittest.TestCase):
+    def detect(self, content: bytes):
+        return detect_content(detect_magic, content)
+
+    def test_ar(self):
+        self.assertEqual(self.detect(b"!<arch>\nfoo.o/          "), ("application/x-archive", False))
+        self.assertEqual(self.detect(b"!<arch>\ndebian-binary   "), ("application/x-debian-package", False))
+
+    def test_jar_and_apk(self):
+        self.assertEqual(self.detect(make_zip("META-INF/MANIFEST.MF", "a.class")), ("application/java-archive", False))
+        self.assertEqual(
+            self.detect(make_zip("META-INF/MANIFEST.MF", "AndroidManifest.xml", "classes.dex")),
+            ("application/vnd.android.package-archive", False),
+        )
+        self.assertEqual(self.detect(make_zip("META-INF/MANIFEST.MF", "WEB-INF/web.xml")), (None, False))
+
+    def test_other_zip(self):
+        self.assertEqual(self.detect(make_zip("[Content_Types].xml", "word/document.xml")), (None, False))
+
+    def test_truncated_zip(self):
+        self.assertEqual(self.detect(make_zip("META-INF/MANIFEST.MF")[:40]), (None, True))
+
+    def test_not_archive(self):
+        self.assertEqual(self.detect(b"%PDF-1.4"), (None, False))
+        self.assertEqual(self.detect(b""), (None, False))
+
+
+class TestDetectText(unittest.TestCase):
+    def detect(self, content: bytes, sample_bytes: int = 64):
+        return detect_content(detect_text, content, sample_bytes)
+
+    def test_utf8(self):
+        self.assertEqual(self.detect(b"a,b,c\r\n1,2,3\r\n"), "utf-8")
+        # a character cut at the end of the sample is still utf-8
+        self.assertEqual(self.detect("abc✓".encode(), 5), "utf-8")
+
+    def test_boms(self):
+        self.assertEqual(self.detect("text".encode("utf-8-sig")), "utf-8-sig")
+        self.assertEqual(self.detect("text".encode("utf-16")), "utf-16")
+        self.assertEqual(self.detect("text".encode("utf-32")), "utf-32")
+
+    def test_single_byte(self):
+        self.assertEqual(self.detect("café log".encode("cp1252")), FALLBACK_CHARSET)
+
+    def test_not_text(self):
+        self.assertIsNone(self.detect(b""))
+        self.assertIsNone(self.detect(b"text\x00with nul"))
+        self.assertIsNone(self.detect(b"\x89PNG\r\n\x1a\n\x00\x00"))
+        # occasional control characters are tolerated
+        self.assertEqual(self.detect(b"\x07" + b"log line\n" * 20, 200), "utf-8")
+        self.assertIsNone(self.detect(b"\x01\x02\x03" + b"log line\n" * 20, 200))
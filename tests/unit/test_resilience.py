@@ -0,0 +1,124 @@
+"""
+Resilience Test Suite
+=====================
+Tests retry classification, backoff, retry budgets and the circuit breaker.
+
+"""
+
+import unittest
+from unittest import mock
+
+import requests
+
+from azul_plugin_tika.client import TikaResponseError
+from azul_plugin_tika.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    RetryBudget,
+    is_retryable,
+)
+
+
+def make_resilience(**kwargs) -> Resilience:
+    options = dict(
+        retries=2,
+        base_delay=0.5,
+        max_delay=10,
+        budget_ratio=0.2,
+        breaker=CircuitBreaker(failure_threshold=3, reset_seconds=30),
+    )
+    options.update(kwargs)
+    return Resilience(**options)
+
+
+class TestClassification(unittest.TestCase):
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(requests.ConnectionError()))
+        self.assertTrue(is_retryable(requests.ConnectTimeout()))
+        self.assertTrue(is_retryable(TikaResponseError(503, "Service Unavailable")))
+        self.assertFalse(is_retryable(TikaResponseError(422, "Unprocessable Entity")))
+        self.assertFalse(is_retryable(requests.ReadTimeout()))
+        self.assertFalse(is_retryable(ValueError()))
+
+
+@mock.patch("azul_plugin_tika.resilience.time.sleep")
+class TestResilience(unittest.TestCase):
+    def test_retries_transient_failures(self, sleep):
+        fn = mock.MagicMock(side_effect=[requests.ConnectionError(), {"content": "ok"}])
+        self.assertEqual(make_resilience().call(fn, "path"), {"content": "ok"})
+        self.assertEqual(fn.call_count, 2)
+        sleep.assert_called_once()
+        self.assertLessEqual(sleep.call_args[0][0], 0.5)
+
+    def test_no_retry_of_parse_errors(self, sleep):
+        fn = mock.MagicMock(side_effect=TikaResponseError(422, "Unprocessable Entity"))
+        with self.assertRaises(TikaResponseError):
+            make_resilience().call(fn)
+        self.assertEqual(fn.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_attempt_limit(self, sleep):
+        fn = mock.MagicMock(side_effect=requests.ConnectionError())
+        resilience = make_resilience(breaker=CircuitBreaker(failure_threshold=10, reset_seconds=30))
+        with self.assertRaises(requests.ConnectionError):
+            resilience.call(fn)
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(resilience.retry_count, 2)
+
+    def test_budget(self, sleep):
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_backoff_grows_and_caps(self, sleep):
+        resilience = make_resilience(base_delay=1, max_delay=5)
+        with mock.patch("azul_plugin_tika.resilience.random.uniform", side_effect=lambda a, b: b):
+            self.assertEqual([resilience.backoff(n) for n in range(5)], [1, 2, 4, 5, 5])
+
+    def test_circuit_fails_fast(self, sleep):
+        fn = mock.MagicMock(side_effect=requests.ConnectionError())
+        resilience = make_resilience(retries=0, pause_when_open=False)
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                resilience.call(fn)
+        self.assertEqual(resilience.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            resilience.call(fn)
+        self.assertEqual(fn.call_count, 3)
+
+    def test_circuit_pauses_then_recovers(self, sleep):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30)
+        resilience = make_resilience(retries=0, breaker=breaker)
+        with self.assertRaises(requests.ConnectionError):
+            resilience.call(mock.MagicMock(side_effect=requests.ConnectionError()))
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        def wait(seconds):
+            breaker.opened_at -= seconds
+
+        sleep.side_effect = wait
+        self.assertEqual(resilience.call(mock.MagicMock(return_value="ok")), "ok")
+        sleep.assert_called_once()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_trial_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+        breaker.record_failure()
+        self.assertEqual(breaker.retry_after(), 0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertGreater(breaker.retry_after(), 0)
+        breaker.opened_at -= 30
+        self.assertEqual(breaker.retry_after(), 0)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        # only one trial request at a time
+        self.assertGreater(breaker.retry_after(), 0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(breaker.opens, 2)
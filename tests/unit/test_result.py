@@ -0,0 +1,62 @@
+"""
+Result Model Test Suite
+=======================
+Tests conversion and copying of the results tika extractions are decoded into.
+
+"""
+
+import io
+import json
+import sys
+import unittest
+
+from azul_plugin_tika.result import EmbeddedDocument, TikaResult
+
+
+def make_result() -> TikaResult:
+    return TikaResult(
+        {"Content-Type": "application/zip"},
+        "listing",
+        True,
+        {"doc.doc": b"doc"},
+        duplicates={"doc.doc": ["copy.doc"]},
+        skipped={"max_count": (1, 10)},
+        embedded={"doc.doc": EmbeddedDocument({"dc:creator": "alice"}, "text", nested=True)},
+    )
+
+
+class TestTikaResult(unittest.TestCase):
+    def test_dict_round_trip(self):
+        result = make_result()
+        stored = result.as_dict()
+        self.assertEqual(stored["skipped"], {"max_count": [1, 10]})
+        self.assertEqual(
+            stored["embedded"], {"doc.doc": {"metadata": {"dc:creator": "alice"}, "content": "text", "nested": True}}
+        )
+        self.assertEqual(TikaResult.from_dict(stored), result)
+        # results stored as json, such as by the disk cache, decode to the same result
+        del stored["attachments"]
+        loaded = TikaResult.from_dict(json.loads(json.dumps(stored)))
+        loaded.attachments = result.attachments
+        self.assertEqual(loaded, result)
+        self.assertEqual(TikaResult().as_dict(), {"metadata": {}, "content": "", "attachments": {}})
+
+    def test_interned_keys(self):
+        key = "".join(["custom:", "key"])
+        result = TikaResult.from_dict({"metadata": {key: "value"}})
+        self.assertIs(next(iter(result.metadata)), sys.intern("custom:key"))
+
+    def test_copy(self):
+        result = make_result()
+        copy = result.copy()
+        self.assertEqual(copy, result)
+        del copy.metadata["Content-Type"]
+        copy.attachments.clear()
+        self.assertEqual(result, make_result())
+
+    def test_close(self):
+        spooled = io.BytesIO(b"spooled")
+        result = TikaResult(attachments={"a": b"data", "b": spooled})
+        result.close()
+        self.assertTrue(spooled.closed)
+        self.assertEqual(result.attachments["a"], b"data")
@@ -0,0 +1,95 @@
+"""
+Startup Test Suite
+==================
+Tests waiting for tika to be ready and warming it with the sample files.
+
+"""
+
+import email
+import email.policy
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from azul_plugin_tika.client import TikaClient
+from azul_plugin_tika.startup import SAMPLES, Startup, warmup_files
+from tests.benchmark.mock_tika import MockTikaServer
+
+
+class TestSamples(unittest.TestCase):
+    def test_samples(self):
+        self.assertTrue(SAMPLES["sample.pdf"]().startswith(b"%PDF-1.4"))
+        self.assertTrue(SAMPLES["sample.png"]().startswith(b"\x89PNG"))
+        for name, main_part in (
+            ("sample.docx", "word/document.xml"),
+            ("sample.xlsx", "xl/workbook.xml"),
+            ("sample.zip", "image.png"),
+        ):
+            with zipfile.ZipFile(io.BytesIO(SAMPLES[name]())) as zf:
+                self.assertIsNone(zf.testzip())
+                self.assertIn(main_part, zf.namelist())
+        message = email.message_from_bytes(SAMPLES["sample.eml"](), policy=email.policy.default)
+        self.assertEqual([part.get_filename() for part in message.iter_attachments()], ["image.png"])
+        # identical every time
+        self.assertEqual(SAMPLES["sample.docx"](), SAMPLES["sample.docx"]())
+
+    def test_warmup_files(self):
+        with warmup_files() as paths:
+            self.assertEqual([os.path.basename(p) for p in paths], list(SAMPLES))
+            self.assertTrue(all(os.path.getsize(p) for p in paths))
+        self.assertFalse(os.path.exists(paths[0]))
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ("b.doc", "a.pdf"):
+                with open(os.path.join(directory, name), "wb") as f:
+                    f.write(b"x")
+            os.mkdir(os.path.join(directory, "nested"))
+            with warmup_files(directory) as paths:
+                self.assertEqual(paths, [os.path.join(directory, "a.pdf"), os.path.join(directory, "b.doc")])
+
+
+class TestStartup(unittest.TestCase):
+    def test_waits_then_warms(self):
+        startup = Startup(10, warmup=True, poll_interval=0)
+        ready = mock.Mock(side_effect=[False, False, True])
+        parse = mock.Mock(side_effect=[ValueError("bad file")] + [None] * (len(SAMPLES) - 1))
+        logger = mock.Mock()
+        self.assertTrue(startup.run(ready, parse, logger))
+        self.assertEqual(ready.call_count, 3)
+        self.assertEqual(parse.call_count, len(SAMPLES))
+        self.assertEqual(startup.warmed, len(SAMPLES) - 1)
+        self.assertIsNotNone(startup.ready_seconds)
+        self.assertIsNotNone(startup.warmup_seconds)
+        logger.warning.assert_called_once()
+        # only done once per process
+        self.assertFalse(startup.run(ready, parse, logger))
+        self.assertEqual(ready.call_count, 3)
+
+    def test_not_ready(self):
+        startup = Startup(0.01, warmup=True, poll_interval=0)
+        parse = mock.Mock()
+        logger = mock.Mock()
+        self.assertTrue(startup.run(lambda: False, parse, logger))
+        parse.assert_not_called()
+        self.assertIsNone(startup.ready_seconds)
+        logger.warning.assert_called_once()
+        self.assertTrue(startup.done)
+
+    def test_no_wait(self):
+        startup = Startup(0, warmup=False)
+        ready = mock.Mock()
+        parse = mock.Mock()
+        self.assertTrue(startup.run(ready, parse, mock.Mock()))
+        ready.assert_not_called()
+        parse.assert_not_called()
+
+    def test_client_ready(self):
+        with MockTikaServer() as server:
+            client = TikaClient(f"http://127.0.0.1:1,{server.url}")
+            self.assertTrue(client.ready())
+            self.assertEqual(server.requests["/version"], 1)
+            # probes don't count against the servers
+            self.assertEqual(client.endpoints.live(), 2)
+        self.assertFalse(TikaClient("http://127.0.0.1:1", connect_timeout=1).ready())
@@ -0,0 +1,170 @@
+"""
+Tika Supervisor Test Suite
+==========================
+Tests running local servers and restarting them, with the mock tika server standing in for tika.
+
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from azul_plugin_tika.endpoints import EndpointPool
+from azul_plugin_tika.supervisor import (
+    DOCUMENTS,
+    EXITED,
+    MEMORY,
+    TikaSupervisor,
+    resident_bytes,
+)
+
+REPO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MockSupervisor(TikaSupervisor):
+    """Supervisor running the mock tika server instead of a jar."""
+
+    def command(self, process):
+        return [sys.executable, "-m", "tests.benchmark.mock_tika", "--port", str(process.port)]
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = MockSupervisor("tika-server.jar", port=free_port(), probe_interval=0.05, max_backoff=0)
+        self.process = self.supervisor.processes[0]
+        self.pool = EndpointPool(self.supervisor.urls)
+        cwd = os.getcwd()
+        os.chdir(REPO)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(self.supervisor.stop)
+
+    def wait_ready(self):
+        deadline = time.monotonic() + 10
+        while not self.process.ready:
+            self.assertLess(time.monotonic(), deadline, "server did not start")
+            self.supervisor.check(self.process)
+            time.sleep(0.05)
+
+    def test_command(self):
+        supervisor = TikaSupervisor("/opt/tika.jar", processes=2, port=9000, heap="2g", server_args=("-noFork",))
+        # with a spare port for replacements
+        self.assertEqual(supervisor.urls, ["http://127.0.0.1:9000", "http://127.0.0.1:9001", "http://127.0.0.1:9002"])
+        self.assertEqual(
+            supervisor.command(supervisor.processes[1]),
+            [
+                "java",
+                "-Xmx2g",
+                "-XX:+ExitOnOutOfMemoryError",
+                "-jar",
+                "/opt/tika.jar",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                "9001",
+                "-noFork",
+            ],
+        )
+
+    def test_held_until_ready(self):
+        self.supervisor._launch(self.process)
+        self.supervisor.attach(self.pool)
+        self.assertEqual(self.pool.live(), 0)
+        self.wait_ready()
+        self.assertEqual(self.pool.live(), 1)
+        self.assertEqual(self.supervisor.live(), 1)
+
+    def test_restart_when_exited(self):
+        self.supervisor._launch(self.process)
+        self.supervisor.attach(self.pool)
+        self.wait_ready()
+        first = self.process.popen
+        first.kill()
+        first.wait()
+        self.supervisor.check(self.process)
+        self.assertEqual(self.supervisor.restarts, {EXITED: 1})
+        self.assertIsNot(self.process.popen, first)
+        self.assertEqual(self.pool.live(), 0)
+        self.wait_ready()
+        self.assertEqual(self.pool.live(), 1)
+
+    def test_recycle_after_documents(self):
+        self.supervisor.max_documents = 10
+        self.supervisor._launch(self.process)
+        self.supervisor.attach(self.pool)
+        self.wait_ready()
+        self.pool.get(self.process.url).requests = 9
+        self.supervisor.check(self.process)
+        self.assertEqual(self.supervisor.restarts, {})
+        self.pool.get(self.process.url).requests = 10
+        self.supervisor.check(self.process)
+        self.assertEqual(self.supervisor.restarts, {DOCUMENTS: 1})
+        # the replacement on the spare port was serving before the old server stopped
+        replacement = self.supervisor.processes[0]
+        self.assertEqual(replacement.port, self.process.port + 1)
+        self.assertTrue(replacement.ready)
+        self.assertIsNotNone(self.process.popen.poll())
+        self.assertEqual(self.supervisor.spare_port, self.process.port)
+        self.assertEqual(self.pool.acquire().url, replacement.url)
+        self.assertEqual(self.pool.live(), 1)
+        # counted from the replacement's start
+        self.assertEqual(replacement.served_at_start, 0)
+
+    def test_recycle_on_memory(self):
+        self.supervisor.max_rss = 1024
+        self.supervisor._launch(self.process)
+        self.wait_ready()
+        with mock.patch("azul_plugin_tika.supervisor.resident_bytes", return_value=2048):
+            self.supervisor.check(self.process)
+        self.assertEqual(self.supervisor.restarts, {MEMORY: 1})
+        self.assertIsNot(self.supervisor.processes[0], self.process)
+
+    def test_failed_replacement_keeps_serving(self):
+        self.supervisor.max_documents = 10
+        self.supervisor._launch(self.process)
+        self.supervisor.attach(self.pool)
+        self.wait_ready()
+        self.pool.get(self.process.url).requests = 10
+        command = self.supervisor.command
+        with mock.patch.object(
+            self.supervisor,
+            "command",
+            side_effect=lambda p: [sys.executable, "-c", "pass"] if p is not self.process else command(p),
+        ):
+            self.supervisor.check(self.process)
+            self.assertEqual(self.supervisor.restarts, {})
+            self.assertIs(self.supervisor.processes[0], self.process)
+            self.assertIsNone(self.process.popen.poll())
+            self.assertEqual(self.pool.acquire().url, self.process.url)
+            # not tried again straight away
+            self.supervisor.check(self.process)
+            self.assertEqual(self.supervisor.command.call_count, 1)
+
+    def test_instance_ports(self):
+        with tempfile.TemporaryDirectory() as lock_dir:
+            first = TikaSupervisor("/opt/tika.jar", processes=2, port=9000, lock_dir=lock_dir)
+            second = TikaSupervisor("/opt/tika.jar", processes=2, port=9000, lock_dir=lock_dir)
+            self.assertEqual((first.instance, second.instance), (0, 1))
+            self.assertEqual([p.port for p in second.processes], [9003, 9004])
+            self.assertEqual(second.spare_port, 9005)
+            # a port range is free again once the supervisor holding it is gone
+            os.close(first._instance_lock)
+            third = TikaSupervisor("/opt/tika.jar", processes=2, port=9000, lock_dir=lock_dir)
+            self.assertEqual(third.instance, 0)
+            os.close(second._instance_lock)
+            os.close(third._instance_lock)
+
+    def test_resident_bytes(self):
+        if sys.platform != "linux":
+            self.skipTest("reads /proc")
+        self.assertGreater(resident_bytes(os.getpid()), 0)
+        self.assertIsNone(resident_bytes(2**22 + 1))
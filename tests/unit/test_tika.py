@@ -5,8 +5,10 @@ Tests the tika plugin against different file types.
 
 """
 
+import hashlib
 from unittest import mock
 
+import requests
 from azul_runner import (
     FV,
     Event,
@@ -17,11 +19,13 @@ from azul_runner import (
     test_template,
 )
 
+from azul_plugin_tika import main
 from azul_plugin_tika.main import AzulPluginTika
+from azul_plugin_tika.result import TikaResult
 
 
 def mock_malicious_pdf(*args, **kwargs):
-    return MALDOC_RESPONSE
+    return TikaResult.from_dict(MALDOC_RESPONSE)
 
 
 def mock_bad_content(*args, **kwargs):
@@ -29,35 +33,84 @@ def mock_bad_content(*args, **kwargs):
 
 
 def mock_apk_content(*args, **kwargs):
-    return {
-        "metadata": {
-            "Content-Type": "application/vnd.android.package-archive",
-            "Foo": "bar",
-        },
-    }
+    return TikaResult.from_dict(
+        {
+            "metadata": {
+                "Content-Type": "application/vnd.android.package-archive",
+                "Foo": "bar",
+            },
+        }
+    )
 
 
 def mock_xarchive_content(*args, **kwargs):
-    return {
-        "metadata": {
-            "Content-Type": "application/x-archive",
-            "Foo": "bar",
-        },
-    }
+    return TikaResult.from_dict(
+        {
+            "metadata": {
+                "Content-Type": "application/x-archive",
+                "Foo": "bar",
+            },
+        }
+    )
+
+
+def mock_text_meta(*args, **kwargs):
+    return {"Content-Type": "text/plain; charset=UTF-8", "X-TIKA:detectedEncoding": "UTF-8"}
+
+
+def mock_html_meta(*args, **kwargs):
+    return {"Content-Type": "text/html; charset=UTF-8"}
 
 
 def mock_encrypted_zip_content(*args, **kwargs):
-    return TEST_ENCRYPTED_ZIP_DATA
+    return TikaResult.from_dict(TEST_ENCRYPTED_ZIP_DATA)
+
+
+def mock_rmeta_content(*args, **kwargs):
+    return TikaResult.from_dict(
+        {
+            "metadata": {"Content-Type": "application/zip"},
+            "content": "",
+            "attachments": {"doc.doc": b"doc bytes"},
+            "embedded": {
+                "doc.doc": {
+                    "metadata": {
+                        "Content-Type": "application/msword",
+                        "resourceName": "doc.doc",
+                        "dc:creator": "alice",
+                    },
+                    "content": "document text",
+                    "nested": False,
+                }
+            },
+        }
+    )
+
+
+def mock_duplicate_attachments(*args, **kwargs):
+    return TikaResult.from_dict(
+        {
+            "metadata": {"Content-Type": "message/rfc822"},
+            "content": "",
+            "attachments": {"logo.png": b"logo"},
+            "duplicates": {"logo.png": ["image002.png", "image003.png"]},
+        }
+    )
 
 
 def mock_png_content(*args, **kwargs):
-    return TEST_PNG_RESPONSE_DATA
+    return TikaResult.from_dict(TEST_PNG_RESPONSE_DATA)
 
 
 class TestTika(test_template.TestPlugin):
     PLUGIN_TO_TEST = AzulPluginTika
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_malicious_pdf)
+    def setUp(self):
+        super().setUp()
+        # clients and caches are shared per process, so each test starts without those of earlier tests
+        main._shared_objects.clear()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_malicious_pdf)
     def test_on_malicious_pdf(self, mock_unpack):
         """Test execute on pdf doc for metadata and augmented doc extraction."""
 
@@ -156,7 +209,7 @@ class TestTika(test_template.TestPlugin):
             ),
         )
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_encrypted_zip_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_encrypted_zip_content)
     def test_encrypted_zip(self, mock_unpack):
         """Test an encrypted zip file can be identified."""
         result = self.do_execution(
@@ -195,7 +248,7 @@ class TestTika(test_template.TestPlugin):
             ),
         )
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_png_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_png_content)
     def test_png_raw_content_exception(self, mock_unpack):
         """Tests a stream exception can be handled and the bad metadata removed metadata too long causing errors.
 
@@ -358,7 +411,7 @@ class TestTika(test_template.TestPlugin):
             ),
         )
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_bad_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_bad_content)
     def test_on_corrupted_zip(self, mock_unpack):
         """Test executing on corrupt file does not cause errors."""
         result = self.do_execution(
@@ -375,7 +428,7 @@ class TestTika(test_template.TestPlugin):
         )
         self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_apk_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_apk_content)
     def test_on_apk(self, mock_unpack):
         """Test skipping blacklisted content types."""
         result = self.do_execution(
@@ -392,7 +445,7 @@ class TestTika(test_template.TestPlugin):
         )
         self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
 
-    @mock.patch("tika.unpack.from_file", side_effect=mock_apk_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_apk_content)
     def test_xarchive(self, mock_unpack):
         """Test opt-out on unknown archive file."""
         result = self.do_execution(
@@ -409,6 +462,259 @@ class TestTika(test_template.TestPlugin):
         )
         self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
 
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_xarchive_content)
+    def test_preflight_skips_unpack(self, mock_unpack):
+        """Test ignored types found by the pre-flight check are never sent to tika."""
+        result = self.do_execution(
+            data_in=[("content", b"!<arch>\nfoo.o/          0           0     0     644     4         `\ntest")],
+            no_multiprocessing=True,
+        )
+        self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
+        mock_unpack.assert_not_called()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_xarchive_content)
+    def test_preflight_dispatcher_mime(self, mock_unpack):
+        """Test ignored types identified by the dispatcher are opted out before any local checks."""
+        with mock.patch("azul_plugin_tika.main.detect_magic") as mock_magic:
+            result = self.do_execution(
+                data_in=[("content", b"not obviously a jar")],
+                entity_attrs={"mime": "application/java-archive"},
+                no_multiprocessing=True,
+            )
+        self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
+        mock_magic.assert_not_called()
+        mock_unpack.assert_not_called()
+
+    @mock.patch("azul_plugin_tika.main.AzulPluginTika.supervisor", new_callable=mock.PropertyMock, return_value=None)
+    @mock.patch("azul_plugin_tika.main.Startup.run", autospec=True)
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_bad_content)
+    def test_supervisor_waits_for_ready(self, mock_unpack, mock_run, mock_supervisor):
+        """Test the first job waits for local tika servers to start without a tika_ready_timeout."""
+        config = {"tika_supervisor_jar": "/opt/tika.jar", "tika_supervisor_startup_timeout": 30}
+        self.do_execution(data_in=[("content", b"first job")], config=config, no_multiprocessing=True)
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args[0][0].ready_timeout, 30)
+
+        mock_run.reset_mock()
+        self.do_execution(data_in=[("content", b"first job")], no_multiprocessing=True)
+        mock_run.assert_not_called()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=requests.ReadTimeout())
+    def test_parse_timeout(self, mock_unpack):
+        """Test files tika can't parse within their timeout are labelled distinctly."""
+        result = self.do_execution(data_in=[("content", b"slow to parse")], no_multiprocessing=True)
+        self.assertEqual(result.state.label, State.Label.ERROR_EXCEPTION)
+        self.assertEqual(result.state.failure_name, "Tika Parse Timeout")
+        self.assertEqual(mock_unpack.call_count, 1)
+        self.assertIn("read_timeout", mock_unpack.call_args[1])
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_bad_content)
+    def test_large_file_lane(self, mock_unpack):
+        """Test large files wait for tika in their own concurrency lane."""
+        self.do_execution(data_in=[("content", b"small file")], no_multiprocessing=True)
+        self.assertIsNone(mock_unpack.call_args[1]["lane"])
+        self.do_execution(
+            data_in=[("content", b"large file" * 10)], config={"tika_large_size": 100}, no_multiprocessing=True
+        )
+        self.assertEqual(mock_unpack.call_args[1]["lane"], "large")
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_apk_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.meta", side_effect=mock_text_meta)
+    def test_text_fast_path(self, mock_meta, mock_unpack):
+        """Test large text files are decoded locally with only their metadata from tika."""
+        content = "2024-01-01 12:00:00 INFO ok \u2713\n".encode() * 10
+        result = self.do_execution(
+            data_in=[("content", content)],
+            config={"text_fast_path_size": 100, "text_fast_path_bytes": 64},
+            no_multiprocessing=True,
+        )
+        self.assertEqual(result.state, State(State.Label.COMPLETED))
+        mock_unpack.assert_not_called()
+        self.assertEqual(mock_meta.call_args[1]["max_bytes"], 64)
+        self.assertIn(hashlib.sha256(content.strip()).hexdigest(), result.data)
+        self.assertEqual(result.events[0].features["mime"], [FV("text/plain; charset=UTF-8")])
+
+        # small text files and binary files are unpacked by tika as usual
+        mock_meta.reset_mock()
+        self.do_execution(data_in=[("content", content)], no_multiprocessing=True)
+        mock_unpack.assert_called()
+        mock_unpack.reset_mock()
+        self.do_execution(
+            data_in=[("content", b"\x00\x01binary" * 20)], config={"text_fast_path_size": 100}, no_multiprocessing=True
+        )
+        mock_unpack.assert_called()
+        mock_meta.assert_not_called()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_apk_content)
+    @mock.patch("azul_plugin_tika.client.TikaClient.meta", side_effect=mock_html_meta)
+    def test_text_fast_path_markup(self, mock_meta, mock_unpack):
+        """Test text files tika reports as markup are still extracted by tika."""
+        self.do_execution(
+            data_in=[("content", b"<html><body>text</body></html>" * 10)],
+            config={"text_fast_path_size": 100},
+            no_multiprocessing=True,
+        )
+        self.assertEqual(mock_meta.call_count, 1)
+        self.assertEqual(mock_unpack.call_count, 1)
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack_rmeta", side_effect=mock_rmeta_content)
+    def test_rmeta_child_metadata(self, mock_unpack_rmeta):
+        """Test attachments get the metadata tika extracted while parsing the parent in rmeta mode."""
+        result = self.do_execution(
+            data_in=[("content", b"rmeta container")],
+            config={"extract_mode": "rmeta"},
+            no_multiprocessing=True,
+        )
+        self.assertJobResult(
+            result,
+            JobResult(
+                state=State(State.Label.COMPLETED),
+                events=[
+                    Event(
+                        sha256="881b5a9ed58bef69d921256314eacdfc16932c34ae7a912a3323e4762353b746",
+                        features={"mime": [FV("application/zip")]},
+                    ),
+                    Event(
+                        sha256="bb287ea880c57de87e53444723f45046b3ad9a1495c76ed8c4714430fd2678fe",
+                        parent=EventParent(sha256="881b5a9ed58bef69d921256314eacdfc16932c34ae7a912a3323e4762353b746"),
+                        relationship={"action": "extracted"},
+                        data=[
+                            EventData(
+                                hash="bb287ea880c57de87e53444723f45046b3ad9a1495c76ed8c4714430fd2678fe",
+                                label="content",
+                            )
+                        ],
+                        features={
+                            "file_metadata": [FV("alice", label="dc:creator")],
+                            "filename": [FV("doc.doc")],
+                            "mime": [FV("application/msword")],
+                        },
+                    ),
+                ],
+                data={"bb287ea880c57de87e53444723f45046b3ad9a1495c76ed8c4714430fd2678fe": b""},
+            ),
+        )
+
+    @mock.patch(
+        "azul_plugin_tika.client.TikaClient.unpack",
+        return_value=TikaResult({"Content-Type": "application/pdf", "Author": "alice", "X-Parsed-By": "PDFParser"}),
+    )
+    def test_metadata_settings(self, mock_unpack):
+        """Test metadata keeps its labels unless aliases are set, and the Content-Type is only featured as mime."""
+        result = self.do_execution(
+            data_in=[("content", b"metadata")], config={"metadata_drop": []}, no_multiprocessing=True
+        )
+        self.assertEqual(
+            result.events[0].features["file_metadata"],
+            [FV("alice", label="Author"), FV("PDFParser", label="X-Parsed-By")],
+        )
+        self.assertEqual(result.events[0].features["mime"], [FV("application/pdf")])
+        result = self.do_execution(
+            data_in=[("content", b"metadata")],
+            config={"metadata_aliases": ["Author=dc:creator"]},
+            no_multiprocessing=True,
+        )
+        self.assertEqual(result.events[0].features["file_metadata"], [FV("alice", label="dc:creator")])
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.version", return_value="Apache Tika 3.2.3")
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_bad_content)
+    def test_negative_cache(self, mock_unpack, mock_version):
+        """Test files tika had nothing to say about get the same outcome again without calling tika."""
+        config = {"negative_cache_ttl": 3600}
+        for _ in range(3):
+            result = self.do_execution(data_in=[("content", b"unsupported")], config=config, no_multiprocessing=True)
+            self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
+        self.assertEqual(mock_unpack.call_count, 1)
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.version", return_value="Apache Tika 3.2.3")
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=requests.ReadTimeout())
+    def test_negative_cache_timeout(self, mock_unpack, mock_version):
+        """Test files that timed out are labelled as parse timeouts again without calling tika."""
+        config = {"negative_cache_ttl": 3600}
+        for _ in range(2):
+            result = self.do_execution(data_in=[("content", b"slow to parse")], config=config, no_multiprocessing=True)
+            self.assertEqual(result.state.failure_name, "Tika Parse Timeout")
+        self.assertEqual(mock_unpack.call_count, 1)
+
+    def test_shared_result_outside_lock(self):
+        """Test slow shared values, like the tika version, are fetched without blocking other shared objects."""
+        fetch = mock.Mock(side_effect=lambda: main._shared_lock.locked())
+        self.assertIs(main._shared_result(fetch), False)
+        self.assertIs(main._shared_result(fetch), False)
+        fetch.assert_called_once()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.version", side_effect=requests.ConnectionError())
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_bad_content)
+    def test_unknown_version_bypasses_caches(self, mock_unpack, mock_version):
+        """Test jobs still run, without the caches, when tika can't be asked for its version."""
+        config = {"result_cache": "memory", "negative_cache_ttl": 3600, "tika_retries": 0}
+        for _ in range(2):
+            mock_unpack.reset_mock()
+            result = self.do_execution(data_in=[("content", b"unsupported")], config=config, no_multiprocessing=True)
+            self.assertJobResult(result, JobResult(state=State(State.Label.OPT_OUT)))
+            # the failure isn't remembered, so the resubmission goes to tika again
+            mock_unpack.assert_called()
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.version", return_value="Apache Tika 3.2.3")
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack_rmeta", side_effect=mock_rmeta_content)
+    def test_rmeta_seeds_child_results(self, mock_unpack_rmeta, mock_version):
+        """Test attachments parsed along with their parent are answered from the result cache."""
+        config = {"extract_mode": "rmeta", "result_cache": "memory"}
+        self.do_execution(data_in=[("content", b"rmeta container")], config=config, no_multiprocessing=True)
+        result = self.do_execution(data_in=[("content", b"doc bytes")], config=config, no_multiprocessing=True)
+        self.assertEqual(mock_unpack_rmeta.call_count, 1)
+        self.assertEqual(result.state.label, State.Label.COMPLETED)
+        self.assertEqual(result.events[0].features["mime"], [FV("application/msword")])
+        self.assertEqual(result.events[0].features["file_metadata"], [FV("alice", label="dc:creator")])
+        self.assertIn(hashlib.sha256(b"document text").hexdigest(), result.data)
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack", side_effect=mock_duplicate_attachments)
+    def test_duplicate_attachments(self, mock_unpack):
+        """Test identical attachments are emitted once with all of their names."""
+        result = self.do_execution(data_in=[("content", b"email with logos")], no_multiprocessing=True)
+        self.assertJobResult(
+            result,
+            JobResult(
+                state=State(State.Label.COMPLETED),
+                events=[
+                    Event(
+                        sha256="33314cd67ac35c849c880480d4e4e0317bd6247ceb44788b724f22c91d6e485c",
+                        features={"mime": [FV("message/rfc822")]},
+                    ),
+                    Event(
+                        sha256="3598ce6f965b2481fe26316c06b30950c46ac7f8e7229f104aa78f579997668d",
+                        parent=EventParent(sha256="33314cd67ac35c849c880480d4e4e0317bd6247ceb44788b724f22c91d6e485c"),
+                        relationship={"action": "extracted"},
+                        data=[
+                            EventData(
+                                hash="3598ce6f965b2481fe26316c06b30950c46ac7f8e7229f104aa78f579997668d",
+                                label="content",
+                            )
+                        ],
+                        features={"filename": [FV("image002.png"), FV("image003.png"), FV("logo.png")]},
+                    ),
+                ],
+                data={"3598ce6f965b2481fe26316c06b30950c46ac7f8e7229f104aa78f579997668d": b""},
+            ),
+        )
+
+    @mock.patch("azul_plugin_tika.client.TikaClient.unpack")
+    def test_skipped_attachments(self, mock_unpack):
+        """Test attachments left out by the per job limits are summarised."""
+        mock_unpack.return_value = TikaResult(
+            {"Content-Type": "application/zip"}, skipped={"max_count": (2, 20), "max_ratio": (1, 5000)}
+        )
+        result = self.do_execution(
+            data_in=[("content", b"zip bomb")], config={"max_children": 5}, no_multiprocessing=True
+        )
+        self.assertEqual(
+            result.events[0].features["skipped_attachments"],
+            [FV("1 attachments (5000 bytes)", label="max_ratio"), FV("2 attachments (20 bytes)", label="max_count")],
+        )
+        limits = mock_unpack.call_args[1]["limits"]
+        self.assertEqual(limits.max_count, 5)
+        self.assertEqual(limits.input_size, len(b"zip bomb"))
+
 
 MALDOC_RESPONSE = {
     "content": "\n \n\n                               1 / 4\n\nhttp://somesatog.blo.gg/2021/march/orca-3d-download-crack.html#ONn=ebYCWfwtGugDH1wA0XwvX4coUqdiYvgzH9gBUD3B==\nhttp://somesatog.blo.gg/2021/march/orca-3d-download-crack.html#ONn=ebYCWfwtGugDH1wA0XwvX4coUqdiYvgzH9gBUD3B==\n\n\n \n\nUltimate Maps Downloader 4.8.1\n\nDownload online maps as tiles and convert them to high-quality image files. ... 4.8.1. Ultimate Maps Downloader. Download map\nimagery, topographic and road .... Version 4.8.1. Fix Conflict with Elementor tabs, ... Fix Conflict with SEO Ultimate plugin and\nbootstrap theme. Version 3.9.2. Fix AJAX dynamic .... Download Ultimate Maps Downloader for Windows to download maps\nfrom Google Maps, Yahoo Maps, Bing Maps, or OpenStreet Maps.. Ultimate Maps Downloader 4.8.1 is free to download from\nour software library. The following versions: 4.8, 4.7 and 4.6 are the most frequently .... Ultimate Maps Downloader افزار نرم یک\nMaps Ultimate .... نقشه برداری حرفه ای و دقیق برای دانلود تصاویر ماهواره ای، نقشه های توپوگرافی و جاده ای از ارائه دهندگان آنلاین مختلف مانند\nDownloader is a detailed mapping software that allows you to download map imagery, topographic and road ... 4.8.1 (See all)..\nAlso Download: Stardock Groupy With Crack (Latest) Stardock WindowFX Full ... DC 2019.012.20040 With Crack Next\nArticle Ultimate Maps Downloader 4.8.1 .... Ultimate Maps Downloader is a detailed mapping software that allows you to\ndownload map imagery, topographic and road maps from various .... Ultimate Maps Downloader 4.8.1 | File size: 56 MB\nUltimate Maps Downloader is a detailed mapping software that allows you to download map ...\n\nDownload VMWARE VCENTER SERVER V5.5.0A-MAGNiTUDE torrent or any ... Vmware ... Ultimate Maps Downloader\n4.8.1 · Dhoom 3 Video .... Download Google Maps, Bing and Yahoo Maps Downloader 4.8.1 Software Ultimate. Ultimate Maps\nDownloader is a mapping application which allows you .... Ultimate Maps Downloader is a reliable mapping application that\nhelps you download map imagery, topographic and road maps from various .... Download offline/online game unlimited mod\napk for Android with HappyMod. Safe, fast and ... Modify unlock all characters, items, maps! New unlock ... Download Rope\nHero: Vice Town V4.8.2 (MOD, Unlimited Money) Mod Apk 4.8.1. Naxeex .... Ultimate Maps Downloader 4.8.1 | 56.1 Mb\nUltimate Maps Downloader is a detailed mapping software that allows you to download map imagery, topographic .... Ultimate\nMaps Downloader 4.8.1 + Activator | 53.53 MB Information: Ultimate Maps Downloader is a detailed mapping software that\nallows you to download ...\n\nultimate maps downloader\n\nultimate maps, ultimate maps downloader, ultimate maps by supsystic wordpress, ultimate maps downloader 4.8.1 crack,\nultimate maps downloader 3.0.1 crack, ultimate maps kit, ultimate maps downloader free download, ultimate maps downloader\n3.0.1, ultimate maps downloader 4.8.1 key, ultimate maps downloader 4.7.2 registration key\n\nUltimate Maps Downloader 4.8.1 Ultimate Maps Downloader 4.8.1 Ultimate Maps Downloader is a detailed mapping software\nthat allows you .... You can find below a few links to other Ultimate Maps Downloader versions: 4.8.1 4.7.2 4.8.0 4.7.1 4.1.0.\nOne of the best SIMPLE action to .... Ultimate Maps Downloader – is a detailed mapping software that allows you to download\nmap imagery, topographic and road maps from various map servers.. app by Lizard Labs crack by me Patched Files (1): Code:-\nUltimate Maps Downloader.exe | 1.44mb Virustotal Scan (Patch File Only) Download .... Ultimate Maps Downloader is a\ndetailed mapping software that allows you to download map imagery, topographic and road maps from various map servers..\nUltimate Maps Downloader | How To DownLoad High Resolution Image. 8,784 views8.7K views. • May 23, 2017.. Main\nnavigation. Menu. Home · Download · News · Online Help · Resources · RSS · Donate · Author. What is Notepad++. Notepad++\nis a free (as in “free .... Ultimate Maps Downloader 4.8.0 | 56.1 MbUltimate Maps Downloader is a detailed mapping software\nthat allows you to download map imagery, topographic .... Maxi 247 Rika > DOWNLOAD. lilya rika maxi dressrikarda maxi\nruha 8ba239ed26 Maxi-247,,,08,,,BridalSP, ... Ultimate Maps Downloader 4.8.1. Ultimate Maps\nDownloader可以非常轻松的从各种地图服务器下载到最新最全面的地图图像和道路地图，这样就可以方便离线进行使用，非常方便 ...\n\nultimate maps downloader 4.8.1 crack\n\nUltimate Maps Downloader is a reliable mapping application that helps you download map imagery, topographic and road maps\nfrom various .... Ultimate Maps Downloader is a detailed mapping software that allows you to download map imagery,\ntopographic and road maps from various map servers.. Ultimate Maps Downloader - Ultimate Maps Downloader can download\nsatellite imagery, topographic and road maps from various map servers. Ready for use it .... Ultimate Maps Downloader is a\n\n                               2 / 4\n\n\n\n \n\ndetailed mapping software that allows you to download map imagery, topographic and road maps from various .... Ultimate\nMaps Downloader 4.8.1 · Software 1年前(2019-08-24) 0评论. Ultimate Maps\nDownloader是一款非常专业的世界地图下载软件，有了这款软件，我们就 ...\n\nultimate maps kit\n\nTo do so, you'll have to complete a series of missions. Like Grand Theft Auto series, the fact that your character can freely roam\nacross the map is a key feature of .... المنتدى في للتسجيل الحاجة دون اعلاناتكم كتابة ميزة فتح تم رغباتكم تلبية في منا رغبة : سارة بشرى\nMaps Ultimate .4.8.1 نسخة كاملة Downloader Maps Ultimate علماً ان هذه الميزة تجريبيه ،،،. لتفعيل العضوية الخاصة بكم .... تحميل برنامج\nDownloader صور تنزيل على يساعدك به موثوق خرائط رسم تطبيق هو .... Ultimate Maps Downloader Crack : is a detailed mapping\nsoftware that allows you to download map imagery, topographic and road maps from.. Ultimate Maps Downloader 4.8.1 | 56.1\nMb Ultimate Maps Downloader is a detailed mapping software that allows you to download map imagery, topographic ....\nUltimate Maps Downloader 4.8.1 | 56.1 Mb Ultimate Maps Downloader is a detailed mapping software that allows you to map\nimagery, .... Ultimate Maps\nDownloader是一款面向世界高清地图资源的地图下载器，可以帮助用户轻松下载地图图像、道路地图等资源，迅速了解地图情况~还能实现离线浏览 .... Ultimate Maps\nDownloader is a professional software application whose purpose is to help you download satellite imagery, topographic and ....\nDownload Ultimate Maps Downloader 4 ✅ Software detailed mapping allows you to download map images, maps terrain and\nroads from the map server other.. Ultimate Maps Downloader 4.8.1 [Latest]. Download Ultimate Maps Downloader. Ultimate\nMaps Downloader is a detailed mapping software .... Download Ultimate Maps Downloader 4.0 free - Top4Download.com\noffers free software downloads for Windows, Mac, iOS and Android computers and mobile ....\nhttps://pixhost.icu/avaxhome/92/75/006a7592_medium.jpg Ultimate Maps Downloader 4.8.1 | 56.1 Mb Ultimate Maps\nDownloader is a detailed mapping .... برنامج تحميل Ultimate Maps Downloader 4.8.1 كاملة نسخة Ultimate Maps Downloader هو\nShare .E19 | 2020 ,12th June .4.8.1 Downloader Maps Ultimate .... تطبيق رسم خرائط موثوق به يساعدك على تنزيل صور الخرائط ، والخرائط\nEmbed Recast Subscribe .... افزار نرم با یاهو و بینگ ، گوگل های نقشه دانلود Ultimate Maps Downloader 4.8.1. 09 گوناگون .1392 دی »\nDownloader Maps Ultimate Mb 56.1 | 4.8.1 Downloader Maps Ultimate .... 46273. دانلود نقشه های گوگل ، بینگ .admin .ابزارهای مفید\nis a detailed mapping software that allows you to download map .... الخرائط صور تنزيل برنامج Ultimate Maps Downloader v.4.8.1\n-地図-ソフトウェアの詳細なマッピングがダウンロードできる地図画像 Downloader Maps Ultimate ..قســم برامـج الكمبيوتر العـامـة\n地形や道路からの地図サーバーその他.. It is an application that one can use to download maps from Google, Yahoo and Microsoft. The user\ninterface of this application is very simple and .... Ultimate Maps Downloader. 4.8.1. Ultimate Maps Downloader. Download map\nimagery, topographic and road maps from various map servers. Offline Map .... Ghost1980 · Aug 24, 2019. Replies: 0. Views:\n83. Aug 24, 2019 · Ghost1980 · Ghost1980. B · App Windows Ultimate Maps Downloader 4.8.1 · BaDshaH · Aug 24 ....\nUltimate Maps Downloader 4.8.1. Ultimate Maps Downloader. В свет вышла новая версия профессиональной программы\nUltimate Maps .... Ultimate Maps Downloader 4.8.1 | 56.1 Mb Ultimate Maps Downloader is a detailed mapping software that\nallows you to download map .... Ultimate Maps Downloader 4.8.1 | 56.1 Mb Ultimate Maps Downloader is a detailed mapping\nsoftware that allows you to download map .... Microsoft released the final version of the Microsoft .NET Framework 4.8 on\nApril 18, 2019; links to offline installer and web installer are .... Ultimate Maps Downloader is a detailed mapping software that\nallows you to download map imagery, topographic and road maps from various .... Ultimate Maps Downloader 4.8.1 | 56.1\nMbUltimate Maps Downloader is a detailed mapping software that allows you to download map .... Tải phiên bản 4.8.1 phần mềm\nUltimate Maps Downloader - Tải về bản đồ vệ tinh.. Togetherwithsocialscienceclass10pdfdownload DOWNLOAD\nTogetherwithsocialscienceclass10pdfdownload . ... Sonic Dash 4.8.1 Apk Mod Money,Unlocked,Rings for android ... Ultimate\nMaps Downloader Crack Keygen.zip.. Universal Maps Downloader Keygen : is a powerful application that helps you get small\ntile images from Google Maps, Bing Maps, OpenStreet .... µTorrent is the official BitTorrent android torrent downloader. Enjoy\nawesome torrent downloading experience with no download speed or size .... Ultimate Maps\nDownloader破解版是一款简单好用的世界地图下载软件，使用可帮助用户快速从各种地图服务器上下载你需要的地图图像、地形图 .... Ultimate Maps Downloader is a\ndetailed mapping software that allows you to download both satellite imagery, topographic and road maps from Google Maps, ....\nRoot Explorer is the ultimate file manager for root users. Access the whole of android's file system (including the elusive data\nfolder!). Characteristics include .... Ultimate Maps Downloader 4.8.1\n一款非常專業的世界地圖下載軟件UltimateMapsDownloader是一款非常專業的世界地圖下載軟件，有了這款軟件，我們就可以 .... Ultimate Maps Downloader est\nun gestionnaire de téléchargements spécialisé dans le transfert des cartes ou des images par satellite sur la Toile. Il est facile à ....\nUltimate Maps Downloader. 4.8.1. Ultimate Maps Downloader. Download map imagery, topographic and road maps from\nvarious map servers. Wallpaper .... Ultimate Maps Downloader - Télécharger la dernière version, sans SMS | Obtenez les\ndernières versions de vos programmes.. This tool detects and tries to fix some frequently occurring issues with the setup of\nMicrosoft .NET Framework or with updates to the Microsoft .. Ultimate Maps Downloader. 4.8.1. 53 MO. موثوق خرائط تطبيق هو\n.portable 4.8.1 Downloader Maps Ultimate ..يساعدك على تنزيل صور الخرائط والخرائط الطبوغرافية وخرائط الطرق من. خوادم الخرائط المختلفة\nРазмер: 53.62 MB Сборки сделаны на VMware ThinApp Enterprise 5.2.5-12316299.. Universal Maps Downloader افزار نرم\n\n                               3 / 4\n\n\n\n \n\nMaps Ultimate Buy ..Maps Microsoft یا Maps Yahoo ,Maps Google ذخیره نقشه های ماهواره ای جهت دانلود نقشه های کوچک را از\nDownloader 4 genuine\u2063 license, Key Features, Overview, FAQ, Coupon Code.. Ultimate Maps Downloader. 4.8.1. By Lizard\nLabs. Ultimate Maps Downloader is a detailed mapping software that allows you to download map .... Download Dev-C++ for\nfree. A free, portable ... Map, analyze, and automate processes, manage regulatory compliance, assess risks within a single\nplatform!. Ultimate Maps Downloader 4.8.1. March 9 2020 0. ultimate maps, ultimate maps downloader, ultimate maps\ndownloader 3.0.1, ultimate maps downloader crack, .... MARVEL's Captain Marvel Update! 1. Captain Marvel Character\nUpdate - New Characters: Nick Fury, Minn-Erva, Korath - New Uniforms: Captain Marvel, Ronan .... Ultimate Maps\nDownloader 4.8.1 | 56.1 Mb Ultimate Maps Downloader is a detailed mapping software that allows you to download map\nimagery, topographic .... Ultimate Maps Downloader 5.9.13 Torrent Download 2019. This product is always a good utility to\nturn ... Version, 4.8.1. Updated, 08/06/2019 .... Download Ultimate Maps Downloader 4.8.1 Crack Phần mềm lập bản đồ chi\ntiết cho phép bạn tải xuống hình ảnh bản đồ, bản đồ địa hình và .... 22 Jun 2014 Download MTV India Coke Studio Season 3\ntorrent or any other to ... 28 Aug 2012 ... Ultimate Maps Downloader 4.8.1 With Crack. ultimate maps downloader, ultimate\nmaps, ultimate maps downloader 4.8.1 crack, ultimate maps wordpress, ultimate maps downloader full version, ultimate .... How\nto uninstall Ultimate Maps Downloader Version 4.8.1 by UMD? Learn how to remove Ultimate Maps Downloader Version\n4.8.1 from your computer. d299cc6e31 \n\nHD Online Player (Dilwale Dulhania Le Jayenge movie fu)\nfish tycoon apk full version\nMark Studio 2 Crack 3instmank\nintelliscore ensemble full crack 43\nliteratura brasileira william cereja e thereza cochar pdf 13\nOthello Story In Tamil Pdf Download\nKey To The Treasures Of Jannah Book Pdf\nThe Immortals Of Meluha Ebook Epub Torrents\nVehicle Fleet Manager 4.0 Serial Key\nmu hobby dl wings legendary set.ZIP\n\nUltimate Maps Downloader 481\n\n                               4 / 4\n\nhttps://documen.site/download/hd-online-player-dilwale-dulhania-le-jayenge-movie-fu_pdf\nhttps://trello.com/c/1pJAV1Ba/365-top-fish-tycoon-apk-full-version\nhttps://trello.com/c/LsthbulW/363-mark-studio-2-crack-3instmank-2020\nhttps://uploads.strikinglycdn.com/files/e4f0513d-e90d-41a4-8e3b-ccce31cc28d8/intelliscore-ensemble-full-crack-43.pdf\nhttp://nacyclavi.tistory.com/79\nhttp://pukusaesu.tistory.com/47\nhttps://documen.site/download/key-to-the-treasures-of-jannah-book-pdf_pdf\nhttps://documen.site/download/the-immortals-of-meluha-ebook-epub-torrents_pdf\nhttps://trello.com/c/nlKi4dkd/368-vehicle-fleet-manager-40-serial-key-best\nhttps://trello.com/c/ItsXoic1/154-exclusive-mu-hobby-dl-wings-legendary-setzip\nhttp://www.tcpdf.org\n\n",
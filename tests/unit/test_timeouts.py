@@ -0,0 +1,67 @@
+"""
+Timeout Policy Test Suite
+=========================
+Tests parse timeouts chosen from the table and learned from parse times.
+
+"""
+
+import unittest
+
+from azul_plugin_tika.timeouts import MIB, TimeoutPolicy, parse_timeout_table
+
+
+class TestTimeoutPolicy(unittest.TestCase):
+    def test_parse_table(self):
+        self.assertEqual(
+            parse_timeout_table(["text/*=30", "Application/PDF = 120.5"]), {"text/*": 30.0, "application/pdf": 120.5}
+        )
+        with self.assertRaises(ValueError):
+            parse_timeout_table(["text/plain"])
+
+    def test_table(self):
+        policy = TimeoutPolicy(160, table={"text/*": 30, "text/html": 60, "application/pdf": 200})
+        self.assertEqual(policy.timeout("text/plain", 100), 30)
+        self.assertEqual(policy.timeout("text/html", 100), 60)
+        self.assertEqual(policy.timeout("image/png", 100), 160)
+        self.assertEqual(policy.timeout(None, 100), 160)
+        # never above the maximum
+        self.assertEqual(policy.timeout("application/pdf", 100), 160)
+
+    def test_learned(self):
+        policy = TimeoutPolicy(160, factor=3, min_timeout=5, min_samples=10)
+        for _ in range(9):
+            policy.observe("application/pdf", MIB, 2.0)
+        self.assertEqual(policy.timeout("application/pdf", MIB), 160)
+        policy.observe("application/pdf", 4 * MIB, 8.0)
+        # 2 seconds per MiB
+        self.assertEqual(policy.timeout("application/pdf", 100), 6.0)
+        self.assertEqual(policy.timeout("application/pdf", 10 * MIB), 60.0)
+        self.assertEqual(policy.timeout("application/pdf", 100 * MIB), 160)
+        for _ in range(10):
+            policy.observe("text/plain", 100, 0.01)
+        self.assertEqual(policy.timeout("text/plain", 100), 5)
+
+    def test_expected(self):
+        policy = TimeoutPolicy(160, min_samples=3)
+        policy.observe("application/pdf", MIB, 1.0)
+        policy.observe("application/pdf", MIB, 2.0)
+        self.assertIsNone(policy.expected("application/pdf", MIB))
+        policy.observe("application/pdf", MIB, 30.0)
+        # median rather than the slow tail
+        self.assertEqual(policy.expected("application/pdf", 100), 2.0)
+        self.assertEqual(policy.expected("Application/PDF", 4 * MIB), 8.0)
+        self.assertIsNone(policy.expected(None, 100))
+
+    def test_p99_tracks_slow_tail(self):
+        policy = TimeoutPolicy(160, factor=2, min_timeout=1, min_samples=10)
+        for _ in range(99):
+            policy.observe("application/pdf", 100, 1.0)
+        policy.observe("application/pdf", 100, 20.0)
+        self.assertEqual(policy.timeout("application/pdf", 100), 2.0)
+        policy.observe("application/pdf", 100, 20.0)
+        self.assertEqual(policy.timeout("application/pdf", 100), 40.0)
+
+    def test_not_adaptive(self):
+        policy = TimeoutPolicy(160, table={"text/*": 30}, adaptive=False, min_samples=1)
+        policy.observe("text/plain", 100, 1.0)
+        self.assertEqual(policy.timeout("text/plain", 100), 30)